@@ -1,16 +1,17 @@
 import json
-from openai import OpenAI
 from typing import Dict, Any
 from backend.config import settings
+from backend.agent.llm_cache import llm_cache
+from backend.agent.llm_client import llm_client
+from backend.agent.log_condenser import condense_logs
 from backend.logger import logger
 
 class AIClient:
     def __init__(self):
-        if not settings.OPENAI_API_KEY:
+        # Shares the process-wide pooled connections
+        self.client = llm_client.sync_client
+        if not self.client:
             logger.warning("OPENAI_API_KEY not set. AI analysis will be unavailable.")
-            self.client = None
-        else:
-            self.client = OpenAI(api_key=settings.OPENAI_API_KEY)
         
     def analyze_failure(self, logs: list[str], test_name: str, context: Dict[str, str]) -> Dict[str, Any]:
         if not self.client:
@@ -24,7 +25,7 @@ class AIClient:
                 "severity": "Low"
             }
 
-        logs_text = "\n".join(logs[-50:]) # Send last 50 lines
+        logs_text = condense_logs(logs)
         
         # Extract context
         overview = context.get("overview", "N/A")
@@ -57,17 +58,17 @@ class AIClient:
         
         try:
             logger.info(f"Sending request to OpenAI for test: {test_name}")
-            response = self.client.chat.completions.create(
-                model=settings.OPENAI_MODEL,
-                messages=[
+            # Answers that are not JSON raise here and are not cached
+            return llm_cache.complete_sync(
+                self.client,
+                settings.OPENAI_MODEL,
+                [
                     {"role": "system", "content": "You are a helpful QA assistant that outputs JSON."},
                     {"role": "user", "content": prompt}
                 ],
+                parse=json.loads,
                 response_format={ "type": "json_object" }
             )
-            
-            content = response.choices[0].message.content
-            return json.loads(content)
         except Exception as e:
             logger.error(f"AI Analysis failed for test {test_name}: {e}", exc_info=True)
             return {
@@ -3,38 +3,83 @@ Test Analyzer Module
 Analyzes test failures and generates bug reports using AI
 """
 
+import asyncio
 import json
 import logging
-from typing import Dict, List, Any
+from typing import Any, Awaitable, Callable, Dict, List, Optional
 from datetime import datetime
 from sqlalchemy.orm import Session
+from backend.config import settings
 from backend.database.models import Bug
-import openai
-import os
+from backend.agent.artifact_store import artifact_store, bug_artifact_urls
+from backend.agent.checks import get_check_by_name
+from backend.agent.llm_cache import llm_cache
+from backend.agent.llm_client import LLMClient, llm_client
+from backend.agent.suite_runner import failure_from_test
 
 logger = logging.getLogger(__name__)
 
+SEVERITY_RANK = {"Low": 0, "Medium": 1, "High": 2, "Critical": 3}
+
+SYSTEM_PROMPT = "You are a QA expert who writes detailed bug reports."
+
+# Fields an AI answer may replace in a bug report
+ENHANCED_FIELDS = ("summary", "steps", "actual_result", "expected_result", "insights")
+
 class TestAnalyzer:
-    def __init__(self):
-        self.openai_client = None
-        self.setup_openai()
-    
-    def setup_openai(self):
-        """Initialize OpenAI client"""
-        try:
-            api_key = os.getenv('OPENAI_API_KEY')
-            if api_key:
-                openai.api_key = api_key
-                self.openai_client = openai
-            else:
-                logger.warning("OpenAI API key not found. Bug analysis will be limited.")
-        except Exception as e:
-            logger.error(f"Failed to setup OpenAI: {e}")
+    def __init__(self, client: Optional[LLMClient] = None):
+        # The process-wide pooled client unless one is injected; None without an API key
+        self.client = client or llm_client
+        self.async_client = self.client if self.client.available else None
     
     def generate_bug_report(self, failure: Dict[str, Any], context: Dict[str, str], provider: str) -> Dict[str, Any]:
         """Generate a detailed bug report from test failure"""
+        bug_report = self.base_report(failure, context)
         
-        # Basic bug report structure
+        # Enhance with AI if available
+        if self.client.sync_client:
+            try:
+                enhanced_report = self.enhance_with_ai(bug_report, context, provider)
+                if enhanced_report:
+                    bug_report.update(enhanced_report)
+            except Exception as e:
+                logger.error(f"Failed to enhance bug report with AI: {e}")
+        
+        return bug_report
+    
+    async def generate_bug_report_async(self, failure: Dict[str, Any], context: Dict[str, str],
+                                        provider: str) -> Dict[str, Any]:
+        """generate_bug_report() without blocking the event loop"""
+        bug_report = self.base_report(failure, context)
+        if self.async_client:
+            enhanced_report = await self.enhance_with_ai_async(bug_report, context, provider)
+            if enhanced_report:
+                bug_report.update(enhanced_report)
+        return bug_report
+    
+    async def generate_bug_reports_batch_async(self, failures: List[Dict[str, Any]], context: Dict[str, str],
+                                               provider: str) -> List[Dict[str, Any]]:
+        """
+        All of a run's bug reports from one AI call, so the shared context is
+        sent once. Falls back to a call per failure when the answer cannot be
+        mapped back to every failure.
+        """
+        bug_reports = [self.base_report(failure, context) for failure in failures]
+        if not self.async_client:
+            return bug_reports
+        if len(failures) == 1:
+            return [await self.generate_bug_report_async(failures[0], context, provider)]
+        enhanced_reports = await self.enhance_batch_async(bug_reports, context, provider)
+        if enhanced_reports is None:
+            logger.warning(f"Batched analysis of {len(failures)} failures unusable; analyzing them one by one")
+            return list(await asyncio.gather(*(self.generate_bug_report_async(failure, context, provider)
+                                               for failure in failures)))
+        for bug_report, enhanced_report in zip(bug_reports, enhanced_reports):
+            bug_report.update(enhanced_report)
+        return bug_reports
+    
+    def base_report(self, failure: Dict[str, Any], context: Dict[str, str]) -> Dict[str, Any]:
+        """Bug report built from the failure and its check alone"""
         bug_report = {
             "summary": f"Test Failure: {failure.get('test', 'Unknown Test')}",
             "test_name": failure.get('test', 'Unknown Test'),
@@ -43,127 +88,123 @@ class TestAnalyzer:
             "steps": self.generate_steps(failure, context),
             "actual_result": failure.get('error', 'Test failed'),
             "expected_result": self.generate_expected_result(failure),
+            "screenshot_path": failure.get('screenshot_path'),
+            "video_path": failure.get('video_path'),
             "environment": {
                 "browser": "Chrome",
                 "os": "Linux",
                 "viewport": "1280x720"
             }
         }
-        
-        # Enhance with AI if available
-        if self.openai_client:
-            try:
-                enhanced_report = self.enhance_with_ai(bug_report, context, provider)
-                if enhanced_report:
-                    bug_report.update(enhanced_report)
-            except Exception as e:
-                logger.error(f"Failed to enhance bug report with AI: {e}")
-        
+        if failure.get('trace_path'):
+            bug_report["environment"]["trace"] = failure['trace_path']
+        if failure.get('har_path'):
+            bug_report["environment"]["har"] = failure['har_path']
         return bug_report
     
     def determine_severity(self, failure: Dict[str, Any]) -> str:
-        """Determine bug severity based on failure type"""
+        """Use the failing check's declared severity, raised to High for connectivity errors"""
         test_name = failure.get('test', '').lower()
         error = failure.get('error', '').lower()
+        check = get_check_by_name(failure.get('test', ''))
         
-        # Critical issues
-        if any(keyword in test_name for keyword in ['load', 'crash', 'security']):
-            return "Critical"
+        if check:
+            severity = check.severity
+        elif any(keyword in test_name for keyword in ['load', 'crash', 'security']):
+            severity = "Critical"
+        elif any(keyword in test_name for keyword in ['login', 'payment', 'checkout']):
+            severity = "High"
+        else:
+            severity = "Medium"
         
         if any(keyword in error for keyword in ['timeout', 'connection', 'network']):
-            return "High"
+            if SEVERITY_RANK.get(severity, 0) < SEVERITY_RANK["High"]:
+                return "High"
         
-        # High priority issues
-        if any(keyword in test_name for keyword in ['login', 'payment', 'checkout']):
-            return "High"
-        
-        # Medium priority by default
-        return "Medium"
+        return severity
     
     def generate_steps(self, failure: Dict[str, Any], context: Dict[str, str]) -> str:
-        """Generate reproduction steps"""
-        test_name = failure.get('test', '')
+        """Generate reproduction steps from the failing check's declared steps"""
+        check = get_check_by_name(failure.get('test', ''))
         
-        base_steps = [
-            "1. Open web browser",
-            "2. Navigate to the test URL",
+        steps = [
+            "Open web browser",
+            "Navigate to the test URL",
         ]
         
-        if 'load' in test_name.lower():
-            base_steps.extend([
-                "3. Wait for page to load completely",
-                "4. Observe the loading behavior"
-            ])
-        elif 'title' in test_name.lower():
-            base_steps.extend([
-                "3. Check the page title in browser tab",
-                "4. Verify title content"
-            ])
-        elif 'elements' in test_name.lower():
-            base_steps.extend([
-                "3. Inspect page elements",
-                "4. Look for missing or broken elements"
-            ])
-        elif 'interactive' in test_name.lower():
-            base_steps.extend([
-                "3. Try to interact with buttons, links, and form elements",
-                "4. Check if elements respond to user input"
-            ])
-        elif 'console' in test_name.lower():
-            base_steps.extend([
-                "3. Open browser developer tools (F12)",
-                "4. Check the Console tab for errors"
-            ])
+        if check and check.steps:
+            steps.extend(check.render_steps(failure))
         else:
-            base_steps.extend([
-                "3. Perform the test action",
-                "4. Observe the result"
+            steps.extend([
+                "Perform the test action",
+                "Observe the result"
             ])
         
-        return "\n".join(base_steps)
+        return "\n".join(f"{number}. {step}" for number, step in enumerate(steps, start=1))
     
     def generate_expected_result(self, failure: Dict[str, Any]) -> str:
         """Generate expected result description"""
-        test_name = failure.get('test', '').lower()
-        
-        if 'load' in test_name:
-            return "Page should load successfully without errors and display content within reasonable time"
-        elif 'title' in test_name:
-            return "Page should have a meaningful, non-empty title that describes the page content"
-        elif 'elements' in test_name:
-            return "Page should contain basic HTML structure with proper elements"
-        elif 'interactive' in test_name:
-            return "Page should have interactive elements (buttons, links, forms) that users can interact with"
-        elif 'console' in test_name:
-            return "Page should load without JavaScript console errors"
-        else:
-            return "Test should pass without errors"
+        check = get_check_by_name(failure.get('test', ''))
+        if check:
+            return check.render_expected_result(failure)
+        return "Test should pass without errors"
     
     def enhance_with_ai(self, bug_report: Dict[str, Any], context: Dict[str, str], provider: str) -> Dict[str, Any]:
         """Enhance bug report using AI analysis"""
         try:
-            prompt = self.build_ai_prompt(bug_report, context, provider)
-            
-            response = self.openai_client.ChatCompletion.create(
-                model=os.getenv('OPENAI_MODEL', 'gpt-3.5-turbo'),
-                messages=[
-                    {"role": "system", "content": "You are a QA expert who writes detailed bug reports."},
-                    {"role": "user", "content": prompt}
-                ],
+            # The same failure on the same site gives the same prompt; the cache reuses its answer
+            # Parse AI response and enhance bug report; only a parsed answer is cached
+            return llm_cache.complete_sync(
+                self.client.sync_client,
+                settings.OPENAI_MODEL,
+                self.build_ai_messages(bug_report, context, provider),
+                parse=lambda content: self.parse_ai_response(content.strip()),
                 max_tokens=500,
                 temperature=0.3
             )
             
-            ai_content = response.choices[0].message.content.strip()
-            
-            # Parse AI response and enhance bug report
-            enhanced = self.parse_ai_response(ai_content)
-            return enhanced
-            
         except Exception as e:
             logger.error(f"AI enhancement failed: {e}")
             return {}
     
+    async def enhance_with_ai_async(self, bug_report: Dict[str, Any], context: Dict[str, str],
+                                    provider: str) -> Dict[str, Any]:
+        """enhance_with_ai() through the async client"""
+        try:
+            return await llm_cache.complete(self.async_client, settings.OPENAI_MODEL,
+                                            self.build_ai_messages(bug_report, context, provider),
+                                            parse=lambda content: self.parse_ai_response(content.strip()),
+                                            max_tokens=500, temperature=0.3)
+        except Exception as e:
+            logger.error(f"AI enhancement failed for {bug_report['test_name']}: {e}")
+            return {}
+    
+    async def enhance_batch_async(self, bug_reports: List[Dict[str, Any]], context: Dict[str, str],
+                                  provider: str) -> Optional[List[Dict[str, Any]]]:
+        """Enhancements for every report in order, or None if the call or its answer failed"""
+        try:
+            # A rejected answer is not cached, so the next run asks again
+            return await llm_cache.complete(
+                self.async_client, settings.OPENAI_MODEL,
+                [
+                    {"role": "system", "content": SYSTEM_PROMPT},
+                    {"role": "user", "content": self.build_batch_prompt(bug_reports, context, provider)}
+                ],
+                parse=lambda content: self.parse_batch_response(content, len(bug_reports)),
+                max_tokens=min(500 * len(bug_reports), 4000),
+                temperature=0.3,
+                response_format={"type": "json_object"}
+            )
+        except Exception as e:
+            logger.error(f"Batched AI enhancement failed: {e}")
+            return None
+    
+    def build_ai_messages(self, bug_report: Dict[str, Any], context: Dict[str, str], provider: str) -> List[Dict[str, str]]:
+        return [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": self.build_ai_prompt(bug_report, context, provider)}
+        ]
+    
     def build_ai_prompt(self, bug_report: Dict[str, Any], context: Dict[str, str], provider: str) -> str:
         """Build prompt for AI enhancement"""
         return f"""
@@ -186,6 +227,53 @@ Please provide:
 Format your response as JSON with keys: summary, steps, actual_result, expected_result, insights
 """
     
+    def build_batch_prompt(self, bug_reports: List[Dict[str, Any]], context: Dict[str, str], provider: str) -> str:
+        """One prompt for all failures of a run, with the context stated once"""
+        failures = "\n".join(
+            f"Test Failure {index}: {bug_report['test_name']}\n"
+            f"Error: {bug_report['actual_result']}\n"
+            f"Severity: {bug_report['severity']}\n"
+            for index, bug_report in enumerate(bug_reports, start=1)
+        )
+        return f"""
+Please enhance these {len(bug_reports)} bug reports from one test run for {provider} platform:
+
+{failures}
+Context:
+- Overview: {context.get('overview', 'N/A')}
+- Instructions: {context.get('instructions', 'N/A')}
+
+For each failure please provide:
+1. An improved summary (max 100 chars)
+2. More detailed steps to reproduce
+3. Better description of expected vs actual results
+4. Any additional insights, including whether it follows from another failure in this run
+
+Format your response as a JSON object {{"reports": [...]}} with one entry per failure, each with keys: index, summary, steps, actual_result, expected_result, insights
+"""
+    
+    def parse_batch_response(self, ai_content: str, count: int) -> Optional[List[Dict[str, Any]]]:
+        """The enhancement for each of count failures by index, or None unless every failure got one"""
+        try:
+            data = json.loads(ai_content)
+        except (TypeError, ValueError) as e:
+            logger.error(f"Failed to parse batched AI response: {e}")
+            return None
+        items = data.get("reports") if isinstance(data, dict) else data
+        if not isinstance(items, list):
+            return None
+        enhanced: Dict[int, Dict[str, Any]] = {}
+        for item in items:
+            if not isinstance(item, dict) or not isinstance(item.get("index"), int):
+                continue
+            enhanced[item["index"]] = {
+                key: "\n".join(map(str, value)) if isinstance(value, list) else str(value)
+                for key, value in item.items() if key in ENHANCED_FIELDS and value
+            }
+        if set(enhanced) != set(range(1, count + 1)):
+            return None
+        return [enhanced[index] for index in range(1, count + 1)]
+    
     def parse_ai_response(self, ai_content: str) -> Dict[str, Any]:
         """Parse AI response and extract enhancements"""
         try:
@@ -209,6 +297,33 @@ Format your response as JSON with keys: summary, steps, actual_result, expected_
             logger.error(f"Failed to parse AI response: {e}")
             return {}
 
+def extract_failures(test_results: Dict[str, Any]) -> List[Dict[str, Any]]:
+    failures = test_results.get('failures')
+    if failures is None:
+        # Raw pytest-json-report output
+        tests = (test_results.get('report_data') or {}).get('tests', [])
+        failures = [f for f in map(failure_from_test, tests) if f]
+    return failures
+
+def add_bug(db: Session, job_id: str, bug_data: Dict[str, Any]) -> Bug:
+    """Add the bug record and reference its artifacts; the caller commits"""
+    bug = Bug(
+        job_id=job_id,
+        summary=bug_data['summary'],
+        test_name=bug_data['test_name'],
+        severity=bug_data['severity'],
+        status=bug_data['status'],
+        steps=bug_data['steps'],
+        actual_result=bug_data['actual_result'],
+        expected_result=bug_data['expected_result'],
+        screenshot_path=bug_data.get('screenshot_path'),
+        video_path=bug_data.get('video_path'),
+        environment=json.dumps(bug_data.get('environment', {}))
+    )
+    db.add(bug)
+    artifact_store.add_references(db, bug_artifact_urls(bug))
+    return bug
+
 def analyze_test_run(job_id: str, test_results: Dict[str, Any], context: Dict[str, str], provider: str, db: Session) -> List[Dict[str, Any]]:
     """
     Analyze test run results and generate bug reports
@@ -217,26 +332,10 @@ def analyze_test_run(job_id: str, test_results: Dict[str, Any], context: Dict[st
     bugs = []
     
     try:
-        failures = test_results.get('failures', [])
-        
-        for failure in failures:
-            # Generate bug report
+        for failure in extract_failures(test_results):
+            # Generate bug report and create its record in the database
             bug_data = analyzer.generate_bug_report(failure, context, provider)
-            
-            # Create bug record in database
-            bug = Bug(
-                job_id=job_id,
-                summary=bug_data['summary'],
-                test_name=bug_data['test_name'],
-                severity=bug_data['severity'],
-                status=bug_data['status'],
-                steps=bug_data['steps'],
-                actual_result=bug_data['actual_result'],
-                expected_result=bug_data['expected_result'],
-                environment=json.dumps(bug_data.get('environment', {}))
-            )
-            
-            db.add(bug)
+            add_bug(db, job_id, bug_data)
             bugs.append(bug_data)
         
         db.commit()
@@ -246,4 +345,49 @@ def analyze_test_run(job_id: str, test_results: Dict[str, Any], context: Dict[st
         logger.error(f"Error analyzing test run: {e}")
         db.rollback()
     
-    return bugs
\ No newline at end of file
+    return bugs
+
+async def analyze_test_run_async(job_id: str, test_results: Dict[str, Any], context: Dict[str, str], provider: str,
+                                 db: Session, on_bug: Optional[Callable[[Dict[str, Any]], Awaitable[None]]] = None,
+                                 analyzer: Optional[TestAnalyzer] = None,
+                                 batch: Optional[bool] = None) -> List[Dict[str, Any]]:
+    """
+    Analyze every failure of the run at once. The AI calls share the
+    process-wide analysis slots with other jobs, so the run takes about as
+    long as its slowest call rather than the sum of them. Each bug is
+    committed, and passed to on_bug, as soon as its analysis completes.
+    In batch mode (ANALYSIS_BATCH) the failures go to the AI in one call.
+    """
+    analyzer = analyzer or TestAnalyzer()
+    batch = settings.ANALYSIS_BATCH if batch is None else batch
+    failures = extract_failures(test_results)
+    bugs = []
+    if batch and len(failures) > 1:
+        reports = [asyncio.ensure_future(analyzer.generate_bug_reports_batch_async(failures, context, provider))]
+    else:
+        reports = [asyncio.ensure_future(analyzer.generate_bug_report_async(failure, context, provider))
+                   for failure in failures]
+    try:
+        for report in asyncio.as_completed(reports):
+            try:
+                result = await report
+            except Exception as e:
+                logger.error(f"Error analyzing failures of job {job_id}: {e}")
+                continue
+            for bug_data in result if isinstance(result, list) else [result]:
+                try:
+                    add_bug(db, job_id, bug_data)
+                    db.commit()
+                except Exception as e:
+                    logger.error(f"Error saving a bug of job {job_id}: {e}")
+                    db.rollback()
+                    continue
+                bugs.append(bug_data)
+                if on_bug:
+                    await on_bug(bug_data)
+    finally:
+        # Cancelled part-way, e.g. with the job: stop the calls still in flight
+        for report in reports:
+            report.cancel()
+    logger.info(f"Generated {len(bugs)} bug reports for job {job_id}")
+    return bugs
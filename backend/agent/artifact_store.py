@@ -0,0 +1,284 @@
+"""
+Artifact Store Module
+Content-addressed storage for failure artifacts with reference counts, a disk quota and eviction
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional
+from sqlalchemy import and_, func, or_
+from sqlalchemy.exc import IntegrityError
+from backend.config import settings
+from backend.database.core import SessionLocal
+from backend.database.models import Artifact, Bug, Job
+
+logger = logging.getLogger(__name__)
+
+# Keys of Bug.environment that link an artifact, next to screenshot_path and video_path
+ENVIRONMENT_LINKS = ("trace", "har")
+
+def bug_environment(bug: Bug) -> Dict[str, Any]:
+    try:
+        environment = json.loads(bug.environment or "{}")
+    except ValueError:
+        return {}
+    return environment if isinstance(environment, dict) else {}
+
+def bug_artifact_urls(bug: Bug) -> List[str]:
+    """Every artifact a bug links to: its screenshot, video, trace and HAR"""
+    environment = bug_environment(bug)
+    urls = [bug.screenshot_path, bug.video_path] + [environment.get(key) for key in ENVIRONMENT_LINKS]
+    return [url for url in urls if url]
+
+class ArtifactStore:
+    """
+    Stores each distinct artifact once, under cas/<hash[:2]>/<hash><suffix>.
+    Bug rows, and jobs for their HAR, hold references; unreferenced artifacts are dropped after a grace
+    period, anything unused for ARTIFACT_MAX_AGE_DAYS is dropped, and when the
+    store exceeds its quota the least recently used artifacts go first.
+    Hashing, file and database work all run on a small thread pool so
+    multi-megabyte artifacts never stall the event loop that drives browsers.
+    """
+
+    def __init__(self, root: Optional[str] = None, session_factory: Optional[Callable] = None,
+                 quota_bytes: Optional[int] = None, max_age_days: Optional[int] = None,
+                 orphan_grace_seconds: Optional[int] = None, gc_interval_seconds: Optional[int] = None,
+                 workers: Optional[int] = None):
+        self.root = Path(root or settings.artifacts_path)
+        self.workers = workers or settings.ARTIFACT_WORKERS
+        self.session_factory = session_factory or SessionLocal
+        self.quota_bytes = quota_bytes or settings.ARTIFACT_QUOTA_BYTES
+        self.max_age_days = max_age_days or settings.ARTIFACT_MAX_AGE_DAYS
+        self.orphan_grace_seconds = (orphan_grace_seconds if orphan_grace_seconds is not None
+                                     else settings.ARTIFACT_ORPHAN_GRACE_SECONDS)
+        self.gc_interval_seconds = gc_interval_seconds or settings.ARTIFACT_GC_INTERVAL_SECONDS
+        self.dedup_hits = 0
+        self.evictions_total = 0
+        self.evicted_bytes = 0
+        self._gc_task: Optional[asyncio.Task] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="artifacts")
+        return self._executor
+
+    async def run(self, fn: Callable, *args) -> Any:
+        """Run blocking artifact work on the store's thread pool"""
+        return await asyncio.get_running_loop().run_in_executor(self.executor, fn, *args)
+
+    @property
+    def scratch_root(self) -> Path:
+        """Next to the store rather than in it: everything under root is served at /artifacts"""
+        return self.root.parent / f".{self.root.name}-recording"
+
+    async def make_temp_dir(self, name: str) -> Path:
+        """Scratch directory for files the Playwright driver writes before they are stored"""
+        path = self.scratch_root / name
+        await self.run(lambda: path.mkdir(parents=True, exist_ok=True))
+        return path
+
+    async def remove(self, path: Path):
+        await self.run(shutil.rmtree, path, True)
+
+    def path_for(self, digest: str, suffix: str) -> Path:
+        return self.root / "cas" / digest[:2] / f"{digest}{suffix}"
+
+    def file_for(self, url: str) -> Path:
+        return self.root / url[len("/artifacts/"):]
+
+    async def put_bytes(self, data: bytes, suffix: str) -> str:
+        """Store data and return its /artifacts URL; identical content is written once"""
+        return await self.run(self._put_bytes, data, suffix)
+
+    async def put_file(self, source: Path, suffix: Optional[str] = None) -> str:
+        """Move a finished file (video, trace) into the store and return its URL"""
+        return await self.run(self._put_file, Path(source), suffix or Path(source).suffix)
+
+    def _put_bytes(self, data: bytes, suffix: str) -> str:
+        def write(target: Path):
+            temp = target.with_name(f"{target.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+            temp.write_bytes(data)
+            os.replace(temp, target)
+
+        return self._store(hashlib.sha256(data).hexdigest(), suffix, len(data), write)
+
+    def _put_file(self, source: Path, suffix: str) -> str:
+        digest = hashlib.sha256()
+        with open(source, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+        size = source.stat().st_size
+
+        def write(target: Path):
+            temp = target.with_name(f"{target.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+            shutil.move(str(source), str(temp))
+            os.replace(temp, target)
+
+        try:
+            return self._store(digest.hexdigest(), suffix, size, write)
+        finally:
+            # Already stored under this hash
+            if source.exists():
+                source.unlink()
+
+    def _store(self, digest: str, suffix: str, size: int, write: Callable[[Path], None]) -> str:
+        target = self.path_for(digest, suffix)
+        url = "/artifacts/" + target.relative_to(self.root).as_posix()
+        db = self.session_factory()
+        try:
+            now = datetime.utcnow()
+            artifact = db.get(Artifact, digest)
+            if artifact is None or not target.exists():
+                target.parent.mkdir(parents=True, exist_ok=True)
+                write(target)
+            if artifact is None:
+                db.add(Artifact(hash=digest, path=url, size=size, refcount=0, writes=1,
+                                created_at=now, last_accessed_at=now))
+                try:
+                    db.commit()
+                    return url
+                except IntegrityError:
+                    # Another worker stored the same content first
+                    db.rollback()
+                    artifact = db.get(Artifact, digest)
+            artifact.writes += 1
+            artifact.last_accessed_at = now
+            db.commit()
+            self.dedup_hits += 1
+            return url
+        finally:
+            db.close()
+
+    def add_references(self, db, urls: Iterable[Optional[str]], delta: int = 1):
+        """Count Bug links to artifacts; runs in the caller's session and transaction"""
+        now = datetime.utcnow()
+        for url in urls:
+            if url:
+                db.query(Artifact).filter(Artifact.path == url).update(
+                    {Artifact.refcount: Artifact.refcount + delta, Artifact.last_accessed_at: now},
+                    synchronize_session=False)
+
+    def touch(self, db, urls: Iterable[Optional[str]]):
+        """Mark artifacts as recently used, e.g. when their bugs are viewed"""
+        urls = [url for url in urls if url]
+        if urls:
+            db.query(Artifact).filter(Artifact.path.in_(urls)).update(
+                {Artifact.last_accessed_at: datetime.utcnow()}, synchronize_session=False)
+            db.commit()
+
+    async def collect(self) -> Dict[str, int]:
+        """One garbage collection pass"""
+        return await self.run(self._collect)
+
+    def _collect(self) -> Dict[str, int]:
+        db = self.session_factory()
+        evicted = {"expired": 0, "orphaned": 0, "over_quota": 0}
+        try:
+            now = datetime.utcnow()
+            stale = now - timedelta(days=self.max_age_days)
+            orphaned_before = now - timedelta(seconds=self.orphan_grace_seconds)
+            candidates = db.query(Artifact).filter(or_(
+                Artifact.last_accessed_at < stale,
+                and_(Artifact.refcount <= 0, Artifact.created_at < orphaned_before),
+            )).all()
+            for artifact in candidates:
+                evicted["expired" if artifact.last_accessed_at < stale else "orphaned"] += 1
+                self._evict(db, artifact)
+            db.flush()
+
+            total = db.query(func.coalesce(func.sum(Artifact.size), 0)).scalar()
+            if total > self.quota_bytes:
+                # Unreferenced artifacts first, then least recently used
+                for artifact in db.query(Artifact).order_by(Artifact.refcount > 0, Artifact.last_accessed_at).all():
+                    if total <= self.quota_bytes:
+                        break
+                    total -= artifact.size
+                    evicted["over_quota"] += 1
+                    self._evict(db, artifact)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+        if any(evicted.values()):
+            logger.info(f"Artifact GC evicted {evicted}")
+        return evicted
+
+    def _evict(self, db, artifact: Artifact):
+        # Bugs keep their report; they just lose the link to evidence that no longer exists
+        db.query(Bug).filter(Bug.screenshot_path == artifact.path).update(
+            {Bug.screenshot_path: None}, synchronize_session=False)
+        db.query(Bug).filter(Bug.video_path == artifact.path).update(
+            {Bug.video_path: None}, synchronize_session=False)
+        for bug in db.query(Bug).filter(Bug.environment.contains(artifact.path)):
+            environment = bug_environment(bug)
+            bug.environment = json.dumps({key: value for key, value in environment.items()
+                                          if not (key in ENVIRONMENT_LINKS and value == artifact.path)})
+        db.query(Job).filter(Job.har_path == artifact.path).update(
+            {Job.har_path: None}, synchronize_session=False)
+        self.file_for(artifact.path).unlink(missing_ok=True)
+        db.delete(artifact)
+        self.evictions_total += 1
+        self.evicted_bytes += artifact.size or 0
+
+    async def start(self):
+        if self._gc_task is None:
+            self._gc_task = asyncio.create_task(self._gc_loop())
+
+    async def stop(self):
+        if self._gc_task is not None:
+            self._gc_task.cancel()
+            try:
+                await self._gc_task
+            except asyncio.CancelledError:
+                pass
+            self._gc_task = None
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    async def _gc_loop(self):
+        while True:
+            try:
+                await self.collect()
+            except Exception as e:
+                logger.error(f"Artifact GC failed: {e}")
+            await asyncio.sleep(self.gc_interval_seconds)
+
+    def stats(self) -> Dict[str, Any]:
+        db = self.session_factory()
+        try:
+            objects, stored, written = db.query(
+                func.count(Artifact.hash),
+                func.coalesce(func.sum(Artifact.size), 0),
+                func.coalesce(func.sum(Artifact.size * Artifact.writes), 0),
+            ).one()
+            referenced = db.query(func.count(Artifact.hash)).filter(Artifact.refcount > 0).scalar()
+        finally:
+            db.close()
+        return {
+            "objects": objects,
+            "referenced_objects": referenced,
+            "bytes_stored": stored,
+            "bytes_written": written,
+            "dedup_ratio": round(written / stored, 2) if stored else 1.0,
+            "quota_bytes": self.quota_bytes,
+            "dedup_hits": self.dedup_hits,
+            "evictions_total": self.evictions_total,
+            "evicted_bytes": self.evicted_bytes,
+        }
+
+artifact_store = ArtifactStore()
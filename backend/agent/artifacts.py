@@ -0,0 +1,120 @@
+"""
+Artifacts Module
+Captures failure evidence (screenshots, videos, traces) for the artifact store
+"""
+
+import asyncio
+import logging
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+from backend.config import settings
+from backend.agent.artifact_store import ArtifactStore, artifact_store
+
+logger = logging.getLogger(__name__)
+
+class ArtifactRecorder:
+    """
+    Failure evidence for one run. Screenshots are only taken for failed
+    checks, so passing runs pay nothing unless video or tracing was requested.
+    Everything captured is timed into capture_ms.
+    """
+
+    def __init__(self, run_id: str, video: bool = False, trace: bool = False,
+                 store: Optional[ArtifactStore] = None):
+        self.run_id = run_id
+        self.video = video
+        self.trace = trace
+        self.store = store or artifact_store
+        self.capture_ms = 0.0
+        self.files = 0
+        self.bytes = 0
+        self._scratch: Optional[Path] = None
+        self._tracing = False
+
+    def _timed(self, started: float):
+        self.capture_ms = round(self.capture_ms + (time.perf_counter() - started) * 1000, 1)
+
+    async def context_options(self) -> Dict[str, Any]:
+        """Options for the leased context; video has to be requested when the context is created"""
+        if self.video or self.trace:
+            self._scratch = await self.store.make_temp_dir(self.run_id)
+        if not self.video:
+            return {}
+        return {"record_video_dir": str(self._scratch)}
+
+    async def start(self, context):
+        if self.trace:
+            await context.tracing.start(screenshots=True, snapshots=True)
+            self._tracing = True
+
+    async def screenshot(self, page, name: str) -> Optional[str]:
+        """JPEG of the page as the check left it; the browser encodes, the file write runs off-loop"""
+        started = time.perf_counter()
+        try:
+            data = await asyncio.wait_for(
+                page.screenshot(type="jpeg", quality=settings.ARTIFACT_SCREENSHOT_QUALITY),
+                timeout=settings.ARTIFACT_CAPTURE_TIMEOUT_SECONDS,
+            )
+            url = await self.store.put_bytes(data, ".jpg")
+            self.files += 1
+            self.bytes += len(data)
+            return url
+        except Exception as e:
+            logger.warning(f"Could not capture screenshot for {name}: {e}")
+            return None
+        finally:
+            self._timed(started)
+
+    async def stop_trace(self, context, keep: bool) -> Optional[str]:
+        """Stop tracing before the context closes; the trace zip is only written when kept"""
+        if not self._tracing:
+            return None
+        self._tracing = False
+        started = time.perf_counter()
+        try:
+            if not keep:
+                await context.tracing.stop()
+                return None
+            path = self._scratch / "trace.zip"
+            await asyncio.wait_for(context.tracing.stop(path=str(path)),
+                                   timeout=settings.ARTIFACT_CAPTURE_TIMEOUT_SECONDS)
+            size = path.stat().st_size
+            url = await self.store.put_file(path)
+            self.files += 1
+            self.bytes += size
+            return url
+        except Exception as e:
+            logger.warning(f"Could not save trace for run {self.run_id}: {e}")
+            return None
+        finally:
+            self._timed(started)
+
+    async def finish_video(self, video, keep: bool) -> Optional[str]:
+        """Store the finished recording, or drop it; call after the context closed"""
+        if self._scratch is None:
+            return None
+        started = time.perf_counter()
+        try:
+            if keep and video is not None:
+                source = Path(await video.path())
+                size = source.stat().st_size
+                url = await self.store.put_file(source)
+                self.files += 1
+                self.bytes += size
+                return url
+            return None
+        except Exception as e:
+            logger.warning(f"Could not save video for run {self.run_id}: {e}")
+            return None
+        finally:
+            await self.store.remove(self._scratch)
+            self._scratch = None
+            self._timed(started)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "capture_ms": self.capture_ms,
+            "files": self.files,
+            "bytes": self.bytes,
+        }
@@ -0,0 +1,217 @@
+"""
+Auth State Module
+Named login profiles whose Playwright storage state is captured once, encrypted on disk and reused by every run
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from typing import Any, Dict, Optional
+from urllib.parse import urlsplit
+from cryptography.fernet import Fernet, InvalidToken
+from backend.config import settings
+
+logger = logging.getLogger(__name__)
+
+class UnknownProfile(KeyError):
+    """No credential profile with this name is configured"""
+
+class LoginFailed(Exception):
+    """The profile's login flow did not end on a logged-in page"""
+
+class AuthProfile:
+    """
+    How to log in to a target. The password comes from the environment
+    variable named by password_env so the profiles file holds no secrets.
+    """
+
+    def __init__(self, name: str, login_url: str, username: str, password_env: str = "", password: str = "",
+                 username_selector: str = "input[type=email], input[name=username], input[name=email]",
+                 password_selector: str = "input[type=password]",
+                 submit_selector: str = "button[type=submit], input[type=submit]",
+                 ttl_seconds: Optional[int] = None):
+        self.name = name
+        self.login_url = login_url
+        self.username = username
+        self.password_env = password_env
+        self._password = password
+        self.username_selector = username_selector
+        self.password_selector = password_selector
+        self.submit_selector = submit_selector
+        self.ttl_seconds = ttl_seconds or settings.AUTH_STATE_TTL_SECONDS
+
+    @classmethod
+    def from_dict(cls, name: str, data: Dict[str, Any]) -> "AuthProfile":
+        return cls(name, **data)
+
+    @property
+    def password(self) -> str:
+        return os.environ.get(self.password_env, "") if self.password_env else self._password
+
+    def is_login_page(self, url: str) -> bool:
+        """Whether url is the login page, e.g. after a redirect because the saved session expired"""
+        login, current = urlsplit(self.login_url), urlsplit(url or "")
+        return (current.netloc, current.path.rstrip("/")) == (login.netloc, login.path.rstrip("/"))
+
+def load_profiles(path: Optional[str] = None) -> Dict[str, AuthProfile]:
+    """Read AUTH_PROFILES_FILE: {"name": {"login_url": ..., "username": ..., "password_env": ...}}"""
+    path = path or settings.auth_profiles_path
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return {name: AuthProfile.from_dict(name, data) for name, data in json.load(f).items()}
+
+def state_key(directory: Optional[str] = None) -> bytes:
+    """
+    AUTH_STATE_KEY when set, otherwise a random Fernet key kept in a 0600
+    file in the state directory, generated by whichever process needs it first
+    """
+    if settings.AUTH_STATE_KEY:
+        return settings.AUTH_STATE_KEY.encode()
+    path = os.path.join(directory or settings.auth_state_path, "state.key")
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), "wb") as f:
+            f.write(Fernet.generate_key())
+        try:
+            # Only one process publishes its key; the others read the winner's
+            os.link(tmp, path)
+            logger.info(f"Generated a key for saved logins in {path}")
+        except FileExistsError:
+            pass
+        finally:
+            os.remove(tmp)
+    with open(path, "rb") as f:
+        return f.read().strip()
+
+class AuthStateCache:
+    """
+    Storage state per profile: cookies and local storage right after a
+    successful login. It is captured once in a context of its own, kept in
+    memory and in an encrypted file under AUTH_STATE_DIR until it expires, and
+    handed to every later context so runs start logged in. Concurrent runs
+    that find no valid state wait for a single login. invalidate() drops the
+    state, e.g. when a check ends up on the login page.
+    """
+
+    def __init__(self, directory: Optional[str] = None, key: Optional[bytes] = None,
+                 profiles: Optional[Dict[str, AuthProfile]] = None):
+        self.directory = directory or settings.auth_state_path
+        self._key = key
+        self._fernet_instance: Optional[Fernet] = None
+        self._profiles = profiles
+        self._memory: Dict[str, Any] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._failures: Dict[str, Any] = {}  # Profile -> (monotonic time, LoginFailed) of its last failed login
+        self.hits = 0
+        self.logins = 0
+        self.invalidations = 0
+
+    def profile(self, name: str) -> AuthProfile:
+        if self._profiles is None:
+            self._profiles = load_profiles()
+        if name not in self._profiles:
+            raise UnknownProfile(name)
+        return self._profiles[name]
+
+    async def storage_state(self, name: str, pool) -> Dict[str, Any]:
+        """The profile's saved state, logging in through a context from pool when there is none"""
+        profile = self.profile(name)
+        state = self._cached(name)
+        if state is not None:
+            self.hits += 1
+            return state
+        queued_at = time.monotonic()
+        async with self._locks.setdefault(name, asyncio.Lock()):
+            # Another run may have logged in while this one waited
+            state = self._cached(name)
+            if state is not None:
+                self.hits += 1
+                return state
+            failed_at, error = self._failures.get(name, (None, None))
+            if failed_at is not None and failed_at >= queued_at:
+                # ...or failed to: the same credentials would fail again
+                raise error
+            try:
+                state = await self.login(profile, pool)
+            except LoginFailed as e:
+                self._failures[name] = (time.monotonic(), e)
+                raise
+            self._failures.pop(name, None)
+            self._store(name, state, time.time() + profile.ttl_seconds)
+            return state
+
+    def invalidate(self, name: str):
+        if self._memory.pop(name, None) is not None or os.path.exists(self._path(name)):
+            self.invalidations += 1
+            logger.info(f"Saved login for profile '{name}' invalidated")
+        try:
+            os.remove(self._path(name))
+        except FileNotFoundError:
+            pass
+
+    async def login(self, profile: AuthProfile, pool) -> Dict[str, Any]:
+        self.logins += 1
+        timeout_ms = settings.AUTH_LOGIN_TIMEOUT_SECONDS * 1000
+        context = await pool.acquire()
+        try:
+            page = await context.new_page()
+            await page.goto(profile.login_url, wait_until="domcontentloaded", timeout=timeout_ms)
+            await page.fill(profile.username_selector, profile.username, timeout=timeout_ms)
+            await page.fill(profile.password_selector, profile.password, timeout=timeout_ms)
+            await page.click(profile.submit_selector, timeout=timeout_ms)
+            await page.wait_for_load_state("load", timeout=timeout_ms)
+            if profile.is_login_page(page.url):
+                raise LoginFailed(f"Login for profile '{profile.name}' stayed on {page.url}")
+            logger.info(f"Logged in with profile '{profile.name}'")
+            return await context.storage_state()
+        finally:
+            await pool.release(context)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"hits": self.hits, "logins": self.logins, "invalidations": self.invalidations}
+
+    @property
+    def _fernet(self) -> Fernet:
+        if self._fernet_instance is None:
+            self._fernet_instance = Fernet(self._key or state_key(self.directory))
+        return self._fernet_instance
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, hashlib.sha256(name.encode()).hexdigest()[:32] + ".state")
+
+    def _cached(self, name: str) -> Optional[Dict[str, Any]]:
+        entry = self._memory.get(name) or self._read(name)
+        if entry is None or entry["expires_at"] <= time.time():
+            self._memory.pop(name, None)
+            return None
+        self._memory[name] = entry
+        return entry["state"]
+
+    def _read(self, name: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._path(name), "rb") as f:
+                return json.loads(self._fernet.decrypt(f.read()))
+        except FileNotFoundError:
+            return None
+        except (InvalidToken, ValueError) as e:
+            # Written with another key, or damaged; a new login replaces it
+            logger.warning(f"Discarding unreadable saved login for profile '{name}': {e}")
+            return None
+
+    def _store(self, name: str, state: Dict[str, Any], expires_at: float):
+        entry = {"expires_at": expires_at, "state": state}
+        self._memory[name] = entry
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(name)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(self._fernet.encrypt(json.dumps(entry).encode()))
+        os.chmod(tmp, 0o600)
+        os.replace(tmp, path)
+
+auth_state_cache = AuthStateCache()
@@ -0,0 +1,277 @@
+"""
+Browser Pool Module
+Keeps pre-launched Chromium instances warm and leases isolated contexts to jobs
+"""
+
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import Dict, List, Any, Optional
+from playwright.async_api import async_playwright
+from backend.config import settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONTEXT_OPTIONS = {
+    "viewport": {"width": 1280, "height": 720},
+    "user_agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
+}
+
+class PooledBrowser:
+    """A launched browser and its lease bookkeeping"""
+
+    def __init__(self, browser):
+        self.browser = browser
+        self.uses = 0
+        self.active = 0
+        self.retiring = False
+
+    def is_available(self, contexts_per_browser: int, max_uses: int) -> bool:
+        return (
+            not self.retiring
+            and self.active < contexts_per_browser
+            and self.uses < max_uses
+            and self.browser.is_connected()
+        )
+
+class BrowserPool:
+    def __init__(self, size: Optional[int] = None, contexts_per_browser: Optional[int] = None,
+                 max_uses: Optional[int] = None, health_check_seconds: Optional[int] = None):
+        self.size = size or settings.BROWSER_POOL_SIZE
+        self.contexts_per_browser = contexts_per_browser or settings.BROWSER_CONTEXTS_PER_BROWSER
+        self.max_uses = max_uses or settings.BROWSER_MAX_USES
+        self.health_check_seconds = health_check_seconds or settings.BROWSER_HEALTH_CHECK_SECONDS
+        self._playwright = None
+        self._loop = None
+        self._browsers: List[PooledBrowser] = []
+        self._leases: Dict[Any, PooledBrowser] = {}
+        self._condition: Optional[asyncio.Condition] = None
+        self._health_task: Optional[asyncio.Task] = None
+        self._replacements: set = set()
+        self._waiting = 0
+        self.leases_total = 0
+        self.recycled_total = 0
+        self.unhealthy_total = 0
+
+    @property
+    def started(self) -> bool:
+        return self._playwright is not None
+
+    @property
+    def loop(self) -> Optional[asyncio.AbstractEventLoop]:
+        """Event loop the pool was started on"""
+        return self._loop
+
+    def is_bound_to_running_loop(self) -> bool:
+        """Whether the pool was started on the event loop the caller is running in"""
+        try:
+            return self.started and self._loop is asyncio.get_running_loop()
+        except RuntimeError:
+            return False
+
+    async def start(self):
+        """Start the Playwright driver and pre-launch the browsers"""
+        if self.started:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._condition = asyncio.Condition()
+        self._playwright = await async_playwright().start()
+        try:
+            for _ in range(self.size):
+                self._browsers.append(PooledBrowser(await self._launch()))
+        except Exception:
+            await self.stop()
+            raise
+        self._health_task = asyncio.create_task(self._health_loop())
+        logger.info(f"Browser pool started with {self.size} browser(s)")
+
+    async def stop(self):
+        """Close every browser and stop the Playwright driver"""
+        if self._health_task:
+            self._health_task.cancel()
+            self._health_task = None
+        for task in list(self._replacements):
+            task.cancel()
+        for entry in self._browsers:
+            await self._close_browser(entry)
+        self._browsers = []
+        self._leases = {}
+        if self._playwright:
+            try:
+                await self._playwright.stop()
+            except Exception as e:
+                logger.error(f"Error stopping Playwright driver: {e}")
+            self._playwright = None
+        self._loop = None
+
+    async def acquire(self, **context_options):
+        """Lease a fresh BrowserContext, waiting for a free slot if the pool is saturated"""
+        if not self.started:
+            await self.start()
+
+        async with self._condition:
+            self._waiting += 1
+            try:
+                entry = self._pick()
+                while entry is None:
+                    await self._condition.wait()
+                    entry = self._pick()
+            finally:
+                self._waiting -= 1
+            self._lease_slot(entry)
+        return await self._open(entry, context_options)
+
+    async def try_acquire(self, **context_options):
+        """
+        Lease a fresh BrowserContext only if a slot is free right now, else
+        return None. For callers that already hold a lease: waiting for a
+        second one while keeping the first can deadlock a saturated pool.
+        """
+        if not self.started:
+            await self.start()
+
+        async with self._condition:
+            entry = self._pick()
+            if entry is None:
+                return None
+            self._lease_slot(entry)
+        return await self._open(entry, context_options)
+
+    def _lease_slot(self, entry: PooledBrowser):
+        entry.active += 1
+        entry.uses += 1
+        self.leases_total += 1
+
+    async def _open(self, entry: PooledBrowser, context_options: Dict[str, Any]):
+        try:
+            context = await entry.browser.new_context(**{**DEFAULT_CONTEXT_OPTIONS, **context_options})
+        except Exception:
+            if not entry.browser.is_connected():
+                entry.retiring = True
+            await self._return_slot(entry)
+            raise
+        self._leases[context] = entry
+        return context
+
+    async def release(self, context):
+        """Close a leased context and hand its slot back to the pool"""
+        entry = self._leases.pop(context, None)
+        try:
+            await asyncio.wait_for(context.close(), timeout=settings.BROWSER_CLOSE_TIMEOUT_SECONDS)
+        except TimeoutError:
+            # A context that will not close means the browser is wedged
+            logger.warning("Timed out closing leased context; retiring its browser")
+            if entry:
+                entry.retiring = True
+        except Exception as e:
+            logger.warning(f"Error closing leased context: {e}")
+        if entry:
+            await self._return_slot(entry)
+
+    @asynccontextmanager
+    async def lease(self, **context_options):
+        context = await self.acquire(**context_options)
+        try:
+            yield context
+        finally:
+            await self.release(context)
+
+    def stats(self) -> Dict[str, Any]:
+        """Capacity and queue-depth metrics"""
+        healthy = [b for b in self._browsers if not b.retiring and b.browser.is_connected()]
+        in_use = sum(b.active for b in self._browsers)
+        capacity = len(healthy) * self.contexts_per_browser
+        return {
+            "started": self.started,
+            "size": self.size,
+            "browsers": len(self._browsers),
+            "healthy_browsers": len(healthy),
+            "capacity": capacity,
+            "in_use": in_use,
+            "available": max(capacity - sum(b.active for b in healthy), 0),
+            "queue_depth": self._waiting,
+            "leases_total": self.leases_total,
+            "recycled_total": self.recycled_total,
+            "unhealthy_total": self.unhealthy_total,
+        }
+
+    def _pick(self) -> Optional[PooledBrowser]:
+        for entry in list(self._browsers):
+            if not entry.browser.is_connected():
+                entry.retiring = True
+                self._retire_if_idle(entry)
+        candidates = [
+            b for b in self._browsers
+            if b.is_available(self.contexts_per_browser, self.max_uses)
+        ]
+        if not candidates:
+            return None
+        return min(candidates, key=lambda b: b.active)
+
+    async def _launch(self):
+        return await self._playwright.chromium.launch(headless=True)
+
+    async def _return_slot(self, entry: PooledBrowser):
+        async with self._condition:
+            entry.active -= 1
+            if entry.uses >= self.max_uses:
+                entry.retiring = True
+            self._retire_if_idle(entry)
+            self._condition.notify_all()
+
+    def _retire_if_idle(self, entry: PooledBrowser):
+        if entry.retiring and entry.active == 0 and entry in self._browsers:
+            self._browsers.remove(entry)
+            task = asyncio.create_task(self._replace(entry))
+            self._replacements.add(task)
+            task.add_done_callback(self._replacements.discard)
+
+    async def _replace(self, entry: PooledBrowser):
+        """Close a retired browser and launch its successor"""
+        if entry.browser.is_connected():
+            self.recycled_total += 1
+        else:
+            self.unhealthy_total += 1
+        await self._close_browser(entry)
+        try:
+            replacement = PooledBrowser(await self._launch())
+        except Exception as e:
+            logger.error(f"Failed to relaunch pooled browser: {e}")
+            return
+        async with self._condition:
+            self._browsers.append(replacement)
+            self._condition.notify_all()
+
+    async def _close_browser(self, entry: PooledBrowser):
+        try:
+            await entry.browser.close()
+        except Exception as e:
+            logger.warning(f"Error closing pooled browser: {e}")
+
+    async def check_health(self):
+        """Retire browsers whose connection was lost and top the pool back up"""
+        async with self._condition:
+            for entry in list(self._browsers):
+                if not entry.browser.is_connected():
+                    entry.retiring = True
+                    self._retire_if_idle(entry)
+            missing = self.size - len(self._browsers) - len(self._replacements)
+        for _ in range(max(missing, 0)):
+            try:
+                replacement = PooledBrowser(await self._launch())
+            except Exception as e:
+                logger.error(f"Failed to launch pooled browser: {e}")
+                break
+            async with self._condition:
+                self._browsers.append(replacement)
+                self._condition.notify_all()
+
+    async def _health_loop(self):
+        while True:
+            await asyncio.sleep(self.health_check_seconds)
+            try:
+                await self.check_health()
+            except Exception as e:
+                logger.error(f"Browser pool health check failed: {e}")
+
+browser_pool = BrowserPool()
@@ -0,0 +1,114 @@
+"""
+Check Scheduler Module
+Runs independent checks concurrently and orders dependent checks by a dependency graph
+"""
+
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence
+
+class CheckResult:
+    """Outcome of a single check"""
+
+    def __init__(self, passed: bool, message: str, error: Optional[str] = None):
+        self.passed = passed
+        self.message = message
+        self.error = error
+        self.duration_ms = 0.0
+        self.timed_out = False
+
+class ScheduledCheck:
+    """A check coroutine, the names of the checks it must wait for, its time budget and estimated cost"""
+
+    def __init__(self, name: str, run: Callable[[Any], Awaitable[CheckResult]], depends_on: Sequence[str] = (),
+                 timeout: Optional[float] = None, cost_ms: int = 0):
+        self.name = name
+        self.run = run
+        self.depends_on = list(depends_on)
+        self.timeout = timeout
+        self.cost_ms = cost_ms
+
+class CheckScheduler:
+    """
+    Starts every check as soon as the checks it depends on have finished.
+    Checks without dependencies each get their own page; a dependent check
+    runs on the page of its first dependency so it sees the loaded document.
+    Each check is cut off at its own timeout or the run deadline, whichever
+    comes first. Among checks that are ready together, costlier ones start first.
+    """
+
+    def __init__(self, checks: List[ScheduledCheck]):
+        self.checks = checks
+        self.order = self._topological_order(checks)
+        self.pages: Dict[str, Any] = {}  # Page each check ran on, filled in by run()
+
+    @staticmethod
+    def _topological_order(checks: List[ScheduledCheck]) -> List[ScheduledCheck]:
+        by_name = {check.name: check for check in checks}
+        order: List[ScheduledCheck] = []
+        state: Dict[str, str] = {}
+
+        def visit(check: ScheduledCheck):
+            if state.get(check.name) == "done":
+                return
+            if state.get(check.name) == "visiting":
+                raise ValueError(f"Dependency cycle involving check '{check.name}'")
+            state[check.name] = "visiting"
+            for dependency in check.depends_on:
+                if dependency not in by_name:
+                    raise ValueError(f"Check '{check.name}' depends on unknown check '{dependency}'")
+                visit(by_name[dependency])
+            state[check.name] = "done"
+            order.append(check)
+
+        for check in sorted(checks, key=lambda c: -c.cost_ms):
+            visit(check)
+        return order
+
+    async def run(self, new_page: Callable[[], Awaitable[Any]], deadline: Optional[float] = None,
+                  on_started: Optional[Callable[[str], Awaitable[None]]] = None,
+                  on_finished: Optional[Callable[[str, CheckResult], Awaitable[None]]] = None) -> List[CheckResult]:
+        """
+        Run all checks and return their results in declaration order; deadline is
+        in loop time. on_started and on_finished are awaited around each check.
+        """
+        loop = asyncio.get_running_loop()
+        tasks: Dict[str, asyncio.Future] = {}
+        pages = self.pages
+        results: Dict[str, CheckResult] = {}
+
+        async def run_check(check: ScheduledCheck):
+            if check.depends_on:
+                await asyncio.gather(*(tasks[name] for name in check.depends_on))
+            if on_started:
+                await on_started(check.name)
+            started = time.perf_counter()
+            budget = check_budget(check, deadline, loop.time())
+            try:
+                async with asyncio.timeout(budget):
+                    if check.depends_on:
+                        page = pages[check.depends_on[0]]
+                    else:
+                        page = await new_page()
+                    pages[check.name] = page
+                    result = await check.run(page)
+            except TimeoutError:
+                result = CheckResult(False, f"{check.name} timed out after {budget:.1f}s",
+                                     error=f"Timed out after {budget:.1f}s")
+                result.timed_out = True
+            except Exception as e:
+                result = CheckResult(False, f"{check.name} error: {str(e)}", error=str(e))
+            result.duration_ms = round((time.perf_counter() - started) * 1000, 1)
+            results[check.name] = result
+            if on_finished:
+                await on_finished(check.name, result)
+
+        for check in self.order:
+            tasks[check.name] = asyncio.ensure_future(run_check(check))
+        await asyncio.gather(*tasks.values())
+        return [results[check.name] for check in self.checks]
+
+def check_budget(check: ScheduledCheck, deadline: Optional[float], now: float) -> Optional[float]:
+    """Seconds a check may run: its own timeout capped by what is left of the run deadline"""
+    budgets = [b for b in (check.timeout, None if deadline is None else deadline - now) if b is not None]
+    return max(min(budgets), 0) if budgets else None
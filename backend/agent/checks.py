@@ -0,0 +1,248 @@
+"""
+Checks Module
+Registry of runner checks; each check class declares its scheduling and reporting metadata
+"""
+
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Sequence, Type
+from backend.config import settings
+from backend.agent.check_scheduler import CheckResult
+from backend.agent import page_probe, performance
+from backend.agent.har import format_bytes
+
+class Check(ABC):
+    """
+    Base class for checks run by TestRunner. Subclasses set the metadata below,
+    implement run() and are added to the registry with @register_check.
+    """
+
+    id: str = ""
+    name: str = ""                       # Test name used in results, failures and bugs
+    depends_on: Sequence[str] = ()       # Ids of checks that must finish first
+    cost_ms: int = 100                   # Rough wall-time estimate; costlier checks start first
+    timeout: Optional[float] = None      # Seconds; CHECK_TIMEOUT_SECONDS when None
+    rerunnable: bool = True              # Re-run in fresh contexts on failure to tell flaky from consistent
+    severity: str = "Medium"
+    steps: Sequence[str] = ()            # Reproduction steps after opening the URL
+    expected_result: str = "Test should pass without errors"
+
+    def __init__(self, runner):
+        self.runner = runner
+
+    @classmethod
+    def enabled(cls, options: Dict[str, Any]) -> bool:
+        """Whether the check applies to a run with these options"""
+        return True
+
+    @classmethod
+    def time_budget(cls) -> float:
+        return cls.timeout or settings.CHECK_TIMEOUT_SECONDS
+
+    @abstractmethod
+    async def run(self, page) -> CheckResult:
+        """Run the check on a page of its own and report whether it passed"""
+
+    @classmethod
+    def render_steps(cls, failure: Dict[str, Any]) -> List[str]:
+        return [step.format_map(_Defaults(failure)) for step in cls.steps]
+
+    @classmethod
+    def render_expected_result(cls, failure: Dict[str, Any]) -> str:
+        return cls.expected_result.format_map(_Defaults(failure))
+
+class _Defaults(dict):
+    """Leaves unknown template fields in place instead of raising KeyError"""
+
+    def __missing__(self, key):
+        return "{" + key + "}"
+
+CHECK_REGISTRY: Dict[str, Type[Check]] = {}
+
+def register_check(cls: Type[Check]) -> Type[Check]:
+    if not cls.id or not cls.name:
+        raise ValueError(f"{cls.__name__} must declare an id and a name")
+    if cls.id in CHECK_REGISTRY and CHECK_REGISTRY[cls.id] is not cls:
+        raise ValueError(f"A check with id '{cls.id}' is already registered")
+    CHECK_REGISTRY[cls.id] = cls
+    return cls
+
+def get_check_by_name(name: str) -> Optional[Type[Check]]:
+    """Look a check up by the test name that appears in failures"""
+    for cls in CHECK_REGISTRY.values():
+        if cls.name == name:
+            return cls
+    return None
+
+@register_check
+class PageLoadCheck(Check):
+    id = "page_load"
+    name = "Page Load"
+    cost_ms = 1500
+    severity = "Critical"
+    steps = (
+        "Wait for page to load completely",
+        "Observe the loading behavior",
+    )
+    expected_result = "Page should load successfully without errors and display content within reasonable time"
+
+    @classmethod
+    def time_budget(cls) -> float:
+        return settings.NAVIGATION_TIMEOUT_SECONDS
+
+    async def run(self, page) -> CheckResult:
+        response = await page.goto(self.runner.url, wait_until='domcontentloaded',
+                                   timeout=self.runner.timeout_ms(settings.NAVIGATION_TIMEOUT_SECONDS))
+        if self.runner.login_redirect(page.url):
+            error = f"Redirected to the login page {page.url}; the saved login has expired"
+            return CheckResult(False, f"Page load failed: {error}", error=error)
+        if response and response.status < 400:
+            return CheckResult(True, "Page loaded successfully")
+        status = response.status if response else 'No response'
+        return CheckResult(False, f"Page load failed: HTTP {status}", error=f"HTTP {status}")
+
+@register_check
+class TitleCheck(Check):
+    id = "title"
+    name = "Title Check"
+    depends_on = ("page_load",)
+    cost_ms = 10
+    steps = (
+        "Check the page title in browser tab",
+        "Verify title content",
+    )
+    expected_result = "Page should have a meaningful, non-empty title that describes the page content"
+
+    async def run(self, page) -> CheckResult:
+        title = await page.title()
+        if title and len(title.strip()) > 0:
+            return CheckResult(True, f"Page title found: '{title}'")
+        return CheckResult(False, "Page title is empty or missing", error="Page title is empty or missing")
+
+@register_check
+class BasicElementsCheck(Check):
+    id = "basic_elements"
+    name = "Basic Elements Check"
+    depends_on = ("page_load",)
+    cost_ms = 10
+    steps = (
+        "Inspect page elements",
+        "Look for missing or broken elements",
+    )
+    expected_result = "Page should contain basic HTML structure with proper elements"
+
+    async def run(self, page) -> CheckResult:
+        body = await page.query_selector('body')
+        if body:
+            return CheckResult(True, "Found basic HTML structure")
+        return CheckResult(False, "No body element found", error="No body element found")
+
+@register_check
+class PerformanceCheck(Check):
+    id = "performance"
+    name = performance.PERFORMANCE_CHECK_NAME
+    depends_on = ("page_load",)
+    cost_ms = 500
+    rerunnable = False  # Its metrics are the run's record; noise is handled by the regression baseline
+    steps = (
+        "Record a page load in the browser's Performance panel",
+        "Compare Largest Contentful Paint, Cumulative Layout Shift and Total Blocking Time with their budgets",
+    )
+    expected_result = "Page should stay within its performance budgets and close to its recent baseline"
+
+    @classmethod
+    def enabled(cls, options: Dict[str, Any]) -> bool:
+        # Fast mode blocks images and fonts, so its numbers are not comparable with full loads
+        return settings.PERF_METRICS_ENABLED and not options.get("fast")
+
+    async def run(self, page) -> CheckResult:
+        raw = await page.evaluate(performance.COLLECT_SCRIPT,
+                                  self.runner.timeout_ms(settings.NAVIGATION_TIMEOUT_SECONDS))
+        metrics = performance.normalize(raw or {})
+        self.runner.performance = metrics
+        summary = performance.summarize(metrics)
+        violations = performance.budget_violations(metrics)
+        if violations:
+            return CheckResult(False, f"Performance budget exceeded: {summary}", error="; ".join(violations))
+        return CheckResult(True, f"Performance: {summary}")
+
+@register_check
+class NetworkBudgetCheck(Check):
+    id = "network_budget"
+    name = "Network Budget"
+    depends_on = ("page_load",)
+    cost_ms = 500
+    rerunnable = False  # Judges the HAR recorded by the run's own context
+    steps = (
+        "Open the browser's Network panel and reload the page",
+        "Compare page weight, request count, third-party share and the slowest request with the budgets",
+    )
+    expected_result = "Page should stay within its network budgets"
+
+    @classmethod
+    def enabled(cls, options: Dict[str, Any]) -> bool:
+        return bool(options.get("har") or settings.HAR_CAPTURE)
+
+    async def run(self, page) -> CheckResult:
+        # Budgets cover everything requested up to the load event
+        await page.wait_for_load_state("load", timeout=self.runner.timeout_ms(settings.NAVIGATION_TIMEOUT_SECONDS))
+        har = self.runner.har
+        await har.settle()
+        summary = (f"{har.entries} requests, {format_bytes(har.bytes)}, "
+                   f"{har.third_party_share():.0%} third-party, slowest {har.slowest_ms:.0f}ms")
+        violations = har.budget_violations()
+        if violations:
+            return CheckResult(False, f"Network budget exceeded: {summary}", error="; ".join(violations))
+        return CheckResult(True, f"Network: {summary}")
+
+@register_check
+class ConsoleErrorsCheck(Check):
+    id = "console"
+    name = "Console Errors Check"
+    depends_on = ("page_load",)
+    cost_ms = 50
+    rerunnable = False  # Judges the messages recorded by the run's own context
+    steps = (
+        "Open browser developer tools (F12)",
+        "Check the Console tab for errors",
+    )
+    expected_result = "Page should load without JavaScript console errors"
+
+    @classmethod
+    def enabled(cls, options: Dict[str, Any]) -> bool:
+        return settings.CONSOLE_CHECK_ENABLED
+
+    async def run(self, page) -> CheckResult:
+        # Scripts that run up to the load event count; the listeners were attached before navigation
+        await page.wait_for_load_state("load", timeout=self.runner.timeout_ms(settings.NAVIGATION_TIMEOUT_SECONDS))
+        console = self.runner.console
+        if console.errors:
+            return CheckResult(False, f"{console.errors} console error(s), first: {console.samples[0]}",
+                               error="; ".join(console.samples))
+        return CheckResult(True, "No console errors")
+
+@register_check
+class InteractiveElementsCheck(Check):
+    id = "interactive"
+    name = "Interactive Elements Check"
+    depends_on = ("page_load",)
+    cost_ms = 50
+    steps = (
+        "Try to interact with buttons, links, and form elements",
+        "Check if elements respond to user input",
+    )
+    expected_result = "Page should have interactive elements (buttons, links, forms) that users can interact with"
+
+    @classmethod
+    def enabled(cls, options: Dict[str, Any]) -> bool:
+        return settings.INTERACTIVE_CHECK_ENABLED
+
+    async def run(self, page) -> CheckResult:
+        probe = await page.evaluate(page_probe.INTERACTIVE_SCRIPT, page_probe.INTERACTIVE_SAMPLE_SIZE)
+        self.runner.interactive = probe
+        visible = probe.get("visible", {})
+        summary = page_probe.summarize_interactive(probe)
+        if not any(visible.get(group) for group in ("clickable", "links", "inputs")):
+            return CheckResult(False, "No visible interactive elements found",
+                               error="No visible buttons, links or form fields found")
+        unlabeled = f", {probe['unlabeled']} without an accessible label" if probe.get("unlabeled") else ""
+        return CheckResult(True, f"Interactive elements: {summary}{unlabeled}")
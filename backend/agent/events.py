@@ -0,0 +1,55 @@
+"""
+Run Events Module
+Async stream of progress events a test run emits while it executes
+"""
+
+import asyncio
+from typing import Any, Dict, Optional
+from backend.config import settings
+
+LOG = "log"
+CHECK_STARTED = "check_started"
+CHECK_FINISHED = "check_finished"
+FAILURE = "failure"
+
+class EventStream:
+    """
+    Bounded queue between a running test and whoever consumes its progress.
+    emit() waits while the consumer is behind, so a long run never piles up
+    its whole log in memory; iterating ends once the stream is closed and drained.
+    """
+
+    _CLOSED = object()
+
+    def __init__(self, maxsize: Optional[int] = None):
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize or settings.RUN_EVENT_QUEUE_SIZE)
+        self.closed = False
+
+    async def emit(self, type: str, **data: Any):
+        if not self.closed:
+            await self._queue.put({"type": type, **data})
+
+    def close(self):
+        self.closed = True
+        try:
+            self._queue.put_nowait(self._CLOSED)
+        except asyncio.QueueFull:
+            pass  # The consumer stops by itself once it has drained the queue
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> Dict[str, Any]:
+        if self.closed and self._queue.empty():
+            raise StopAsyncIteration
+        event = await self._queue.get()
+        if event is self._CLOSED:
+            raise StopAsyncIteration
+        return event
+
+async def log_line(results: Dict[str, Any], events: Optional[EventStream], line: str):
+    """Stream a log line when the run has a consumer, otherwise keep it in the result"""
+    if events is not None:
+        await events.emit(LOG, line=line)
+    else:
+        results["logs"].append(line)
@@ -0,0 +1,345 @@
+"""
+Job Executor Module
+Runs a queued job end to end: tests, analysis, persistence and status updates
+"""
+
+import asyncio
+import json
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+from backend.agent.runner import RECORDING_KEYS, run_automation_tests_async
+from backend.agent.analyzer import analyze_test_run_async
+from backend.agent.artifact_store import artifact_store, bug_environment
+from backend.agent.events import FAILURE, LOG, EventStream
+from backend.agent.flaky import record_checks
+from backend.agent.job_log import JobLogWriter
+from backend.agent.performance import record_run
+from backend.config import settings
+from backend.database.core import SessionLocal
+from backend.database.models import Bug, Job
+
+logger = logging.getLogger(__name__)
+
+Notifier = Callable[[str, Dict[str, Any]], Awaitable[None]]
+
+TERMINAL_STATUSES = {"COMPLETED", "FAILED", "ERROR", "TIMEOUT", "CANCELLED"}
+
+# Test runs in progress in this process, so they can be cancelled by job id
+running_jobs: Dict[str, asyncio.Task] = {}
+
+def failure_key(failure: Dict[str, Any]) -> str:
+    """
+    A failure's identity by content: remote workers send the streamed event
+    and the final result as separate JSON copies of the same failure, and
+    the result's copy also links the recordings made after it was streamed
+    """
+    return json.dumps({key: value for key, value in failure.items() if key not in RECORDING_KEYS},
+                      sort_keys=True, default=str)
+
+def cancel_job(job_id: str) -> bool:
+    """Cancel the job's test run if it is executing in this process"""
+    task = running_jobs.get(job_id)
+    if task and not task.done():
+        task.cancel()
+        return True
+    return False
+
+class JobExecution:
+    """
+    Records one run of a job: its status, the log lines and failures streamed
+    while it runs, and the final result. execute_job() drives it for runs in
+    this process; the worker hub drives it for runs reported by remote workers.
+    db belongs to the job row and its log; every analysis saves its bugs
+    through its own session from session_factory, so their commits and
+    rollbacks never touch writes they do not own.
+    """
+
+    def __init__(self, db, job_id: str, test_url: str, provider: str, context: Dict[str, str],
+                 notify: Notifier, worker_id: Optional[str] = None, session_factory=None):
+        self.db = db
+        self.session_factory = session_factory or SessionLocal
+        self.job_id = job_id
+        self.test_url = test_url
+        self.provider = provider
+        self.context = context
+        self.notify = notify
+        self.worker_id = worker_id
+        self.log = JobLogWriter(db, job_id, notify)
+        self.job: Optional[Job] = None
+        self.bugs: List[Dict[str, Any]] = []
+        self.analyzed: Set[str] = set()  # failure_key() of every failure handed to analysis
+        self.analyses: List[asyncio.Task] = []
+        self.deferred: List[Dict[str, Any]] = []
+        self.batch_timer: Optional[asyncio.Task] = None
+
+    async def start(self) -> bool:
+        """Set the job RUNNING; False if it is missing or was settled (e.g. cancelled) before it started"""
+        job = self.db.query(Job).filter(Job.id == self.job_id).first()
+        if not job or job.status in TERMINAL_STATUSES:
+            return False
+        self.job = job
+
+        job.status = "RUNNING"
+        self.db.commit()
+
+        # Send WebSocket update
+        await self.notify(self.job_id, {
+            "status": "RUNNING",
+            "message": "Tests are running..."
+        })
+        await self.log.write("Starting Playwright tests...")
+        return True
+
+    async def handle_event(self, event: Dict[str, Any]):
+        if event["type"] == LOG:
+            await self.log.write(event["line"])
+        elif event["type"] == FAILURE:
+            # Analyze each failure as soon as it is found, while the run goes on
+            failure = event["failure"]
+            if settings.ANALYSIS_BATCH:
+                # Failures found close together share one call; a lone failure is not held until the run ends
+                self.deferred.append(failure)
+                self.schedule_batch()
+            else:
+                self.analyze([failure])
+            await self.notify(self.job_id, {
+                "status": "RUNNING",
+                "bugs": self.bugs,
+                "message": f"Failure found: {failure['test']}"
+            })
+        else:
+            await self.notify(self.job_id, {"status": "RUNNING", "event": event})
+
+    def analyze(self, failures: List[Dict[str, Any]], result: Optional[Dict[str, Any]] = None) -> asyncio.Task:
+        """Start analyzing failures concurrently in the background; each bug is reported as it is saved"""
+        self.analyzed.update(map(failure_key, failures))
+        analysis = asyncio.create_task(self._analyze({**(result or {}), "failures": failures}))
+        self.analyses.append(analysis)
+        return analysis
+
+    async def _analyze(self, test_results: Dict[str, Any]):
+        db = self.session_factory()
+        try:
+            await analyze_test_run_async(self.job_id, test_results, self.context, self.provider, db,
+                                         on_bug=self.bug_reported)
+        finally:
+            db.close()
+
+    def schedule_batch(self):
+        """Analyze the held-back failures once ANALYSIS_BATCH_WINDOW_SECONDS pass without another one"""
+        if self.batch_timer is not None:
+            self.batch_timer.cancel()
+        self.batch_timer = asyncio.create_task(self._analyze_batch_later())
+
+    async def _analyze_batch_later(self):
+        await asyncio.sleep(settings.ANALYSIS_BATCH_WINDOW_SECONDS)
+        self.batch_timer = None
+        failures, self.deferred = self.deferred, []
+        if failures:
+            self.analyze(failures)
+
+    def stop_batch_timer(self):
+        if self.batch_timer is not None:
+            self.batch_timer.cancel()
+            self.batch_timer = None
+
+    async def bug_reported(self, bug: Dict[str, Any]):
+        self.bugs.append(bug)
+        await self.notify(self.job_id, {
+            "status": "RUNNING",
+            "bugs": self.bugs,
+            "message": f"Bug reported: {bug['summary']}"
+        })
+
+    def stop_analyses(self):
+        self.stop_batch_timer()
+        for analysis in self.analyses:
+            analysis.cancel()
+
+    async def cancel(self):
+        self.stop_analyses()
+        await self.log.flush()
+        self.db.refresh(self.job)
+        await mark_cancelled(self.db, self.job, self.worker_id, self.notify, self.log)
+
+    async def finish(self, result: Dict[str, Any]):
+        """Persist the run's result, unless the job was cancelled while it ran"""
+        job = self.job
+        log = self.log
+        await log.flush()
+        self.db.refresh(job)
+        if job.status == "CANCELLED":
+            self.stop_analyses()
+            await mark_cancelled(self.db, job, self.worker_id, self.notify, log)
+            return
+        # Failures streamed during the run are already being analyzed; settle them before the job row changes
+        self.stop_batch_timer()
+        await asyncio.gather(*self.analyses)
+        self.link_recordings(result)
+
+        # Update job with results; lines the run did not stream (e.g. setup errors) are still in the result
+        job.status = result.get("status", "ERROR")
+        await log.write(*result.get("logs", []))
+        network = result.get("network") or {}
+        if network.get("mode") == "fast":
+            await log.write(
+                f"Fast mode blocked {network['blocked_requests']} requests "
+                f"(~{network['blocked_bytes_estimate']} bytes); page load took "
+                f"{result.get('timings', {}).get('Page Load', 0):.0f}ms"
+            )
+
+        # A requested HAR is kept whatever the outcome, so the job holds a reference to it
+        har_path = (network.get("har") or {}).get("path")
+        if har_path:
+            job.har_path = har_path
+            artifact_store.add_references(self.db, [har_path])
+            await log.write(f"HAR saved: {har_path}")
+
+        # Count passed, consistently failed and flaky checks towards each check's flakiness rate
+        record_checks(self.db, self.test_url, result)
+
+        # Add the page's metrics to its history; regressions against it are failures like any other
+        if result.get("performance"):
+            regressions = record_run(self.db, self.job_id, self.test_url, result["performance"])
+            for failure in regressions:
+                await log.write(f"❌ Performance regression: {failure['error']}")
+            if regressions:
+                result["failures"] = result.get("failures", []) + regressions
+                if job.status == "COMPLETED":
+                    job.status = "FAILED"
+
+        # Analyze failures that did not arrive as events, together with those held back for a batch
+        remaining = list(self.deferred)
+        if job.status == "FAILED":
+            seen = self.analyzed | set(map(failure_key, remaining))
+            for failure in result.get("failures", []):
+                key = failure_key(failure)
+                if key not in seen:
+                    seen.add(key)
+                    remaining.append(failure)
+        if remaining:
+            # Settle the job first, so its write lock does not hold up the analysis saving bugs
+            self.db.commit()
+            await self.analyze(remaining, result)
+        if job.status == "FAILED":
+            await log.write(f"Found {len(self.bugs)} potential bugs.")
+
+        await log.close()
+        self.db.commit()
+
+        # Send final WebSocket update
+        await self.notify(self.job_id, {
+            "status": job.status,
+            "bugs": self.bugs,
+            "message": f"Tests completed with status: {job.status}"
+        })
+
+    def link_recordings(self, result: Dict[str, Any]):
+        """
+        Bugs filed from streamed failures were saved before the run's video,
+        trace and HAR existed; link them now from the result's failures
+        """
+        recorded = {}
+        for failure in result.get("failures", []):
+            recorded.update({key: failure[key] for key in RECORDING_KEYS if failure.get(key)})
+        if not recorded:
+            return
+        video = recorded.get("video_path")
+        environment_links = {"trace": recorded.get("trace_path"), "har": recorded.get("har_path")}
+        urls = []
+        for bug in self.db.query(Bug).filter(Bug.job_id == self.job_id):
+            environment = bug_environment(bug)
+            if video and not bug.video_path:
+                bug.video_path = video
+                urls.append(video)
+            for link, url in environment_links.items():
+                if url and not environment.get(link):
+                    environment[link] = url
+                    urls.append(url)
+            bug.environment = json.dumps(environment)
+        artifact_store.add_references(self.db, urls)
+        # The copies pushed to clients
+        for bug in self.bugs:
+            if video and not bug.get("video_path"):
+                bug["video_path"] = video
+            environment = bug.setdefault("environment", {})
+            for link, url in environment_links.items():
+                if url and not environment.get(link):
+                    environment[link] = url
+
+    async def fail(self, error: Exception):
+        # Ensure job status is updated on unexpected error
+        self.stop_analyses()
+        self.db.rollback()
+        job = self.db.query(Job).filter(Job.id == self.job_id).first()
+        if job:
+            job.status = "ERROR"
+            error_msg = f"An unexpected error occurred: {str(error)}"
+            await self.log.write(error_msg)
+            await self.log.close()
+            self.db.commit()
+
+            # Send error WebSocket update
+            await self.notify(self.job_id, {
+                "status": "ERROR",
+                "message": error_msg
+            })
+
+async def execute_job(job_id: str, test_url: str, provider: str, context: Dict[str, str], notify: Notifier,
+                      worker_id: Optional[str] = None, options: Optional[Dict[str, Any]] = None):
+    """
+    Run the tests for a job and report progress through notify(job_id, message).
+    Log lines and failures are consumed from the run's event stream as they
+    happen. The run is bounded by TEST_TIMEOUT_SECONDS and can be stopped with cancel_job().
+    """
+    db = SessionLocal()
+    run = None
+    execution = JobExecution(db, job_id, test_url, provider, context, notify, worker_id=worker_id)
+    try:
+        if not await execution.start():
+            # Missing, or cancelled before it got a chance to start
+            return
+
+        events = EventStream()
+
+        async def consume_events():
+            async for event in events:
+                await execution.handle_event(event)
+
+        # Run the tests as their own task so cancel_job() stops only the run
+        run = asyncio.create_task(run_automation_tests_async(test_url, options=options, events=events))
+        consumer = asyncio.create_task(consume_events())
+        running_jobs[job_id] = run
+        try:
+            await asyncio.wait({run})
+        finally:
+            running_jobs.pop(job_id, None)
+            events.close()
+        await consumer
+
+        if run.cancelled():
+            await execution.cancel()
+            return
+        await execution.finish(run.result())
+
+    except Exception as e:
+        logger.error(f"Unexpected error executing job {job_id}: {e}")
+        await execution.fail(e)
+    finally:
+        if run and not run.done():
+            run.cancel()
+        db.close()
+
+async def mark_cancelled(db, job: Job, worker_id: Optional[str], notify: Notifier, log: JobLogWriter):
+    """Record a cancelled run unless the job has already been settled elsewhere"""
+    if job.status != "RUNNING" or job.worker_id != worker_id:
+        # The cancel endpoint already recorded it, or the job was re-queued to another worker
+        return
+    job.status = "CANCELLED"
+    await log.write("Test run cancelled.")
+    await log.close()
+    db.commit()
+    await notify(job.id, {
+        "status": "CANCELLED",
+        "message": "Test run cancelled"
+    })
@@ -0,0 +1,70 @@
+"""
+Flaky Checks Module
+Per-URL outcome counts of each check across runs, from which flakiness rates are reported
+"""
+
+import logging
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from sqlalchemy import func
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from backend.database.models import CheckStat
+
+logger = logging.getLogger(__name__)
+
+# Timings that are not checks
+NON_CHECK_TIMINGS = {"Pre-flight"}
+
+# Dialects with INSERT ... ON CONFLICT DO UPDATE
+UPSERTS = {"sqlite": sqlite.insert, "postgresql": postgresql.insert}
+
+def record_checks(db: Session, url: str, result: Dict[str, Any]):
+    """
+    Count the run's checks as passed, consistently failed or flaky; the caller
+    commits. One upsert adds to the counters in the database, so processes
+    recording the same URL at once neither race on the unique (url, test_name)
+    index nor overwrite each other's counts.
+    """
+    checks = [name for name in result.get("timings", {}) if name not in NON_CHECK_TIMINGS]
+    failed = {failure["test"] for failure in result.get("failures", [])}
+    flaky = {entry["test"] for entry in result.get("flaky", [])}
+    if not checks:
+        return
+    now = datetime.utcnow()
+    insert = UPSERTS[db.get_bind().dialect.name]
+    statement = insert(CheckStat).values([{
+        "url": url,
+        "test_name": name,
+        "runs": 1,
+        "failures": int(name in failed),
+        "flaky": int(name in flaky),
+        "last_flaky_at": now if name in flaky else None,
+        "updated_at": now,
+    } for name in checks])
+    db.execute(statement.on_conflict_do_update(
+        index_elements=[CheckStat.url, CheckStat.test_name],
+        set_={
+            "runs": CheckStat.runs + statement.excluded.runs,
+            "failures": CheckStat.failures + statement.excluded.failures,
+            "flaky": CheckStat.flaky + statement.excluded.flaky,
+            "last_flaky_at": func.coalesce(statement.excluded.last_flaky_at, CheckStat.last_flaky_at),
+            "updated_at": statement.excluded.updated_at,
+        },
+    ))
+
+def flakiness(db: Session, url: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Checks that were ever flaky, most flaky first"""
+    query = db.query(CheckStat).filter(CheckStat.flaky > 0)
+    if url:
+        query = query.filter(CheckStat.url == url)
+    rows = [{
+        "url": stat.url,
+        "test": stat.test_name,
+        "runs": stat.runs,
+        "failures": stat.failures,
+        "flaky": stat.flaky,
+        "flaky_rate": round(stat.flaky / stat.runs, 3) if stat.runs else 0.0,
+        "last_flaky_at": stat.last_flaky_at,
+    } for stat in query]
+    return sorted(rows, key=lambda row: (-row["flaky_rate"], row["url"], row["test"]))
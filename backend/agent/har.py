@@ -0,0 +1,231 @@
+"""
+HAR Module
+Opt-in network capture streamed to a gzip-compressed HAR file, with page-weight budgets
+"""
+
+import asyncio
+import gzip
+import json
+import logging
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qsl, urlparse
+from backend.config import settings
+from backend.agent.artifact_store import ArtifactStore, artifact_store
+
+logger = logging.getLogger(__name__)
+
+HAR_HEADER = '{"log": {"version": "1.2", "creator": {"name": "ai-qa-agent", "version": "1.0.0"}, "pages": [], "entries": [\n'
+HAR_FOOTER = "\n]}}\n"
+
+def site_of(host: str) -> str:
+    """Last two labels of the host; close enough to the registrable domain for a first-party test"""
+    return ".".join(host.lower().split(".")[-2:])
+
+def name_values(headers: Dict[str, str]) -> List[Dict[str, str]]:
+    return [{"name": name, "value": value} for name, value in headers.items()]
+
+def phase(timing: Dict[str, float], start: str, end: str) -> float:
+    """Duration between two Playwright timing marks, or -1 when either was not reached"""
+    begin, finish = timing.get(start, -1), timing.get(end, -1)
+    if begin is None or finish is None or begin < 0 or finish < 0:
+        return -1
+    return round(finish - begin, 3)
+
+def format_bytes(size: float) -> str:
+    return f"{size / (1024 * 1024):.1f} MB" if size >= 1024 * 1024 else f"{size / 1024:.0f} KB"
+
+class HarRecorder:
+    """
+    Records every request of one run as a HAR entry. Each entry is written to
+    the compressed file as soon as its request finishes, so memory stays flat
+    however many requests the page makes; only the totals the budgets need
+    are kept. The finished file is moved into the artifact store.
+    """
+
+    def __init__(self, run_id: str, store: Optional[ArtifactStore] = None):
+        self.run_id = run_id
+        self.store = store or artifact_store
+        self.page_site: Optional[str] = None
+        self.entries = 0
+        self.failed_requests = 0
+        self.bytes = 0
+        self.third_party_bytes = 0
+        self.slowest_url: Optional[str] = None
+        self.slowest_ms = 0.0
+        self._scratch: Optional[Path] = None
+        self._file = None
+        self._lock = threading.Lock()
+        self._written = 0
+        self._pending: set = set()
+        self._stopped = False
+
+    async def attach(self, context, url: str):
+        self.page_site = site_of(urlparse(url).hostname or "")
+        self._scratch = await self.store.make_temp_dir(f"{self.run_id}-har")
+        path = self._scratch / "network.har.gz"
+        self._file = await self.store.run(lambda: gzip.open(path, "wt", encoding="utf-8"))
+        await self.store.run(self._file.write, HAR_HEADER)
+        context.on("requestfinished", self._on_request_done)
+        context.on("requestfailed", self._on_request_done)
+
+    def _on_request_done(self, request):
+        if self._stopped:
+            return
+        # Reading sizes and the response needs round trips to the browser; keep
+        # the task so finish() can wait for entries that are still being built
+        task = asyncio.ensure_future(self._record(request))
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    async def _record(self, request):
+        try:
+            entry = await self.build_entry(request)
+        except Exception as e:
+            # The context may already be closing
+            logger.debug(f"Could not record {request.url} for HAR: {e}")
+            return
+        self.account(entry)
+        await self.store.run(self._write_entry, json.dumps(entry, default=str))
+
+    def _write_entry(self, data: str):
+        with self._lock:
+            if self._file is None:
+                return
+            self._file.write(data if self._written == 0 else ",\n" + data)
+            self._written += 1
+
+    async def build_entry(self, request) -> Dict[str, Any]:
+        if request.failure:
+            # Failed requests have no response to size
+            sizes, response = {}, None
+        else:
+            sizes = await request.sizes()
+            response = await request.response()
+        timing = request.timing or {}
+        # startTime is epoch milliseconds; every other mark is relative to it
+        started = timing.get("startTime") or 0
+        total = round(max(timing.get("responseEnd", -1), 0), 3)
+        headers = response.headers if response is not None else {}
+        entry = {
+            "startedDateTime": datetime.fromtimestamp(started / 1000, tz=timezone.utc).isoformat(),
+            "time": total,
+            "request": {
+                "method": request.method,
+                "url": request.url,
+                "httpVersion": "HTTP/1.1",
+                "headers": name_values(request.headers),
+                "queryString": [{"name": k, "value": v} for k, v in parse_qsl(urlparse(request.url).query)],
+                "cookies": [],
+                "headersSize": sizes.get("requestHeadersSize", -1),
+                "bodySize": sizes.get("requestBodySize", -1),
+            },
+            "response": {
+                "status": response.status if response is not None else 0,
+                "statusText": response.status_text if response is not None else "",
+                "httpVersion": "HTTP/1.1",
+                "headers": name_values(headers),
+                "cookies": [],
+                "content": {"size": sizes.get("responseBodySize", -1), "mimeType": headers.get("content-type", "")},
+                "redirectURL": headers.get("location", ""),
+                "headersSize": sizes.get("responseHeadersSize", -1),
+                "bodySize": sizes.get("responseBodySize", -1),
+            },
+            "cache": {},
+            "timings": {
+                "blocked": -1,
+                "dns": phase(timing, "domainLookupStart", "domainLookupEnd"),
+                "connect": phase(timing, "connectStart", "connectEnd"),
+                "ssl": phase(timing, "secureConnectionStart", "connectEnd"),
+                "send": 0,
+                "wait": phase(timing, "requestStart", "responseStart"),
+                "receive": phase(timing, "responseStart", "responseEnd"),
+            },
+            "_resourceType": request.resource_type,
+        }
+        if request.failure:
+            entry["_failureText"] = request.failure
+        return entry
+
+    def account(self, entry: Dict[str, Any]):
+        """Running totals for the budgets, updated per entry instead of rescanning the file"""
+        self.entries += 1
+        response = entry["response"]
+        size = max(response["bodySize"], 0) + max(response["headersSize"], 0)
+        self.bytes += size
+        if response["status"] == 0:
+            self.failed_requests += 1
+        if site_of(urlparse(entry["request"]["url"]).hostname or "") != self.page_site:
+            self.third_party_bytes += size
+        if entry["time"] > self.slowest_ms:
+            self.slowest_ms = entry["time"]
+            self.slowest_url = entry["request"]["url"]
+
+    def budget_violations(self) -> List[str]:
+        """Budgets of 0 are disabled"""
+        violations = []
+        if settings.NETWORK_BUDGET_BYTES and self.bytes > settings.NETWORK_BUDGET_BYTES:
+            violations.append(f"Page weight {format_bytes(self.bytes)} exceeds the "
+                              f"{format_bytes(settings.NETWORK_BUDGET_BYTES)} budget")
+        if settings.NETWORK_BUDGET_REQUESTS and self.entries > settings.NETWORK_BUDGET_REQUESTS:
+            violations.append(f"{self.entries} requests exceed the budget of {settings.NETWORK_BUDGET_REQUESTS}")
+        share = self.third_party_share()
+        if settings.NETWORK_BUDGET_THIRD_PARTY_SHARE and share > settings.NETWORK_BUDGET_THIRD_PARTY_SHARE:
+            violations.append(f"Third parties account for {share:.0%} of bytes, above the "
+                              f"{settings.NETWORK_BUDGET_THIRD_PARTY_SHARE:.0%} budget")
+        if settings.NETWORK_BUDGET_SLOWEST_MS and self.slowest_ms > settings.NETWORK_BUDGET_SLOWEST_MS:
+            violations.append(f"Slowest request took {self.slowest_ms:.0f}ms, above the "
+                              f"{settings.NETWORK_BUDGET_SLOWEST_MS:.0f}ms budget: {self.slowest_url}")
+        return violations
+
+    def third_party_share(self) -> float:
+        return self.third_party_bytes / self.bytes if self.bytes else 0.0
+
+    async def settle(self):
+        """Wait for entries of requests that have already finished"""
+        if self._pending:
+            await asyncio.wait(set(self._pending), timeout=settings.ARTIFACT_CAPTURE_TIMEOUT_SECONDS)
+
+    async def finish(self) -> Optional[str]:
+        """
+        Close the HAR and store it; returns its /artifacts URL. Call it while
+        the context is still open: entries still being built need the browser,
+        and any that do not settle in time are cancelled rather than left to
+        run against a released context.
+        """
+        if self._scratch is None:
+            return None
+        self._stopped = True
+        try:
+            await self.settle()
+            for task in list(self._pending):
+                task.cancel()
+            if self._pending:
+                await asyncio.wait(set(self._pending))
+            await self.store.run(self._close_file)
+            return await self.store.put_file(self._scratch / "network.har.gz", ".har.gz")
+        except Exception as e:
+            logger.warning(f"Could not save HAR for run {self.run_id}: {e}")
+            return None
+        finally:
+            await self.store.remove(self._scratch)
+            self._scratch = None
+
+    def _close_file(self):
+        with self._lock:
+            self._file.write(HAR_FOOTER)
+            self._file.close()
+            self._file = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": self.entries,
+            "failed_requests": self.failed_requests,
+            "bytes": self.bytes,
+            "third_party_bytes": self.third_party_bytes,
+            "third_party_share": round(self.third_party_share(), 3),
+            "slowest_ms": self.slowest_ms,
+            "slowest_url": self.slowest_url,
+        }
@@ -0,0 +1,70 @@
+"""
+Job Log Module
+Batched persistence of job log lines and delta pushes to WebSocket subscribers
+"""
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from backend.config import settings
+from backend.database.models import JobLog
+
+logger = logging.getLogger(__name__)
+
+def append_logs(db, job_id: str, lines: List[str]) -> List[JobLog]:
+    """Add log rows to the session; the caller commits"""
+    entries = [JobLog(job_id=job_id, line=line) for line in lines]
+    db.add_all(entries)
+    return entries
+
+class JobLogWriter:
+    """
+    Buffers a job's log lines for at most LOG_FLUSH_INTERVAL_SECONDS (or
+    LOG_FLUSH_MAX_LINES lines), then inserts them in one commit and pushes
+    just the new lines to subscribers. Only unflushed lines are held in memory.
+    """
+
+    def __init__(self, db, job_id: str, notify: Callable[[str, Dict[str, Any]], Awaitable[None]],
+                 interval: Optional[float] = None, max_lines: Optional[int] = None):
+        self.db = db
+        self.job_id = job_id
+        self.notify = notify
+        self.interval = interval if interval is not None else settings.LOG_FLUSH_INTERVAL_SECONDS
+        self.max_lines = max_lines or settings.LOG_FLUSH_MAX_LINES
+        self.lines_written = 0
+        self._pending: List[str] = []
+        self._lock = asyncio.Lock()
+        self._timer: Optional[asyncio.Task] = None
+
+    async def write(self, *lines: str):
+        self._pending.extend(lines)
+        if len(self._pending) >= self.max_lines:
+            await self.flush()
+        elif self._timer is None or self._timer.done():
+            self._timer = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.interval)
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.error(f"Failed to flush logs for job {self.job_id}: {e}")
+
+    async def flush(self):
+        async with self._lock:
+            if not self._pending:
+                return
+            lines, self._pending = self._pending, []
+            entries = append_logs(self.db, self.job_id, lines)
+            self.db.flush()
+            payload = [{"id": entry.id, "line": entry.line} for entry in entries]
+            self.db.commit()
+            self.lines_written += len(lines)
+            await self.notify(self.job_id, {"entries": payload})
+
+    async def close(self):
+        await self.flush()
+        # Any flush the timer had started has finished by now, so it is only sleeping
+        if self._timer is not None and not self._timer.done():
+            self._timer.cancel()
+        self._timer = None
@@ -0,0 +1,108 @@
+"""
+Job Queue Module
+Durable job queue on top of the jobs table, claimed by worker processes under a lease
+"""
+
+import logging
+from datetime import datetime, timedelta
+from typing import List, Optional
+from sqlalchemy import func, or_, select
+from sqlalchemy.orm import Session, aliased
+from backend.config import settings
+from backend.database.models import Job
+from backend.agent.job_log import append_logs
+
+logger = logging.getLogger(__name__)
+
+def claim_job(db: Session, worker_id: str, lease_seconds: Optional[int] = None) -> Optional[Job]:
+    """
+    Atomically move the next PENDING job to RUNNING under a lease for worker_id:
+    highest priority first, then the user with the fewest running jobs, then the
+    oldest. The conditional UPDATE makes concurrent claims from other processes lose cleanly.
+    """
+    lease_seconds = lease_seconds or settings.JOB_LEASE_SECONDS
+    active = aliased(Job)
+    users_running = (
+        select(func.count(active.id))
+        .where(active.status == "RUNNING", active.requested_by == Job.requested_by)
+        .correlate(Job)
+        .scalar_subquery()
+    )
+    for _ in range(3):
+        candidate = (
+            db.query(Job.id)
+            .filter(Job.status == "PENDING", Job.test_url.isnot(None))
+            .order_by(Job.priority.desc(), users_running, Job.created_at)
+            .first()
+        )
+        if not candidate:
+            return None
+
+        claimed = (
+            db.query(Job)
+            .filter(Job.id == candidate.id, Job.status == "PENDING")
+            .update({
+                Job.status: "RUNNING",
+                Job.worker_id: worker_id,
+                Job.lease_expires_at: datetime.utcnow() + timedelta(seconds=lease_seconds),
+                Job.attempts: Job.attempts + 1,
+            }, synchronize_session=False)
+        )
+        db.commit()
+        if claimed:
+            return db.query(Job).filter(Job.id == candidate.id).first()
+    return None
+
+def renew_lease(db: Session, job_id: str, worker_id: str, lease_seconds: Optional[int] = None) -> bool:
+    """Extend the lease on a running job; False if the job is no longer ours"""
+    lease_seconds = lease_seconds or settings.JOB_LEASE_SECONDS
+    renewed = (
+        db.query(Job)
+        .filter(Job.id == job_id, Job.worker_id == worker_id, Job.status == "RUNNING")
+        .update({Job.lease_expires_at: datetime.utcnow() + timedelta(seconds=lease_seconds)},
+                synchronize_session=False)
+    )
+    db.commit()
+    return bool(renewed)
+
+def lease_held(db: Session, job_id: str, worker_id: str) -> bool:
+    """Whether worker_id still owns the running job"""
+    return db.query(Job.id).filter(
+        Job.id == job_id, Job.worker_id == worker_id, Job.status == "RUNNING"
+    ).first() is not None
+
+def requeue_expired(db: Session, max_attempts: Optional[int] = None) -> List[str]:
+    """Put RUNNING jobs whose worker stopped renewing back in the queue"""
+    max_attempts = max_attempts or settings.JOB_MAX_ATTEMPTS
+    expired = (
+        db.query(Job)
+        .filter(Job.status == "RUNNING", Job.lease_expires_at.isnot(None),
+                Job.lease_expires_at < datetime.utcnow())
+        .all()
+    )
+    for job in expired:
+        logger.warning(f"Lease on job {job.id} held by {job.worker_id} expired")
+        if (job.attempts or 0) >= max_attempts:
+            job.status = "ERROR"
+            append_logs(db, job.id, [f"Worker lost {job.attempts} times; giving up."])
+        else:
+            job.status = "PENDING"
+            append_logs(db, job.id, ["Worker lost; job re-queued."])
+        job.worker_id = None
+        job.lease_expires_at = None
+    db.commit()
+    return [job.id for job in expired]
+
+def pending_count(db: Session) -> int:
+    return db.query(func.count(Job.id)).filter(Job.status == "PENDING", Job.test_url.isnot(None)).scalar()
+
+def queue_position(db: Session, job: Job) -> Optional[int]:
+    """Approximate 1-based place of a PENDING job: jobs of higher priority, or equal priority and older, go first"""
+    if job.status != "PENDING":
+        return None
+    priority = job.priority or 0
+    ahead = db.query(func.count(Job.id)).filter(
+        Job.status == "PENDING", Job.test_url.isnot(None), Job.id != job.id,
+        or_(Job.priority > priority, (Job.priority == priority) & (Job.created_at < job.created_at)),
+    ).scalar()
+    return ahead + 1
@@ -0,0 +1,281 @@
+"""
+LLM Cache Module
+Persistent cache of chat completions keyed on the model and the normalized prompt
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+from backend.config import settings
+from backend.database.core import SessionLocal
+from backend.database.models import LLMResponse
+
+logger = logging.getLogger(__name__)
+
+# Parts of a prompt that differ between runs without changing what is asked
+VOLATILE_PATTERNS = [
+    (re.compile(r"\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}(?:[.,]\d+)?(?:Z|[+-]\d{2}:?\d{2})?"), "<time>"),
+    (re.compile(r"\b[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}\b", re.I), "<id>"),
+    (re.compile(r"\b\d+(?:\.\d+)?ms\b"), "<n>ms"),
+]
+
+Messages = List[Dict[str, str]]
+
+def normalize_prompt(text: str) -> str:
+    for pattern, replacement in VOLATILE_PATTERNS:
+        text = pattern.sub(replacement, text)
+    return " ".join(text.split())
+
+def prompt_key(model: str, messages: Messages) -> str:
+    normalized = [{"role": m["role"], "content": normalize_prompt(m["content"])} for m in messages]
+    return hashlib.sha256(json.dumps({"model": model, "messages": normalized}, sort_keys=True).encode()).hexdigest()
+
+def usage_of(response) -> Dict[str, int]:
+    usage = getattr(response, "usage", None)
+    return {
+        "prompt_tokens": getattr(usage, "prompt_tokens", 0) or 0,
+        "completion_tokens": getattr(usage, "completion_tokens", 0) or 0,
+    }
+
+class LLMCache:
+    """
+    Completions are stored in the llm_responses table, so every API and
+    worker process shares them, with the most recent LLM_CACHE_MEMORY_ENTRIES
+    also held in an in-memory LRU. Entries expire after LLM_CACHE_TTL_SECONDS
+    and can be dropped early with invalidate(). Identical prompts in flight
+    at the same time wait for one call. Each hit counts the tokens and the
+    latency the original call cost as saved.
+    """
+
+    def __init__(self, session_factory: Optional[Callable] = None, max_memory_entries: Optional[int] = None,
+                 ttl_seconds: Optional[int] = None):
+        self.session_factory = session_factory or SessionLocal
+        self.max_memory_entries = max_memory_entries or settings.LLM_CACHE_MEMORY_ENTRIES
+        self.ttl_seconds = ttl_seconds or settings.LLM_CACHE_TTL_SECONDS
+        self._memory: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._pending: Dict[str, asyncio.Future] = {}
+        self.hits = 0
+        self.memory_hits = 0
+        self.misses = 0
+        self.stored = 0
+        self.invalidated = 0
+        self.rejected = 0
+        self.saved_tokens = 0
+        self.saved_latency_ms = 0.0
+
+    def lookup(self, model: str, messages: Messages) -> Optional[str]:
+        """The cached completion, or None on a miss"""
+        if not settings.LLM_CACHE_ENABLED:
+            return None
+        key = prompt_key(model, messages)
+        entry = self._remember(key)
+        if entry is not None:
+            self.memory_hits += 1
+        else:
+            entry = self._read(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.saved_tokens += entry["prompt_tokens"] + entry["completion_tokens"]
+        self.saved_latency_ms += entry["latency_ms"]
+        return entry["content"]
+
+    def store(self, model: str, messages: Messages, content: str, usage: Dict[str, int], latency_ms: float):
+        if not settings.LLM_CACHE_ENABLED:
+            return
+        key = prompt_key(model, messages)
+        entry = {
+            "model": model,
+            "content": content,
+            "prompt_tokens": usage.get("prompt_tokens", 0),
+            "completion_tokens": usage.get("completion_tokens", 0),
+            "latency_ms": latency_ms,
+            "expires_at": time.time() + self.ttl_seconds,
+        }
+        db = self.session_factory()
+        try:
+            db.merge(LLMResponse(key=key, model=model, content=content, prompt_tokens=entry["prompt_tokens"],
+                                 completion_tokens=entry["completion_tokens"], latency_ms=latency_ms,
+                                 created_at=datetime.utcnow()))
+            db.commit()
+        except Exception as e:
+            # The call succeeded; failing to cache it only costs the next caller
+            logger.error(f"Failed to store LLM response: {e}")
+            db.rollback()
+        finally:
+            db.close()
+        self._keep(key, entry)
+        self.stored += 1
+
+    async def complete(self, client, model: str, messages: Messages,
+                       parse: Optional[Callable[[str], Any]] = None, **params) -> Any:
+        """
+        client.chat.completions.create() through the cache, for an async OpenAI
+        client. Returns the content, or parse(content) when parse is given. An
+        answer is only cached once parse accepted it, i.e. did not raise or
+        return None, and a cached answer it rejects is dropped and asked again.
+        Database lookups and writes run in a thread, off the event loop.
+        """
+        parse = parse or (lambda content: content)
+        if not settings.LLM_CACHE_ENABLED:
+            response = await client.chat.completions.create(model=model, messages=messages, **params)
+            return parse(response.choices[0].message.content)
+        key = prompt_key(model, messages)
+        pending = self._pending.get(key)
+        if pending is not None:
+            return await asyncio.shield(pending)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[key] = future
+        try:
+            value = await asyncio.to_thread(self._accept, model, messages, parse)
+            if value is None:
+                started = time.monotonic()
+                response = await client.chat.completions.create(model=model, messages=messages, **params)
+                content = response.choices[0].message.content
+                value = parse(content)
+                if value is not None:
+                    await asyncio.to_thread(self.store, model, messages, content, usage_of(response),
+                                            (time.monotonic() - started) * 1000)
+            future.set_result(value)
+            return value
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Waiters get the error too; mark it retrieved in case there are none
+            future.exception()
+            raise
+        finally:
+            self._pending.pop(key, None)
+
+    def complete_sync(self, client, model: str, messages: Messages,
+                      parse: Optional[Callable[[str], Any]] = None, **params) -> Any:
+        """complete() for a synchronous OpenAI client"""
+        parse = parse or (lambda content: content)
+        value = self._accept(model, messages, parse)
+        if value is not None:
+            return value
+        started = time.monotonic()
+        response = client.chat.completions.create(model=model, messages=messages, **params)
+        content = response.choices[0].message.content
+        value = parse(content)
+        if value is not None:
+            self.store(model, messages, content, usage_of(response), (time.monotonic() - started) * 1000)
+        return value
+
+    def invalidate(self, model: Optional[str] = None) -> int:
+        """Drop every cached completion, or only those of one model; returns how many rows went"""
+        with self._lock:
+            if model is None:
+                self._memory.clear()
+            else:
+                for key in [k for k, entry in self._memory.items() if entry.get("model") == model]:
+                    del self._memory[key]
+        db = self.session_factory()
+        try:
+            query = db.query(LLMResponse)
+            if model is not None:
+                query = query.filter(LLMResponse.model == model)
+            removed = query.delete(synchronize_session=False)
+            db.commit()
+        finally:
+            db.close()
+        self.invalidated += removed
+        logger.info(f"Invalidated {removed} cached LLM responses" + (f" for {model}" if model else ""))
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": settings.LLM_CACHE_ENABLED,
+            "ttl_seconds": self.ttl_seconds,
+            "memory_entries": len(self._memory),
+            "hits": self.hits,
+            "memory_hits": self.memory_hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "stored": self.stored,
+            "invalidated": self.invalidated,
+            "rejected": self.rejected,
+            "saved_tokens": self.saved_tokens,
+            "saved_latency_ms": round(self.saved_latency_ms),
+        }
+
+    def _accept(self, model: str, messages: Messages, parse: Callable[[str], Any]) -> Any:
+        """parse() of the cached answer; None on a miss, or after dropping an answer the caller rejects"""
+        content = self.lookup(model, messages)
+        if content is None:
+            return None
+        try:
+            value = parse(content)
+        except Exception:
+            value = None
+        if value is None:
+            self._forget(prompt_key(model, messages))
+        return value
+
+    def _forget(self, key: str):
+        with self._lock:
+            self._memory.pop(key, None)
+        db = self.session_factory()
+        try:
+            db.query(LLMResponse).filter(LLMResponse.key == key).delete(synchronize_session=False)
+            db.commit()
+        finally:
+            db.close()
+        self.rejected += 1
+        logger.warning("Dropped a cached LLM response its caller could not use")
+
+    def _remember(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is None:
+                return None
+            if entry["expires_at"] <= time.time():
+                del self._memory[key]
+                return None
+            self._memory.move_to_end(key)
+            return entry
+
+    def _keep(self, key: str, entry: Dict[str, Any]):
+        with self._lock:
+            self._memory[key] = entry
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_memory_entries:
+                self._memory.popitem(last=False)
+
+    def _read(self, key: str) -> Optional[Dict[str, Any]]:
+        db = self.session_factory()
+        try:
+            row = db.query(LLMResponse).filter(LLMResponse.key == key).first()
+            if row is None:
+                return None
+            expires_at = row.created_at + timedelta(seconds=self.ttl_seconds)
+            if expires_at <= datetime.utcnow():
+                db.delete(row)
+                db.commit()
+                return None
+            entry = {
+                "model": row.model,
+                "content": row.content,
+                "prompt_tokens": row.prompt_tokens or 0,
+                "completion_tokens": row.completion_tokens or 0,
+                "latency_ms": row.latency_ms or 0.0,
+                "expires_at": time.time() + (expires_at - datetime.utcnow()).total_seconds(),
+            }
+        finally:
+            db.close()
+        self._keep(key, entry)
+        return entry
+
+llm_cache = LLMCache()
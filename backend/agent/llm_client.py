@@ -0,0 +1,192 @@
+"""
+LLM Client Module
+The process-wide OpenAI client: pooled keep-alive connections, a concurrency limit and timeouts
+"""
+
+import asyncio
+import logging
+import threading
+from types import SimpleNamespace
+from typing import Any, Dict, Optional
+import openai
+from backend.config import settings
+
+logger = logging.getLogger(__name__)
+
+def connection_limits():
+    """Pool limits in the Limits type of whichever HTTP library the installed openai is built on"""
+    return type(openai.DEFAULT_CONNECTION_LIMITS)(
+        max_connections=settings.LLM_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.LLM_MAX_CONNECTIONS,
+        keepalive_expiry=settings.LLM_KEEPALIVE_SECONDS,
+    )
+
+def request_timeout() -> openai.Timeout:
+    return openai.Timeout(settings.ANALYSIS_TIMEOUT_SECONDS, connect=settings.LLM_CONNECT_TIMEOUT_SECONDS)
+
+class LimitedCompletions:
+    """chat.completions of the pooled client, admitting at most max_concurrency requests at once"""
+
+    def __init__(self, owner: "LLMClient"):
+        self.owner = owner
+
+    async def create(self, **params):
+        owner = self.owner
+        async with owner.slots():
+            owner.started()
+            try:
+                client = await owner.openai_client()
+                return await client.chat.completions.create(**params)
+            except Exception:
+                owner.failures += 1
+                raise
+            finally:
+                owner.finished()
+
+class LimitedSyncCompletions:
+    """LimitedCompletions for the synchronous client, limited across threads"""
+
+    def __init__(self, owner: "LLMClient"):
+        self.owner = owner
+
+    def create(self, **params):
+        owner = self.owner
+        with owner.sync_slots:
+            owner.started()
+            try:
+                return owner.sync_openai_client().chat.completions.create(**params)
+            except Exception:
+                owner.failures += 1
+                raise
+            finally:
+                owner.finished()
+
+class LLMClient:
+    """
+    One AsyncOpenAI client per process, so every analysis reuses the same
+    pool of keep-alive connections instead of opening its own. It is created
+    in the app lifespan (or on first use, e.g. in worker processes) and used
+    like an AsyncOpenAI client through client.chat.completions.create(),
+    which waits while ANALYSIS_CONCURRENCY requests are already in flight.
+    sync_client is the matching pooled OpenAI client for synchronous callers,
+    with its own limit of ANALYSIS_CONCURRENCY requests across threads.
+    """
+
+    def __init__(self, api_key: Optional[str] = None, base_url: Optional[str] = None,
+                 max_concurrency: Optional[int] = None, client=None):
+        self.api_key = api_key
+        self.base_url = base_url
+        self.max_concurrency = max_concurrency or settings.ANALYSIS_CONCURRENCY
+        self.chat = SimpleNamespace(completions=LimitedCompletions(self))
+        self.sync_slots = threading.BoundedSemaphore(self.max_concurrency)
+        self._sync_limited = SimpleNamespace(chat=SimpleNamespace(completions=LimitedSyncCompletions(self)))
+        self._openai = client
+        self._sync_client = None
+        self._sync_lock = threading.Lock()
+        self._counts_lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._slots_loop: Optional[asyncio.AbstractEventLoop] = None
+        self.requests = 0
+        self.failures = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+
+    @property
+    def available(self) -> bool:
+        return self._openai is not None or bool(self._api_key())
+
+    async def openai_client(self):
+        """The AsyncOpenAI client, created on first use in the running event loop"""
+        loop = asyncio.get_running_loop()
+        if self._openai is None or (self._loop is not None and self._loop is not loop):
+            # Pooled connections belong to the loop that opened them
+            if self._openai is not None:
+                await self._close_stale(self._openai)
+            self._openai = self._create()
+            self._loop = loop
+        return self._openai
+
+    @property
+    def sync_client(self):
+        """OpenAI-style client for synchronous callers, or None without an API key"""
+        if not self._api_key():
+            return None
+        return self._sync_limited
+
+    def sync_openai_client(self) -> openai.OpenAI:
+        with self._sync_lock:
+            if self._sync_client is None:
+                self._sync_client = openai.OpenAI(
+                    api_key=self._api_key(), base_url=self._base_url(), timeout=request_timeout(),
+                    max_retries=settings.LLM_MAX_RETRIES,
+                    http_client=openai.DefaultHttpxClient(limits=connection_limits()),
+                )
+            return self._sync_client
+
+    async def start(self):
+        if not self.available:
+            logger.warning("OpenAI API key not found. Bug analysis will be limited.")
+            return
+        client = await self.openai_client()
+        logger.info(f"LLM client for {client.base_url} ready: up to {self.max_concurrency} concurrent requests, "
+                    f"{settings.LLM_MAX_CONNECTIONS} pooled connections")
+
+    async def close(self):
+        if self._loop is not None and self._openai is not None:
+            await self._openai.close()
+            self._openai = None
+            self._loop = None
+        if self._sync_client is not None:
+            self._sync_client.close()
+            self._sync_client = None
+
+    def started(self):
+        with self._counts_lock:
+            self.requests += 1
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+
+    def finished(self):
+        with self._counts_lock:
+            self.in_flight -= 1
+
+    def slots(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self._slots is None or self._slots_loop is not loop:
+            self._slots = asyncio.Semaphore(self.max_concurrency)
+            self._slots_loop = loop
+        return self._slots
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "available": self.available,
+            "max_concurrency": self.max_concurrency,
+            "max_connections": settings.LLM_MAX_CONNECTIONS,
+            "requests": self.requests,
+            "failures": self.failures,
+            "in_flight": self.in_flight,
+            "peak_in_flight": self.peak_in_flight,
+        }
+
+    def _api_key(self) -> str:
+        return self.api_key or settings.OPENAI_API_KEY
+
+    def _base_url(self) -> Optional[str]:
+        return self.base_url or settings.OPENAI_BASE_URL or None
+
+    async def _close_stale(self, client):
+        """Close a client left behind by an earlier event loop, as far as its connections allow"""
+        try:
+            await client.close()
+        except Exception as e:
+            logger.debug(f"Error closing LLM client of a previous event loop: {e}")
+
+    def _create(self) -> openai.AsyncOpenAI:
+        return openai.AsyncOpenAI(
+            api_key=self._api_key(), base_url=self._base_url(), timeout=request_timeout(),
+            max_retries=settings.LLM_MAX_RETRIES,
+            http_client=openai.DefaultAsyncHttpxClient(limits=connection_limits()),
+        )
+
+llm_client = LLMClient()
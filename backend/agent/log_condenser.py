@@ -0,0 +1,109 @@
+"""
+Log Condenser Module
+Shrinks a run's log to a token budget before it goes into a prompt, keeping the lines that explain a failure
+"""
+
+import re
+from typing import Dict, Iterable, List, Optional
+from backend.config import settings
+
+ANSI_PATTERN = re.compile(r"\x1b\[[0-9;?]*[ -/]*[@-~]")
+TIMESTAMP_PATTERN = re.compile(
+    r"\[?\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}(?:[.,]\d+)?(?:Z|[+-]\d{2}:?\d{2})?\]?\s*"
+    r"|^\[?\d{2}:\d{2}:\d{2}(?:[.,]\d+)?\]?\s*"
+)
+VOLATILE_ID_PATTERN = re.compile(
+    r"\b[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}\b|\b(?:0x)?[0-9a-f]{12,}\b", re.I
+)
+# Lines that explain a failure; the lines around them are kept with them
+IMPORTANT_PATTERN = re.compile(
+    r"error|exception|traceback|fail|fatal|critical|panic|assert|timeout|timed out|refused|denied|❌"
+    r"|\bHTTP [45]\d\d\b|^\s+at \S|^\s*File \".+\", line \d+",
+    re.I,
+)
+TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+# Lines kept around each important line, and at the start and the end of the log
+CONTEXT_BEFORE = 2
+CONTEXT_AFTER = 8
+HEAD_LINES = 5
+TAIL_LINES = 20
+# Upper bound on the tokens of one "... N lines omitted ..." marker
+MARKER_TOKENS = 8
+
+def estimate_tokens(text: str) -> int:
+    """Rough BPE token count: one per word or symbol, plus one per further 4 characters of long words"""
+    return sum((len(piece) + 3) // 4 for piece in TOKEN_PATTERN.findall(text))
+
+def clean_line(line: str) -> str:
+    """The line without colour codes, timestamps, volatile IDs or trailing whitespace"""
+    line = ANSI_PATTERN.sub("", line)
+    line = TIMESTAMP_PATTERN.sub("", line)
+    line = VOLATILE_ID_PATTERN.sub("<id>", line)
+    return line.rstrip()
+
+def condense_logs(lines: Iterable[str], max_tokens: Optional[int] = None) -> str:
+    """
+    Clean every line and fold repeats into the first occurrence with a
+    count. If that is still over max_tokens (LOG_CONDENSE_MAX_TOKENS), keep
+    the windows around error and stack-trace lines, earliest first since
+    they are usually the cause, then the end and the start of the log, and
+    mark what was left out. Runs in time linear in the number of lines.
+    """
+    budget = max_tokens or settings.LOG_CONDENSE_MAX_TOKENS
+    texts: List[str] = []
+    counts: List[int] = []
+    seen: Dict[str, int] = {}
+    for raw in lines:
+        text = clean_line(raw)
+        if not text.strip():
+            continue
+        at = seen.get(text)
+        if at is None:
+            seen[text] = len(texts)
+            texts.append(text)
+            counts.append(1)
+        else:
+            counts[at] += 1
+
+    rendered = [text if count == 1 else f"{text} [x{count}]" for text, count in zip(texts, counts)]
+    costs = [estimate_tokens(line) + 1 for line in rendered]
+    if sum(costs) <= budget:
+        return "\n".join(rendered)
+
+    total = len(rendered)
+    keep = bytearray(total)
+    used = 0
+    runs = 0  # Kept stretches; there is at most one more omitted stretch than these
+
+    def candidates():
+        for index, text in enumerate(texts):
+            if IMPORTANT_PATTERN.search(text):
+                yield from range(max(0, index - CONTEXT_BEFORE), min(total, index + CONTEXT_AFTER + 1))
+        yield from range(total - 1, max(-1, total - 1 - TAIL_LINES), -1)
+        yield from range(min(HEAD_LINES, total))
+
+    for index in candidates():
+        if keep[index]:
+            continue
+        joined = (index > 0 and keep[index - 1]) + (index + 1 < total and keep[index + 1])
+        new_runs = runs + 1 - joined
+        if used + costs[index] + (new_runs + 1) * MARKER_TOKENS > budget:
+            continue
+        keep[index] = 1
+        used += costs[index]
+        runs = new_runs
+
+    condensed = []
+    omitted = 0
+    for index, line in enumerate(rendered):
+        if keep[index]:
+            if omitted:
+                condensed.append(f"... {omitted} lines omitted ...")
+                omitted = 0
+            condensed.append(line)
+        else:
+            omitted += 1
+    if omitted:
+        condensed.append(f"... {omitted} lines omitted ...")
+    return "\n".join(condensed)
@@ -0,0 +1,91 @@
+"""
+Network Module
+Per-run request accounting, and resource blocking for fast navigation mode
+"""
+
+import logging
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlparse
+from backend.config import settings
+
+logger = logging.getLogger(__name__)
+
+class ResourceSizeCache:
+    """Bounded memory of response sizes seen in full runs, used to estimate bytes saved by blocking"""
+
+    def __init__(self, max_entries: int = 5000):
+        self.max_entries = max_entries
+        self._sizes: "OrderedDict[str, int]" = OrderedDict()
+
+    def record(self, url: str, size: int):
+        self._sizes[url] = size
+        self._sizes.move_to_end(url)
+        while len(self._sizes) > self.max_entries:
+            self._sizes.popitem(last=False)
+
+    def get(self, url: str) -> Optional[int]:
+        return self._sizes.get(url)
+
+resource_sizes = ResourceSizeCache()
+
+class NetworkRecorder:
+    """
+    Counts requests and transferred bytes for one run. In fast mode it also
+    aborts resource types and domains that structural checks never look at.
+    """
+
+    def __init__(self, fast: bool = False, blocked_types: Optional[List[str]] = None,
+                 blocked_domains: Optional[List[str]] = None):
+        self.fast = fast
+        self.blocked_types = set(blocked_types if blocked_types is not None else settings.fast_mode_blocked_types)
+        self.blocked_domains = blocked_domains if blocked_domains is not None else settings.fast_mode_blocked_domains
+        self.requests = 0
+        self.bytes = 0
+        self.blocked_requests = 0
+        self.blocked_bytes_estimate = 0
+        self.blocked_by_type: Dict[str, int] = {}
+
+    async def attach(self, context):
+        if self.fast:
+            await context.route("**/*", self._route)
+        context.on("requestfinished", self._on_request_finished)
+
+    def should_block(self, resource_type: str, url: str) -> bool:
+        if resource_type in self.blocked_types:
+            return True
+        host = urlparse(url).hostname or ""
+        return any(host == domain or host.endswith("." + domain) for domain in self.blocked_domains)
+
+    async def _route(self, route):
+        request = route.request
+        if self.should_block(request.resource_type, request.url):
+            self.blocked_requests += 1
+            self.blocked_by_type[request.resource_type] = self.blocked_by_type.get(request.resource_type, 0) + 1
+            self.blocked_bytes_estimate += resource_sizes.get(request.url) or 0
+            await route.abort("blockedbyclient")
+        else:
+            await route.continue_()
+
+    async def _on_request_finished(self, request):
+        try:
+            sizes = await request.sizes()
+        except Exception as e:
+            # The context may already be closing
+            logger.debug(f"Could not read sizes for {request.url}: {e}")
+            return
+        size = max(sizes.get("responseBodySize", 0), 0) + max(sizes.get("responseHeadersSize", 0), 0)
+        self.requests += 1
+        self.bytes += size
+        if not self.fast:
+            resource_sizes.record(request.url, size)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "mode": "fast" if self.fast else "full",
+            "requests": self.requests,
+            "bytes": self.bytes,
+            "blocked_requests": self.blocked_requests,
+            "blocked_bytes_estimate": self.blocked_bytes_estimate,
+            "blocked_by_type": self.blocked_by_type,
+        }
@@ -0,0 +1,93 @@
+"""
+Page Probe Module
+Console error collection and a single-round-trip probe of a page's interactive elements
+"""
+
+import logging
+from typing import Any, Dict, List
+
+logger = logging.getLogger(__name__)
+
+MAX_CONSOLE_SAMPLES = 10
+INTERACTIVE_SAMPLE_SIZE = 5
+
+# Counts and a few visible examples per group, all read in one evaluate()
+# call instead of a query_selector round trip per element. Visibility is a
+# non-empty layout box: the first getBoundingClientRect() pays for layout
+# once and the rest are plain reads.
+INTERACTIVE_SCRIPT = """
+(sampleSize) => {
+  const groups = {
+    clickable: 'button, [role="button"], input[type="button"], input[type="submit"], [onclick]',
+    links: 'a[href]',
+    forms: 'form',
+    inputs: 'input:not([type="hidden"]):not([type="button"]):not([type="submit"]), select, textarea',
+  };
+  const isVisible = el => {
+    const rect = el.getBoundingClientRect();
+    return rect.width > 0 && rect.height > 0;
+  };
+  const label = el => (el.innerText || el.value || el.getAttribute('aria-label') || el.getAttribute('title')
+                       || el.getAttribute('name') || '').trim().slice(0, 80);
+  const result = { counts: {}, visible: {}, unlabeled: 0, sample: [] };
+  for (const [group, selector] of Object.entries(groups)) {
+    const elements = Array.from(document.querySelectorAll(selector));
+    const shown = elements.filter(isVisible);
+    result.counts[group] = elements.length;
+    result.visible[group] = shown.length;
+    if (group === 'clickable' || group === 'links') {
+      result.unlabeled += shown.filter(el => !label(el) && !el.querySelector('img[alt]:not([alt=""])')).length;
+    }
+    for (const el of shown.slice(0, sampleSize)) {
+      result.sample.push({
+        group,
+        tag: el.tagName.toLowerCase(),
+        text: label(el),
+        href: el.getAttribute('href'),
+        disabled: !!el.disabled,
+      });
+    }
+  }
+  return result;
+}
+"""
+
+class ConsoleRecorder:
+    """
+    Counts console errors and uncaught exceptions on every page of a run.
+    Attached to the context before the first navigation, so errors thrown
+    while the page loads are caught too. Keeps the first few messages only.
+    """
+
+    def __init__(self, fast: bool = False):
+        self.fast = fast
+        self.errors = 0
+        self.samples: List[str] = []
+
+    def attach(self, context):
+        context.on("console", self._on_console)
+        context.on("weberror", self._on_web_error)
+
+    def _on_console(self, message):
+        if message.type != "error":
+            return
+        if self.fast and "ERR_BLOCKED_BY_CLIENT" in message.text:
+            # Requests fast mode aborted itself
+            return
+        self.add(message.text)
+
+    def _on_web_error(self, web_error):
+        self.add(f"Uncaught {web_error.error}")
+
+    def add(self, text: str):
+        self.errors += 1
+        if len(self.samples) < MAX_CONSOLE_SAMPLES:
+            self.samples.append(text)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"errors": self.errors, "samples": list(self.samples)}
+
+def summarize_interactive(probe: Dict[str, Any]) -> str:
+    visible = probe.get("visible", {})
+    return (f"{visible.get('clickable', 0)} buttons, {visible.get('links', 0)} links, "
+            f"{visible.get('inputs', 0)} form fields in {visible.get('forms', 0)} forms")
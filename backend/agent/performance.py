@@ -0,0 +1,204 @@
+"""
+Performance Module
+Web performance metrics collected in the page, absolute budgets, per-URL history and regression detection
+"""
+
+import logging
+from statistics import median
+from typing import Any, Dict, List, Optional
+from sqlalchemy.orm import Session
+from backend.config import settings
+from backend.database.models import PerfMetric
+
+logger = logging.getLogger(__name__)
+
+PERFORMANCE_CHECK_NAME = "Performance Metrics"
+
+# Column, label, unit, and the smallest change worth calling a regression
+# (a 20% jump on a 5ms TTFB is noise, not a finding)
+METRICS = [
+    ("ttfb_ms", "TTFB", "ms", 100),
+    ("fcp_ms", "FCP", "ms", 100),
+    ("dom_content_loaded_ms", "DOMContentLoaded", "ms", 100),
+    ("load_ms", "Load", "ms", 200),
+    ("lcp_ms", "LCP", "ms", 100),
+    ("cls", "CLS", "", 0.05),
+    ("tbt_ms", "TBT", "ms", 50),
+]
+
+# Everything is read in one evaluate() round trip once the load event has
+# fired (or load_wait_ms ran out). Buffered observers return the LCP,
+# layout-shift and long-task entries recorded since navigation started.
+COLLECT_SCRIPT = """
+async (loadWaitMs) => {
+  if (document.readyState !== 'complete') {
+    await new Promise(resolve => {
+      window.addEventListener('load', resolve, { once: true });
+      setTimeout(resolve, loadWaitMs);
+    });
+  }
+  const observe = type => new Promise(resolve => {
+    let entries = [];
+    try {
+      const observer = new PerformanceObserver(list => { entries = entries.concat(list.getEntries()); });
+      observer.observe({ type, buffered: true });
+      setTimeout(() => {
+        entries = entries.concat(observer.takeRecords());
+        observer.disconnect();
+        resolve(entries);
+      }, 0);
+    } catch (e) {
+      resolve([]);
+    }
+  });
+  const [lcp, shifts, longTasks] = await Promise.all(
+    ['largest-contentful-paint', 'layout-shift', 'longtask'].map(observe));
+
+  const nav = performance.getEntriesByType('navigation')[0];
+  const paint = name => {
+    const entry = performance.getEntriesByName(name)[0];
+    return entry ? entry.startTime : null;
+  };
+  const fcp = paint('first-contentful-paint');
+
+  // CLS is the largest session window: shifts less than 1s apart, at most 5s long
+  let cls = 0, windowValue = 0, windowStart = 0, previous = 0;
+  for (const shift of shifts) {
+    if (shift.hadRecentInput) continue;
+    if (windowValue && shift.startTime - previous < 1000 && shift.startTime - windowStart < 5000) {
+      windowValue += shift.value;
+    } else {
+      windowValue = shift.value;
+      windowStart = shift.startTime;
+    }
+    previous = shift.startTime;
+    cls = Math.max(cls, windowValue);
+  }
+
+  // TBT: the part of each long task after FCP that exceeds 50ms
+  const after = fcp || 0;
+  const tbt = longTasks
+    .filter(task => task.startTime >= after)
+    .reduce((total, task) => total + Math.max(0, task.duration - 50), 0);
+
+  return {
+    ttfb_ms: nav ? nav.responseStart - nav.startTime : null,
+    fcp_ms: fcp,
+    dom_content_loaded_ms: nav && nav.domContentLoadedEventEnd ? nav.domContentLoadedEventEnd - nav.startTime : null,
+    load_ms: nav && nav.loadEventEnd ? nav.loadEventEnd - nav.startTime : null,
+    lcp_ms: lcp.length ? lcp[lcp.length - 1].startTime : null,
+    cls: cls,
+    tbt_ms: tbt,
+    long_tasks: longTasks.length,
+    transfer_bytes: nav ? nav.transferSize : null,
+  };
+}
+"""
+
+def normalize(raw: Dict[str, Any]) -> Dict[str, Any]:
+    """Round what the page reported and drop anything that is not a metric"""
+    metrics: Dict[str, Any] = {}
+    for column, _, unit, _ in METRICS:
+        value = raw.get(column)
+        metrics[column] = None if value is None else round(float(value), 1 if unit else 4)
+    for column in ("long_tasks", "transfer_bytes"):
+        value = raw.get(column)
+        metrics[column] = None if value is None else int(value)
+    return metrics
+
+def format_value(column: str, value: float) -> str:
+    unit = next(unit for name, _, unit, _ in METRICS if name == column)
+    return f"{value:.0f}{unit}" if unit else f"{value:.3f}"
+
+def summarize(metrics: Dict[str, Any]) -> str:
+    """One log line with the metrics that were measured"""
+    parts = [f"{label} {format_value(column, metrics[column])}"
+             for column, label, _, _ in METRICS if metrics.get(column) is not None]
+    return ", ".join(parts) or "no metrics reported"
+
+def budgets() -> Dict[str, float]:
+    """Absolute budgets; a budget of 0 is disabled"""
+    configured = {
+        "lcp_ms": settings.PERF_BUDGET_LCP_MS,
+        "cls": settings.PERF_BUDGET_CLS,
+        "tbt_ms": settings.PERF_BUDGET_TBT_MS,
+    }
+    return {column: budget for column, budget in configured.items() if budget}
+
+def budget_violations(metrics: Dict[str, Any]) -> List[str]:
+    labels = {column: label for column, label, _, _ in METRICS}
+    return [
+        f"{labels[column]} {format_value(column, metrics[column])} exceeds the {format_value(column, budget)} budget"
+        for column, budget in budgets().items()
+        if metrics.get(column) is not None and metrics[column] > budget
+    ]
+
+def baseline(db: Session, url: str, runs: Optional[int] = None) -> Dict[str, float]:
+    """Median of each metric over the URL's most recent runs, once there are enough of them"""
+    runs = runs or settings.PERF_BASELINE_RUNS
+    recent = (
+        db.query(PerfMetric)
+        .filter(PerfMetric.url == url)
+        .order_by(PerfMetric.created_at.desc(), PerfMetric.id.desc())
+        .limit(runs)
+        .all()
+    )
+    result = {}
+    for column, _, _, _ in METRICS:
+        values = [getattr(row, column) for row in recent if getattr(row, column) is not None]
+        if len(values) >= settings.PERF_BASELINE_MIN_RUNS:
+            result[column] = median(values)
+    return result
+
+def regressions(metrics: Dict[str, Any], reference: Dict[str, float]) -> List[Dict[str, Any]]:
+    """Failures for metrics that are more than PERF_REGRESSION_PERCENT worse than the baseline"""
+    threshold = settings.PERF_REGRESSION_PERCENT / 100
+    failures = []
+    for column, label, _, min_delta in METRICS:
+        value, base = metrics.get(column), reference.get(column)
+        if value is None or base is None:
+            continue
+        if value - base >= min_delta and value > base * (1 + threshold):
+            increase = f"{(value - base) / base:.0%} above" if base else "up from"
+            failures.append({
+                "test": PERFORMANCE_CHECK_NAME,
+                "error": (f"{label} regressed to {format_value(column, value)}, {increase} "
+                          f"the {format_value(column, base)} baseline"),
+                "metric": label,
+                "value": value,
+                "baseline": base,
+            })
+    return failures
+
+def record_run(db: Session, job_id: str, url: str, metrics: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Compare a run's metrics with the URL's history, then add them to it.
+    Returns a failure per regressed metric; the caller commits.
+    """
+    failures = regressions(metrics, baseline(db, url))
+    db.add(PerfMetric(job_id=job_id, url=url, **normalize(metrics)))
+    return failures
+
+def trends(db: Session, url: Optional[str] = None, limit: int = 20) -> List[Dict[str, Any]]:
+    """Per URL: the latest runs oldest first, the latest run and the current baseline"""
+    urls = [url] if url else [row.url for row in db.query(PerfMetric.url).distinct().order_by(PerfMetric.url)]
+    result = []
+    for target in urls:
+        history = (
+            db.query(PerfMetric)
+            .filter(PerfMetric.url == target)
+            .order_by(PerfMetric.created_at.desc(), PerfMetric.id.desc())
+            .limit(limit)
+            .all()
+        )
+        if not history:
+            continue
+        history.reverse()
+        result.append({
+            "url": target,
+            "runs": db.query(PerfMetric).filter(PerfMetric.url == target).count(),
+            "latest": history[-1],
+            "baseline": baseline(db, target),
+            "history": history,
+        })
+    return result
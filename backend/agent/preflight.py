@@ -0,0 +1,146 @@
+"""
+Pre-flight Module
+Cheap HTTP reachability check run before a browser is leased for a job
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, Optional
+import httpx
+from backend.config import settings
+from backend.agent.browser_pool import DEFAULT_CONTEXT_OPTIONS
+
+logger = logging.getLogger(__name__)
+
+class PreflightResult:
+    """Outcome of probing a target URL over plain HTTP"""
+
+    def __init__(self, url: str, ok: bool, status: Optional[int] = None, error: Optional[str] = None,
+                 redirects: Optional[List[str]] = None, final_url: Optional[str] = None,
+                 tls: Optional[bool] = None, elapsed_ms: float = 0.0):
+        self.url = url
+        self.ok = ok
+        self.status = status
+        self.error = error
+        self.redirects = redirects or []
+        self.final_url = final_url or url
+        self.tls = tls
+        self.elapsed_ms = elapsed_ms
+
+    def as_failure(self) -> Dict[str, Any]:
+        """Failure entry in the same shape the browser's Page Load check produces"""
+        return {"test": "Page Load", "error": self.error}
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "ok": self.ok,
+            "status": self.status,
+            "error": self.error,
+            "redirects": self.redirects,
+            "final_url": self.final_url,
+            "tls": self.tls,
+            "elapsed_ms": self.elapsed_ms,
+        }
+
+class PreflightClient:
+    """
+    Pooled async HTTP client used for pre-flight probes. Only DNS, refused
+    connection, TLS and 5xx failures fail fast. 4xx responses are left to the
+    browser since bot protection often treats non-browser clients
+    differently, and so are timeouts and other errors: the probe is
+    inconclusive (ok, with no status) and the browser gets its own try.
+    """
+
+    def __init__(self, transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+        self._loop = None
+
+    async def _get_client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._loop is not loop:
+            # Connections cannot be shared across event loops
+            if self._client is not None:
+                await self._close_stale(self._client)
+            self._client = httpx.AsyncClient(
+                transport=self.transport,
+                follow_redirects=True,
+                max_redirects=settings.PREFLIGHT_MAX_REDIRECTS,
+                timeout=httpx.Timeout(settings.PREFLIGHT_TIMEOUT_SECONDS),
+                limits=httpx.Limits(
+                    max_connections=settings.PREFLIGHT_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.PREFLIGHT_MAX_CONNECTIONS,
+                ),
+                headers={"User-Agent": DEFAULT_CONTEXT_OPTIONS["user_agent"]},
+            )
+            self._loop = loop
+        return self._client
+
+    async def _close_stale(self, client: httpx.AsyncClient):
+        """Close a client left behind by an earlier event loop, as far as its connections allow"""
+        try:
+            await client.aclose()
+        except Exception as e:
+            logger.debug(f"Error closing pre-flight client of a previous event loop: {e}")
+
+    async def check(self, url: str) -> PreflightResult:
+        started = time.perf_counter()
+
+        def elapsed() -> float:
+            return round((time.perf_counter() - started) * 1000, 1)
+
+        try:
+            # Stream so only the status line and headers are read, never the body
+            client = await self._get_client()
+            async with client.stream("GET", url) as response:
+                redirects = [str(r.url) for r in response.history]
+                final_url = str(response.url)
+                tls = final_url.startswith("https://") or None
+                if response.status_code >= 500:
+                    return PreflightResult(url, False, status=response.status_code,
+                                           error=f"HTTP {response.status_code}", redirects=redirects,
+                                           final_url=final_url, tls=tls, elapsed_ms=elapsed())
+                return PreflightResult(url, True, status=response.status_code, redirects=redirects,
+                                       final_url=final_url, tls=tls, elapsed_ms=elapsed())
+        except httpx.TimeoutException:
+            # A slow server may still load in the browser, which has a longer budget
+            return PreflightResult(url, True, error=f"Timed out after {settings.PREFLIGHT_TIMEOUT_SECONDS}s",
+                                   elapsed_ms=elapsed())
+        except httpx.ConnectError as e:
+            message = str(e) or type(e).__name__
+            if "SSL" in message or "CERTIFICATE" in message.upper():
+                return PreflightResult(url, False, error=f"TLS error: {message}", tls=False, elapsed_ms=elapsed())
+            return PreflightResult(url, False, error=f"Connection failed: {message}", elapsed_ms=elapsed())
+        except httpx.HTTPError as e:
+            return PreflightResult(url, True, error=f"HTTP error: {str(e) or type(e).__name__}",
+                                   elapsed_ms=elapsed())
+
+    async def fingerprint(self, url: str) -> Optional[str]:
+        """
+        Identify the current version of the main document by the ETag or
+        Last-Modified validator of a HEAD response. None when the page cannot
+        be fingerprinted that cheaply (no validator, an error status, or no
+        response within RESULT_CACHE_PROBE_TIMEOUT_SECONDS); such pages run.
+        """
+        try:
+            client = await self._get_client()
+            response = await client.head(url, timeout=settings.RESULT_CACHE_PROBE_TIMEOUT_SECONDS)
+            if response.status_code >= 400:
+                return None
+            prefix = f"{response.status_code} {response.url} "
+            for header in ("etag", "last-modified"):
+                if response.headers.get(header):
+                    return prefix + f"{header}:{response.headers[header]}"
+            return None
+        except (httpx.HTTPError, httpx.InvalidURL) as e:
+            logger.debug(f"Could not fingerprint {url}: {e}")
+            return None
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+            self._loop = None
+
+preflight_client = PreflightClient()
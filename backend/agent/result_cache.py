@@ -0,0 +1,86 @@
+"""
+Result Cache Module
+Reuses a recent job's result when the same run is requested for a page that has not changed
+"""
+
+import hashlib
+import json
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional, Tuple
+from sqlalchemy.orm import Session
+from backend.config import settings
+from backend.database.models import Job
+from backend.agent.preflight import PreflightClient, preflight_client
+
+logger = logging.getLogger(__name__)
+
+# Runs that say something about the page; errors, timeouts and cancellations are always re-run
+CACHEABLE_STATUSES = ("COMPLETED", "FAILED")
+
+def cache_key(test_url: str, provider: Optional[str], context: Dict[str, str], options: Dict[str, Any]) -> str:
+    """Everything in the request that changes the result or its bug reports"""
+    request = {"url": test_url, "provider": provider, "context": context, "options": options}
+    return hashlib.sha256(json.dumps(request, sort_keys=True, default=str).encode()).hexdigest()
+
+class ResultCache:
+    """
+    Before a job is queued the target is fingerprinted with one HEAD
+    request. A finished job with the same cache key and fingerprint inside
+    RESULT_CACHE_TTL_SECONDS is returned instead of running the browser and
+    the analysis again. The jobs table is the cache, so entries are shared by
+    every API and worker process and need no separate invalidation.
+    """
+
+    def __init__(self, client: Optional[PreflightClient] = None, ttl_seconds: Optional[int] = None):
+        self.client = client or preflight_client
+        self.ttl_seconds = ttl_seconds or settings.RESULT_CACHE_TTL_SECONDS
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self.unfingerprinted = 0
+
+    async def lookup(self, db: Session, key: str, url: str, bypass: bool = False) -> Tuple[Optional[Job], Optional[str]]:
+        """
+        Return (cached job or None, fingerprint). Bypassed requests are not
+        fingerprinted, so they wait for no probe and their jobs serve no later
+        requests.
+        """
+        if not settings.RESULT_CACHE_ENABLED:
+            return None, None
+        if bypass:
+            self.bypassed += 1
+            return None, None
+        fingerprint = await self.client.fingerprint(url)
+        if fingerprint is None:
+            self.unfingerprinted += 1
+            return None, None
+
+        cached = (
+            db.query(Job)
+            .filter(Job.cache_key == key, Job.fingerprint == fingerprint,
+                    Job.status.in_(CACHEABLE_STATUSES),
+                    Job.updated_at >= datetime.utcnow() - timedelta(seconds=self.ttl_seconds))
+            .order_by(Job.updated_at.desc())
+            .first()
+        )
+        if cached is None:
+            self.misses += 1
+            return None, fingerprint
+        self.hits += 1
+        logger.info(f"Result cache hit for {url}: reusing job {cached.id}")
+        return cached, fingerprint
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses + self.unfingerprinted
+        return {
+            "enabled": settings.RESULT_CACHE_ENABLED,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "bypassed": self.bypassed,
+            "unfingerprinted": self.unfingerprinted,
+            "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
+
+result_cache = ResultCache()
@@ -6,187 +6,467 @@ Handles automated test execution using Playwright
 import asyncio
 import os
 import json
+import time
 import traceback
+import uuid
 from datetime import datetime
-from typing import Dict, List, Any
-from playwright.async_api import async_playwright
+from typing import Dict, Iterable, List, Any, Optional
+from backend.config import settings
+from backend.agent.artifacts import ArtifactRecorder
+from backend.agent.auth_state import auth_state_cache
+from backend.agent.browser_pool import BrowserPool, browser_pool
+from backend.agent.har import HarRecorder
+from backend.agent.network import NetworkRecorder
+from backend.agent.page_probe import ConsoleRecorder
+from backend.agent.preflight import preflight_client
+from backend.agent.check_scheduler import CheckResult, CheckScheduler, ScheduledCheck
+from backend.agent.checks import CHECK_REGISTRY, get_check_by_name
+from backend.agent.events import CHECK_FINISHED, CHECK_STARTED, FAILURE, EventStream, log_line
+from backend.agent.suite_runner import SuiteRunner
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Failure fields only known once the context is closed, after the failure was reported
+RECORDING_KEYS = ("video_path", "trace_path", "har_path")
+
 class TestRunner:
-    def __init__(self):
-        self.browser = None
+    def __init__(self, pool: Optional[BrowserPool] = None, options: Optional[Dict[str, Any]] = None,
+                 events: Optional[EventStream] = None):
+        self.pool = pool
+        self.options = options or {}
+        self.events = events
+        self.network = NetworkRecorder(fast=bool(self.options.get("fast")))
+        self.console = ConsoleRecorder(fast=bool(self.options.get("fast")))
+        self._owns_pool = False
         self.context = None
         self.page = None
+        self._page_claimed = False
+        self.deadline: Optional[float] = None
+        self.url: Optional[str] = None
+        run_id = uuid.uuid4().hex
+        self.artifacts = ArtifactRecorder(
+            run_id,
+            video=bool(self.options.get("video") or settings.ARTIFACTS_RECORD_VIDEO),
+            trace=bool(self.options.get("trace") or settings.ARTIFACTS_RECORD_TRACE),
+        )
+        self.keep_artifacts = False
+        self.har = HarRecorder(run_id) if self.options.get("har") or settings.HAR_CAPTURE else None
+        self.performance: Optional[Dict[str, Any]] = None  # Set by the performance check
+        self.interactive: Optional[Dict[str, Any]] = None  # Set by the interactive elements check
+        self.auth_profile: Optional[str] = self.options.get("auth_profile")
+        self.setup_error: Optional[str] = None
     
     async def setup_browser(self):
-        """Initialize browser for testing"""
+        """Lease an isolated browser context from the warm pool"""
         try:
-            playwright = await async_playwright().start()
-            self.browser = await playwright.chromium.launch(headless=True)
-            self.context = await self.browser.new_context(
-                viewport={'width': 1280, 'height': 720},
-                user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-            )
+            if self.pool is None:
+                if browser_pool.is_bound_to_running_loop():
+                    self.pool = browser_pool
+                else:
+                    # Outside the API process there is no warm pool on this loop,
+                    # so run on a private single-browser pool for this run and its reruns only
+                    self.pool = BrowserPool(size=1, contexts_per_browser=1 + settings.FLAKY_RERUNS)
+                    self._owns_pool = True
+            self.context = await self.pool.acquire(**await self.artifacts.context_options(),
+                                                   **await self.auth_context_options())
+            await self.network.attach(self.context)
+            if settings.CONSOLE_CHECK_ENABLED:
+                self.console.attach(self.context)
+            if self.har is not None:
+                await self.har.attach(self.context, self.url)
+            await self.artifacts.start(self.context)
             self.page = await self.context.new_page()
             return True
         except Exception as e:
             logger.error(f"Failed to setup browser: {e}")
+            self.setup_error = str(e)
+            return False
+
+    async def auth_context_options(self) -> Dict[str, Any]:
+        """Start contexts logged in with the run's credential profile, if it has one"""
+        if not self.auth_profile:
+            return {}
+        return {"storage_state": await auth_state_cache.storage_state(self.auth_profile, self.pool)}
+
+    def login_redirect(self, url: str) -> bool:
+        """Whether a page ended up on the profile's login page; the saved login is dropped if so"""
+        if not self.auth_profile:
             return False
+        profile = auth_state_cache.profile(self.auth_profile)
+        if not profile.is_login_page(url) or profile.is_login_page(self.url):
+            return False
+        auth_state_cache.invalidate(self.auth_profile)
+        return True
     
-    async def cleanup_browser(self):
-        """Clean up browser resources"""
+    async def cleanup_browser(self) -> Dict[str, str]:
+        """
+        Return the leased context to the pool, even while the run is being
+        cancelled. Returns the paths of any video and trace that were kept.
+        """
+        return await asyncio.shield(self._release_browser())
+
+    async def _release_browser(self) -> Dict[str, str]:
+        recorded = {}
         try:
-            if self.page:
-                await self.page.close()
             if self.context:
-                await self.context.close()
-            if self.browser:
-                await self.browser.close()
+                video = self.page.video if self.page is not None else None
+                trace_path = await self.artifacts.stop_trace(self.context, keep=self.keep_artifacts)
+                # A requested HAR is kept whatever the outcome; its last entries still read from the context
+                har_path = await self.har.finish() if self.har is not None else None
+                await self.pool.release(self.context)
+                video_path = await self.artifacts.finish_video(video, keep=self.keep_artifacts)
+                recorded = {key: path for key, path in (("trace_path", trace_path), ("video_path", video_path),
+                                                        ("har_path", har_path)) if path}
         except Exception as e:
             logger.error(f"Error during browser cleanup: {e}")
+        finally:
+            self.context = None
+            self.page = None
+            self._page_claimed = False
+            if self._owns_pool:
+                await self.pool.stop()
+                self.pool = None
+                self._owns_pool = False
+        return recorded
     
-    async def run_basic_tests(self, url: str) -> Dict[str, Any]:
-        """Run basic automated tests on the given URL"""
+    async def new_page(self):
+        """Hand out the context's first page, then a fresh page per caller"""
+        if self.page is not None and not self._page_claimed:
+            self._page_claimed = True
+            return self.page
+        return await self.context.new_page()
+
+    def timeout_ms(self, seconds: float) -> float:
+        """Playwright timeout for an operation, capped by what is left of the run deadline"""
+        if self.deadline is not None:
+            seconds = min(seconds, self.deadline - asyncio.get_running_loop().time())
+        return max(seconds, 0.001) * 1000
+
+    def build_checks(self, names: Optional[Iterable[str]] = None) -> List[ScheduledCheck]:
+        """
+        Schedule every registered check that applies to this run's options, or
+        only the named checks and the checks they depend on
+        """
+        enabled = {cls.id: cls for cls in CHECK_REGISTRY.values() if cls.enabled(self.options)}
+        selected = set(enabled)
+        if names is not None:
+            by_name = {cls.name: cls for cls in enabled.values()}
+            pending = [by_name[name].id for name in names if name in by_name]
+            selected = set()
+            while pending:
+                check_id = pending.pop()
+                if check_id in enabled and check_id not in selected:
+                    selected.add(check_id)
+                    pending.extend(enabled[check_id].depends_on)
+        checks = []
+        for cls in (enabled[check_id] for check_id in enabled if check_id in selected):
+            missing = [dependency for dependency in cls.depends_on if dependency not in enabled]
+            if missing:
+                logger.warning(f"Skipping check '{cls.name}': depends on disabled check(s) {', '.join(missing)}")
+                continue
+            check = cls(self)
+            checks.append(ScheduledCheck(
+                cls.name, check.run,
+                depends_on=[enabled[dependency].name for dependency in cls.depends_on],
+                timeout=cls.time_budget(),
+                cost_ms=cls.cost_ms,
+            ))
+        return checks
+
+    async def run_basic_tests(self, url: str, deadline: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Run basic automated tests on the given URL.
+        deadline is an event-loop time; when it passes, the run stops, its
+        context is closed and the status becomes TIMEOUT.
+        Log lines and check events stream while the checks run. A FAILURE
+        event is emitted as soon as the failure is final, after its reruns
+        and screenshot, so analysis starts while the browser is cleaned up.
+        Its video, trace and HAR (RECORDING_KEYS) only exist after cleanup;
+        they are added to the failures in the result.
+        """
+        started = time.perf_counter()
+        self.deadline = deadline
+        self.url = url
         results = {
             "status": "COMPLETED",
             "logs": [],
             "tests_run": 0,
             "tests_passed": 0,
             "tests_failed": 0,
-            "failures": []
+            "failures": [],
+            "timings": {},
+            "duration_ms": 0.0,
+            "network": {}
         }
         
         try:
-            results["logs"].append(f"Starting tests for URL: {url}")
+            await self.log(results, f"Starting tests for URL: {url}")
+            if self.network.fast:
+                await self.log(results, "Fast mode: skipping images, fonts, media and blocklisted domains")
             
-            if not await self.setup_browser():
-                results["status"] = "ERROR"
-                results["logs"].append("Failed to initialize browser")
-                return results
+            async with asyncio.timeout_at(deadline):
+                if settings.PREFLIGHT_ENABLED and not await self.run_preflight(url, results):
+                    return results
+                
+                if not await self.setup_browser():
+                    results["status"] = "ERROR"
+                    reason = f": {self.setup_error}" if self.setup_error else ""
+                    await self.log(results, f"Failed to initialize browser{reason}")
+                    return results
+                
+                checks = self.build_checks()
+                await self.log(results, f"Running {len(checks)} checks: {', '.join(c.name for c in checks)}")
+                scheduler = CheckScheduler(checks)
+                outcomes = await scheduler.run(
+                    self.new_page, deadline=deadline, on_started=self.on_check_started,
+                    on_finished=lambda name, outcome: self.on_check_finished(results, name, outcome))
             
-            # Test 1: Page Load (reduced timeout)
-            results["logs"].append("Test 1: Checking page load...")
-            results["tests_run"] += 1
+            if settings.FLAKY_RERUNS > 0 and not self.deadline_passed():
+                outcomes = await self.rerun_failures(results, checks, outcomes)
             
-            try:
-                response = await self.page.goto(url, wait_until='domcontentloaded', timeout=10000)  # Reduced from 30s to 10s
-                if response and response.status < 400:
+            for check, outcome in zip(checks, outcomes):
+                results["tests_run"] += 1
+                results["timings"][check.name] = outcome.duration_ms
+                if outcome.passed:
                     results["tests_passed"] += 1
-                    results["logs"].append("✅ Page loaded successfully")
                 else:
                     results["tests_failed"] += 1
                     results["failures"].append({
-                        "test": "Page Load",
-                        "error": f"HTTP {response.status if response else 'No response'}"
+                        "test": check.name,
+                        "error": outcome.error
                     })
-                    results["logs"].append(f"❌ Page load failed: HTTP {response.status if response else 'No response'}")
-            except Exception as e:
-                results["tests_failed"] += 1
-                results["failures"].append({
-                    "test": "Page Load",
-                    "error": str(e)
-                })
-                results["logs"].append(f"❌ Page load error: {str(e)}")
             
-            # Test 2: Title Check (no wait)
-            results["logs"].append("Test 2: Checking page title...")
-            results["tests_run"] += 1
-            
-            try:
-                title = await self.page.title()
-                if title and len(title.strip()) > 0:
-                    results["tests_passed"] += 1
-                    results["logs"].append(f"✅ Page title found: '{title}'")
-                else:
-                    results["tests_failed"] += 1
-                    results["failures"].append({
-                        "test": "Title Check",
-                        "error": "Page title is empty or missing"
-                    })
-                    results["logs"].append("❌ Page title is empty or missing")
-            except Exception as e:
-                results["tests_failed"] += 1
-                results["failures"].append({
-                    "test": "Title Check",
-                    "error": str(e)
-                })
-                results["logs"].append(f"❌ Title check error: {str(e)}")
-            
-            # Test 3: Basic Elements Check (faster)
-            results["logs"].append("Test 3: Checking for basic HTML elements...")
-            results["tests_run"] += 1
-            
-            try:
-                # Quick check for essential elements
-                body = await self.page.query_selector('body')
-                if body:
-                    results["tests_passed"] += 1
-                    results["logs"].append("✅ Found basic HTML structure")
-                else:
-                    results["tests_failed"] += 1
-                    results["failures"].append({
-                        "test": "Basic Elements Check",
-                        "error": "No body element found"
-                    })
-                    results["logs"].append("❌ No body element found")
-            except Exception as e:
-                results["tests_failed"] += 1
-                results["failures"].append({
-                    "test": "Basic Elements Check",
-                    "error": str(e)
-                })
-                results["logs"].append(f"❌ Elements check error: {str(e)}")
-            
-            # Skip slow tests for faster results
-            results["logs"].append("✅ Quick tests completed")
+            if results["failures"]:
+                await self.capture_failures(results["failures"], scheduler.pages)
+                await self.report_failures(results["failures"])
             
             # Determine overall status
-            if results["tests_failed"] > 0:
+            if any(outcome.timed_out for outcome in outcomes) and self.deadline_passed():
+                results["status"] = "TIMEOUT"
+                await self.log(results, f"Run exceeded its deadline: {results['tests_passed']}/{results['tests_run']} passed")
+            elif results["tests_failed"] > 0:
                 results["status"] = "FAILED"
-                results["logs"].append(f"Tests completed: {results['tests_passed']}/{results['tests_run']} passed")
+                await self.log(results, f"Tests completed: {results['tests_passed']}/{results['tests_run']} passed")
             else:
                 results["status"] = "COMPLETED"
-                results["logs"].append(f"All tests passed: {results['tests_passed']}/{results['tests_run']}")
+                await self.log(results, f"All tests passed: {results['tests_passed']}/{results['tests_run']}")
             
+        except TimeoutError:
+            results["status"] = "TIMEOUT"
+            await self.log(results, "Run exceeded its deadline before all checks could start")
+        
         except Exception as e:
             results["status"] = "ERROR"
-            results["logs"].append(f"Critical error during test execution: {str(e)}")
+            await self.log(results, f"Critical error during test execution: {str(e)}")
             logger.error(f"Critical error in run_basic_tests: {traceback.format_exc()}")
         
         finally:
-            await self.cleanup_browser()
+            self.keep_artifacts = bool(results["failures"]) or results["status"] in ("ERROR", "TIMEOUT")
+            recorded = await self.cleanup_browser()
+            for failure in results["failures"]:
+                failure.update(recorded)
+            results["artifacts"] = self.artifacts.stats()
+            if self.artifacts.files:
+                await self.log(results, f"Saved {self.artifacts.files} failure artifact(s) in {self.artifacts.capture_ms:.0f}ms")
+            results["network"] = self.network.stats()
+            if self.har is not None:
+                results["network"]["har"] = {**self.har.stats(), "path": recorded.get("har_path")}
+            if settings.CONSOLE_CHECK_ENABLED:
+                results["console"] = self.console.stats()
+            if self.interactive is not None:
+                results["interactive"] = self.interactive
+            if self.performance is not None:
+                results["performance"] = self.performance
+            results["duration_ms"] = round((time.perf_counter() - started) * 1000, 1)
         
         return results
 
+    async def log(self, results: Dict[str, Any], line: str):
+        await log_line(results, self.events, line)
+
+    async def report_failures(self, failures: List[Dict[str, Any]]):
+        if self.events is not None:
+            for failure in failures:
+                # A copy: the result's failure gains its recordings after cleanup
+                await self.events.emit(FAILURE, failure=dict(failure))
+
+    async def on_check_started(self, name: str):
+        if self.events is not None:
+            await self.events.emit(CHECK_STARTED, check=name)
+
+    async def on_check_finished(self, results: Dict[str, Any], name: str, outcome):
+        mark = "✅" if outcome.passed else "❌"
+        await self.log(results, f"{mark} {outcome.message} ({outcome.duration_ms:.0f}ms)")
+        if self.events is not None:
+            await self.events.emit(CHECK_FINISHED, check=name, outcome="passed" if outcome.passed else "failed",
+                                   duration_ms=outcome.duration_ms)
+
+    async def rerun_failures(self, results: Dict[str, Any], checks: List[ScheduledCheck],
+                             outcomes: List[Any]) -> List[Any]:
+        """
+        Re-run the failed rerunnable checks up to FLAKY_RERUNS times in parallel, each
+        attempt in a fresh context. A check that passes in any attempt is flaky:
+        it counts as passed and is reported in results["flaky"] instead of
+        becoming a failure. Checks that fail every attempt stay failures.
+        """
+        failed = [check.name for check, outcome in zip(checks, outcomes)
+                  if not outcome.passed and not outcome.timed_out
+                  and getattr(get_check_by_name(check.name), "rerunnable", False)]
+        if not failed:
+            return outcomes
+        contexts = await self.reserve_rerun_contexts()
+        if not contexts:
+            await self.log(results, f"Not re-running {', '.join(failed)}: no free browser contexts")
+            return outcomes
+        await self.log(results, f"Re-running {', '.join(failed)} {len(contexts)}x in fresh contexts")
+        attempts = await asyncio.gather(*(self.rerun_attempt(context, failed) for context in contexts),
+                                        return_exceptions=True)
+        attempts = [attempt for attempt in attempts if isinstance(attempt, dict)]
+        if not attempts:
+            return outcomes
+
+        results["flaky"] = []
+        outcomes = list(outcomes)
+        for index, check in enumerate(checks):
+            if check.name not in failed:
+                continue
+            passes = sum(1 for attempt in attempts if attempt.get(check.name) and attempt[check.name].passed)
+            if passes:
+                first = outcomes[index]
+                results["flaky"].append({"test": check.name, "error": first.error,
+                                         "reruns": len(attempts), "passed_reruns": passes})
+                await self.log(results, f"⚠️ {check.name} is flaky: failed, then passed {passes}/{len(attempts)} reruns")
+                outcomes[index] = CheckResult(True, f"{check.name} passed on rerun")
+                outcomes[index].duration_ms = first.duration_ms
+            else:
+                await self.log(results, f"{check.name} failed all {len(attempts)} reruns: consistent failure")
+        return outcomes
+
+    async def reserve_rerun_contexts(self) -> List[Any]:
+        """
+        Lease up to FLAKY_RERUNS contexts without waiting. The run still holds
+        its own context here, so queueing for more could deadlock runs that
+        each wait for a slot another one holds; when the pool is saturated the
+        reruns are fewer, or skipped.
+        """
+        options = await self.auth_context_options()
+        contexts = []
+        for _ in range(settings.FLAKY_RERUNS):
+            try:
+                context = await self.pool.try_acquire(**options)
+            except Exception as e:
+                logger.warning(f"Could not open a rerun context: {e}")
+                break
+            if context is None:
+                break
+            contexts.append(context)
+        return contexts
+
+    async def rerun_attempt(self, context, names: List[str]) -> Dict[str, Any]:
+        """Run the named checks (and what they depend on) once more in the fresh, leased context"""
+        try:
+            # Same request blocking as the run itself, without mixing into its network stats
+            await NetworkRecorder(fast=self.network.fast).attach(context)
+            checks = self.build_checks(names)
+            outcomes = await CheckScheduler(checks).run(context.new_page, deadline=self.deadline)
+            return {check.name: outcome for check, outcome in zip(checks, outcomes)}
+        finally:
+            await self.pool.release(context)
+
+    async def capture_failures(self, failures: List[Dict[str, Any]], pages: Dict[str, Any]):
+        """Screenshot the page each failed check ran on, once per page"""
+        shots: Dict[int, Optional[str]] = {}
+        for failure in failures:
+            page = pages.get(failure["test"])
+            if page is None:
+                continue
+            if id(page) not in shots:
+                shots[id(page)] = await self.artifacts.screenshot(page, failure["test"])
+            if shots[id(page)]:
+                failure["screenshot_path"] = shots[id(page)]
+
+    async def run_preflight(self, url: str, results: Dict[str, Any]) -> bool:
+        """Probe the URL over HTTP; on a hard failure record it and skip the browser entirely"""
+        preflight = await preflight_client.check(url)
+        results["preflight"] = preflight.to_dict()
+        results["timings"]["Pre-flight"] = preflight.elapsed_ms
+        if preflight.ok and preflight.status is None:
+            await self.log(results, f"Pre-flight inconclusive: {preflight.error} ({preflight.elapsed_ms:.0f}ms); "
+                                    f"trying the browser")
+            return True
+        if preflight.ok:
+            hops = f" after {len(preflight.redirects)} redirect(s)" if preflight.redirects else ""
+            await self.log(results, f"Pre-flight: HTTP {preflight.status}{hops} in {preflight.elapsed_ms:.0f}ms")
+            return True
+        
+        results["tests_run"] = 1
+        results["tests_failed"] = 1
+        results["failures"].append(preflight.as_failure())
+        results["status"] = "FAILED"
+        await self.report_failures(results["failures"])
+        await self.log(results, f"❌ Pre-flight failed: {preflight.error} ({preflight.elapsed_ms:.0f}ms); browser not started")
+        return False
+
+    def deadline_passed(self) -> bool:
+        return self.deadline is not None and asyncio.get_running_loop().time() >= self.deadline
+
+async def run_automation_tests_async(url: str, timeout_seconds: Optional[float] = None,
+                                    options: Optional[Dict[str, Any]] = None,
+                                    events: Optional[EventStream] = None) -> Dict[str, Any]:
+    """
+    Run the automation tests on the caller's event loop within
+    timeout_seconds (TEST_TIMEOUT_SECONDS by default). With options mode
+    "suite" the pytest suite runs instead of the built-in checks. When events
+    is given, log lines, check progress and failures are streamed to it
+    instead of being collected in the result's logs, and failures are
+    streamed as soon as they are final.
+    """
+    try:
+        options = options or {}
+        deadline = asyncio.get_running_loop().time() + (timeout_seconds or settings.TEST_TIMEOUT_SECONDS)
+        if options.get("mode") == "suite":
+            suite = SuiteRunner(shards=options.get("shards") or settings.SUITE_DEFAULT_SHARDS, events=events)
+            return await suite.run(url, deadline=deadline)
+        runner = TestRunner(options=options, events=events)
+        return await runner.run_basic_tests(url, deadline=deadline)
+    except Exception as e:
+        logger.error(f"Error in run_automation_tests_async: {traceback.format_exc()}")
+        return execution_error_result(e)
+
 def run_automation_tests(url: str) -> Dict[str, Any]:
     """
-    Synchronous wrapper for running automation tests
+    Synchronous wrapper for callers that are not running an event loop.
+    When the warm browser pool's loop is running in another thread the run is
+    submitted to it, so only the calling thread waits.
     """
     try:
-        runner = TestRunner()
-        
-        # Check if there's already an event loop running
-        try:
-            loop = asyncio.get_running_loop()
-            # If we're in an async context, create a new thread
-            import concurrent.futures
-            with concurrent.futures.ThreadPoolExecutor() as executor:
-                future = executor.submit(asyncio.run, runner.run_basic_tests(url))
-                result = future.result()
-                return result
-        except RuntimeError:
-            # No event loop running, safe to create one
-            return asyncio.run(runner.run_basic_tests(url))
-    
+        asyncio.get_running_loop()
+    except RuntimeError:
+        pass
+    else:
+        raise RuntimeError(
+            "run_automation_tests() would block the running event loop; "
+            "await run_automation_tests_async() instead"
+        )
+
+    try:
+        pool_loop = browser_pool.loop
+        if pool_loop and pool_loop.is_running():
+            future = asyncio.run_coroutine_threadsafe(run_automation_tests_async(url), pool_loop)
+            return future.result()
+        return asyncio.run(run_automation_tests_async(url))
     except Exception as e:
         logger.error(f"Error in run_automation_tests: {traceback.format_exc()}")
-        return {
-            "status": "ERROR",
-            "logs": [f"Failed to execute tests: {str(e)}"],
-            "tests_run": 0,
-            "tests_passed": 0,
-            "tests_failed": 0,
-            "failures": [{"test": "Test Execution", "error": str(e)}]
-        }
\ No newline at end of file
+        return execution_error_result(e)
+
+def execution_error_result(error: Exception) -> Dict[str, Any]:
+    """Result dict for a run that could not be executed at all"""
+    return {
+        "status": "ERROR",
+        "logs": [f"Failed to execute tests: {str(error)}"],
+        "tests_run": 0,
+        "tests_passed": 0,
+        "tests_failed": 0,
+        "failures": [{"test": "Test Execution", "error": str(error)}]
+    }
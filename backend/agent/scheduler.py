@@ -0,0 +1,238 @@
+"""
+Job Scheduler Module
+Bounded run concurrency with strict priorities and weighted fair share between users
+"""
+
+import asyncio
+import logging
+import math
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+from backend.config import settings
+
+logger = logging.getLogger(__name__)
+
+class QueueFull(Exception):
+    """The queue (or the user's share of it) is full; retry after retry_after seconds"""
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+class Reservation:
+    """A queue place held for a user's job between admission and submit()"""
+
+    def __init__(self, user: str):
+        self.user = user
+        self.held = True
+
+class QueuedRun:
+    def __init__(self, job_id: str, user: str, priority: int, seq: int, start: Callable[[], Awaitable[Any]]):
+        self.job_id = job_id
+        self.user = user
+        self.priority = priority
+        self.seq = seq
+        self.start = start
+
+def parse_weights(spec: str) -> Dict[str, float]:
+    """SCHEDULER_USER_WEIGHTS, e.g. "ci=3,alice=2"; unlisted users weigh 1"""
+    weights = {}
+    for item in spec.split(","):
+        if "=" in item:
+            user, weight = item.split("=", 1)
+            weights[user.strip()] = max(float(weight), 0.01)
+    return weights
+
+class JobScheduler:
+    """
+    Sits between accepting a job and running it in this process. At most
+    max_concurrent runs execute at once; the rest wait in per-user queues.
+    Higher priorities always go first. Within a priority, users are served by
+    start-time fair queuing: each run advances its user's virtual time by
+    1 / weight, and the user with the earliest virtual time goes next, so a
+    user with a large batch cannot hold back one who submits a single job.
+    """
+
+    def __init__(self, max_concurrent: Optional[int] = None, max_queued: Optional[int] = None,
+                 max_queued_per_user: Optional[int] = None, weights: Optional[Dict[str, float]] = None):
+        self.max_concurrent = max_concurrent or settings.SCHEDULER_MAX_CONCURRENT_RUNS
+        self.max_queued = max_queued if max_queued is not None else settings.SCHEDULER_MAX_QUEUED
+        self.max_queued_per_user = (max_queued_per_user if max_queued_per_user is not None
+                                    else settings.SCHEDULER_MAX_QUEUED_PER_USER)
+        self.weights = weights if weights is not None else parse_weights(settings.SCHEDULER_USER_WEIGHTS)
+        self._queues: Dict[int, Dict[str, Deque[QueuedRun]]] = {}
+        self._virtual: Dict[Tuple[int, str], float] = {}
+        self._clocks: Dict[int, float] = {}
+        self._running: Dict[str, asyncio.Task] = {}
+        self._reserved: Dict[str, int] = {}
+        self._order: Optional[List[str]] = None
+        self._seq = 0
+        self._avg_run_seconds = float(settings.SCHEDULER_DEFAULT_RUN_SECONDS)
+        self.started_total = 0
+        self.rejected_total = 0
+
+    @property
+    def queued(self) -> int:
+        return sum(len(q) for users in self._queues.values() for q in users.values())
+
+    def reserve(self, user: str) -> Reservation:
+        """
+        Admit one more of the user's jobs, or raise QueueFull. The place counts
+        against the limits until the job is submit()ted with the reservation or
+        the reservation is release()d, so concurrent requests cannot both take
+        the last place while their jobs are still being created.
+        """
+        self.check_capacity(user)
+        self._reserved[user] = self._reserved.get(user, 0) + 1
+        return Reservation(user)
+
+    def release(self, reservation: Reservation):
+        """Give back a place that was not used; does nothing once the job was submitted"""
+        if not reservation.held:
+            return
+        reservation.held = False
+        self._reserved[reservation.user] -= 1
+        if not self._reserved[reservation.user]:
+            del self._reserved[reservation.user]
+
+    def submit(self, job_id: str, user: str, priority: int, start: Callable[[], Awaitable[Any]],
+               reservation: Optional[Reservation] = None):
+        """
+        Queue start() to run when a slot is free. Without a reservation this
+        admits the job first and raises QueueFull when there is no room.
+        """
+        if reservation is None:
+            self.check_capacity(user)
+        else:
+            self.release(reservation)
+        self._seq += 1
+        queue = self._queues.setdefault(priority, {}).setdefault(user, deque())
+        queue.append(QueuedRun(job_id, user, priority, self._seq, start))
+        self._order = None
+        self._pump()
+
+    def check_capacity(self, user: str):
+        queued = self.queued + sum(self._reserved.values())
+        if queued >= self.max_queued:
+            raise self.reject(f"Job queue is full ({queued} waiting)", queued)
+        mine = sum(len(users.get(user, ())) for users in self._queues.values()) + self._reserved.get(user, 0)
+        if mine >= self.max_queued_per_user:
+            raise self.reject(f"You already have {mine} jobs waiting", mine)
+
+    def reject(self, message: str, waiting: int) -> QueueFull:
+        """Count a refused job; the single place rejections are counted, whoever keeps the queue"""
+        self.rejected_total += 1
+        return QueueFull(message, self.retry_after(waiting))
+
+    def position(self, job_id: str) -> Optional[int]:
+        """1-based place in the queue, 0 once running, None if unknown to the scheduler"""
+        if job_id in self._running:
+            return 0
+        if self._order is None:
+            self._order = [run.job_id for run in self._plan()]
+        try:
+            return self._order.index(job_id) + 1
+        except ValueError:
+            return None
+
+    def remove(self, job_id: str) -> bool:
+        """Drop a job that is still waiting, e.g. because it was cancelled"""
+        for users in self._queues.values():
+            for user, queue in users.items():
+                for run in queue:
+                    if run.job_id == job_id:
+                        queue.remove(run)
+                        self._order = None
+                        return True
+        return False
+
+    def retry_after(self, waiting: int) -> int:
+        """Seconds until a slot is likely free for a job behind `waiting` others"""
+        return max(1, math.ceil(self._avg_run_seconds * max(1, waiting) / self.max_concurrent))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_concurrent": self.max_concurrent,
+            "running": len(self._running),
+            "queued": self.queued,
+            "queued_by_user": self._queued_by_user(),
+            "started_total": self.started_total,
+            "rejected_total": self.rejected_total,
+            "avg_run_seconds": round(self._avg_run_seconds, 1),
+        }
+
+    def _queued_by_user(self) -> Dict[str, int]:
+        counts: Dict[str, int] = {}
+        for users in self._queues.values():
+            for user, queue in users.items():
+                if queue:
+                    counts[user] = counts.get(user, 0) + len(queue)
+        return counts
+
+    def _weight(self, user: str) -> float:
+        return self.weights.get(user, 1.0)
+
+    def _pick(self, queues, virtual, clocks) -> Optional[QueuedRun]:
+        for priority in sorted(queues, reverse=True):
+            users = {user: queue for user, queue in queues[priority].items() if queue}
+            if not users:
+                continue
+            clock = clocks.get(priority, 0.0)
+
+            def tag(user):
+                return max(virtual.get((priority, user), 0.0), clock)
+
+            user = min(users, key=lambda u: (tag(u), users[u][0].seq))
+            start = tag(user)
+            clocks[priority] = start
+            virtual[(priority, user)] = start + 1.0 / self._weight(user)
+            return users[user].popleft()
+        return None
+
+    def _plan(self) -> List[QueuedRun]:
+        """The order queued runs would start in if nothing else arrived"""
+        queues = {p: {u: deque(q) for u, q in users.items()} for p, users in self._queues.items()}
+        virtual, clocks = dict(self._virtual), dict(self._clocks)
+        order = []
+        while True:
+            run = self._pick(queues, virtual, clocks)
+            if run is None:
+                return order
+            order.append(run)
+
+    def _pump(self):
+        while len(self._running) < self.max_concurrent:
+            run = self._pick(self._queues, self._virtual, self._clocks)
+            if run is None:
+                break
+            self._order = None
+            self.started_total += 1
+            task = asyncio.create_task(self._execute(run))
+            self._running[run.job_id] = task
+        self._prune()
+
+    async def _execute(self, run: QueuedRun):
+        started = time.monotonic()
+        try:
+            await run.start()
+        except Exception as e:
+            logger.error(f"Scheduled run of job {run.job_id} failed: {e}")
+        finally:
+            # Moving average of run time, for Retry-After estimates
+            self._avg_run_seconds += 0.2 * (time.monotonic() - started - self._avg_run_seconds)
+            self._running.pop(run.job_id, None)
+            self._pump()
+
+    def _prune(self):
+        """Forget idle users whose virtual time the clock has passed; they would restart from the clock anyway"""
+        for priority, users in list(self._queues.items()):
+            for user in [u for u, q in users.items() if not q]:
+                del users[user]
+                key = (priority, user)
+                if self._virtual.get(key, 0.0) <= self._clocks.get(priority, 0.0):
+                    self._virtual.pop(key, None)
+            if not users:
+                del self._queues[priority]
+
+job_scheduler = JobScheduler()
@@ -0,0 +1,76 @@
+"""
+Suite Plugin Module
+pytest plugin that selects one shard of a suite and streams each finished
+test to stdout as a JSON line, in the report_data.tests[] shape used by
+pytest-json-report
+"""
+
+import json
+import os
+import sys
+from typing import Any, Dict
+
+EVENT_PREFIX = "@@qa-suite@@ "
+
+def emit(event: Dict[str, Any]):
+    # Capturing is suspended between test phases, so this reaches the real stdout
+    sys.stdout.write(EVENT_PREFIX + json.dumps(event, default=str) + "\n")
+    sys.stdout.flush()
+
+def shard_of(index: int, shard_count: int) -> int:
+    return index % shard_count
+
+def pytest_collection_modifyitems(session, config, items):
+    shard_index = int(os.environ.get("QA_SHARD_INDEX", "0"))
+    shard_count = int(os.environ.get("QA_SHARD_COUNT", "1"))
+    if shard_count > 1:
+        # Every shard collects the same ordered items, so round-robin by position is disjoint and complete
+        selected, deselected = [], []
+        for i, item in enumerate(items):
+            (selected if shard_of(i, shard_count) == shard_index else deselected).append(item)
+        items[:] = selected
+        config.hook.pytest_deselected(items=deselected)
+    emit({"event": "collected", "shard": shard_index, "count": len(items)})
+
+_stages: Dict[str, Dict[str, Any]] = {}
+
+def stage_data(report) -> Dict[str, Any]:
+    data: Dict[str, Any] = {"duration": report.duration, "outcome": report.outcome}
+    if report.failed:
+        crash = getattr(report.longrepr, "reprcrash", None)
+        if crash is not None:
+            data["crash"] = {"path": crash.path, "lineno": crash.lineno, "message": crash.message}
+        else:
+            lines = str(report.longrepr).strip().splitlines()
+            data["crash"] = {"message": lines[-1] if lines else ""}
+        data["longrepr"] = str(report.longrepr)
+    return data
+
+def overall_outcome(stages: Dict[str, Dict[str, Any]]) -> str:
+    if stages.get("setup", {}).get("outcome") == "failed":
+        return "error"
+    if "call" in stages:
+        return stages["call"]["outcome"]
+    if stages.get("teardown", {}).get("outcome") == "failed":
+        return "error"
+    return stages.get("setup", {}).get("outcome", "skipped")
+
+def pytest_runtest_logreport(report):
+    stages = _stages.setdefault(report.nodeid, {})
+    stages[report.when] = stage_data(report)
+    if report.when != "teardown":
+        return
+    del _stages[report.nodeid]
+    emit({
+        "event": "test",
+        "shard": int(os.environ.get("QA_SHARD_INDEX", "0")),
+        "test": {
+            "nodeid": report.nodeid,
+            "lineno": report.location[1],
+            "outcome": overall_outcome(stages),
+            **stages,
+        },
+    })
+
+def pytest_sessionfinish(session, exitstatus):
+    emit({"event": "finished", "shard": int(os.environ.get("QA_SHARD_INDEX", "0")), "exitstatus": int(exitstatus)})
@@ -0,0 +1,187 @@
+"""
+Suite Runner Module
+Runs a pytest suite against a target URL, sharded across worker processes,
+and ingests each test result as soon as its shard reports it
+"""
+
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+from collections import deque
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from backend.config import settings
+from backend.agent.events import CHECK_FINISHED, FAILURE, EventStream, log_line
+from backend.agent.suite_plugin import EVENT_PREFIX
+
+logger = logging.getLogger(__name__)
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+
+# pytest exit codes that mean the shard itself broke rather than a test failing
+SHARD_ERROR_EXIT_CODES = {2, 3, 4}
+NO_TESTS_COLLECTED = 5
+
+FAILED_OUTCOMES = {"failed", "error"}
+
+def failure_from_test(test: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Failure entry for a report_data.tests[] record, or None if it did not fail"""
+    if test.get("outcome") not in FAILED_OUTCOMES:
+        return None
+    stage = next((test[when] for when in ("setup", "call", "teardown")
+                  if test.get(when, {}).get("outcome") == "failed"), {})
+    return {
+        "test": test.get("nodeid", "Unknown Test"),
+        "error": stage.get("crash", {}).get("message") or "Test failed",
+        "details": stage.get("longrepr", ""),
+    }
+
+class SuiteRunner:
+    """
+    Runs suite_path with one pytest process per shard. The suite plugin prints
+    every finished test as a JSON line, so results (and failures) are emitted
+    while slower shards are still running instead of after one final report.
+    """
+
+    def __init__(self, suite_path: Optional[str] = None, shards: int = 1, events: Optional[EventStream] = None):
+        path = Path(suite_path or settings.SUITE_PATH)
+        self.suite_path = path if path.is_absolute() else REPO_ROOT / path
+        self.shards = max(1, min(shards, settings.SUITE_MAX_SHARDS))
+        self.events = events
+        self._processes: List[asyncio.subprocess.Process] = []
+
+    def shard_command(self) -> List[str]:
+        return [sys.executable, "-m", "pytest", str(self.suite_path), "-q",
+                "-p", "backend.agent.suite_plugin", "-p", "no:cacheprovider"]
+
+    def shard_env(self, url: str, shard_index: int) -> Dict[str, str]:
+        env = dict(os.environ)
+        env["TARGET_URL"] = url
+        env["QA_SHARD_INDEX"] = str(shard_index)
+        env["QA_SHARD_COUNT"] = str(self.shards)
+        env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(REPO_ROOT), env.get("PYTHONPATH")]))
+        return env
+
+    async def run(self, url: str, deadline: Optional[float] = None) -> Dict[str, Any]:
+        """Run every shard and return a runner-style result dict with report_data.tests[]"""
+        started = time.perf_counter()
+        results = {
+            "status": "COMPLETED",
+            "logs": [],
+            "tests_run": 0,
+            "tests_passed": 0,
+            "tests_failed": 0,
+            "failures": [],
+            "timings": {},
+            "duration_ms": 0.0,
+            "report_data": {"tests": [], "summary": {"total": 0}},
+            "shards": [],
+        }
+
+        try:
+            await self.log(results, f"Running suite {self.suite_path.name} against {url} in {self.shards} shard(s)")
+            async with asyncio.timeout_at(deadline):
+                shards = await asyncio.gather(*(self.run_shard(i, url, results) for i in range(self.shards)))
+            results["shards"] = shards
+
+            broken = [shard for shard in shards if shard["exitstatus"] in SHARD_ERROR_EXIT_CODES]
+            if broken:
+                results["status"] = "ERROR"
+                for shard in broken:
+                    await self.log(results, f"Shard {shard['shard']} exited with status {shard['exitstatus']}")
+                    for line in shard["output_tail"]:
+                        await self.log(results, line)
+            elif results["tests_failed"] > 0:
+                results["status"] = "FAILED"
+                await self.log(results, f"Suite completed: {results['tests_passed']}/{results['tests_run']} passed")
+            else:
+                results["status"] = "COMPLETED"
+                await self.log(results, f"Suite passed: {results['tests_passed']}/{results['tests_run']}")
+
+        except TimeoutError:
+            results["status"] = "TIMEOUT"
+            await self.log(results, f"Suite exceeded its deadline after {results['tests_run']} tests")
+
+        except Exception as e:
+            results["status"] = "ERROR"
+            await self.log(results, f"Critical error during suite execution: {str(e)}")
+            logger.error(f"Critical error in SuiteRunner.run: {e}")
+
+        finally:
+            await asyncio.shield(self.kill_shards())
+            results["duration_ms"] = round((time.perf_counter() - started) * 1000, 1)
+
+        return results
+
+    async def run_shard(self, shard_index: int, url: str, results: Dict[str, Any]) -> Dict[str, Any]:
+        process = await asyncio.create_subprocess_exec(
+            *self.shard_command(),
+            cwd=str(REPO_ROOT),
+            env=self.shard_env(url, shard_index),
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.STDOUT,
+            limit=16 * 1024 * 1024,  # A single event line carries the full traceback
+        )
+        self._processes.append(process)
+        output_tail: deque = deque(maxlen=20)
+        collected = 0
+
+        async for raw in process.stdout:
+            line = raw.decode("utf-8", errors="replace").rstrip("\n")
+            # pytest's progress characters may precede the event on the same line
+            position = line.find(EVENT_PREFIX)
+            if position < 0:
+                output_tail.append(line)
+                continue
+            event = json.loads(line[position + len(EVENT_PREFIX):])
+            if event["event"] == "collected":
+                collected = event["count"]
+            elif event["event"] == "test":
+                await self.ingest(event["test"], results)
+
+        exitstatus = await process.wait()
+        if exitstatus == NO_TESTS_COLLECTED and collected == 0:
+            exitstatus = 0  # More shards than tests
+        return {"shard": shard_index, "collected": collected, "exitstatus": exitstatus,
+                "output_tail": list(output_tail)}
+
+    async def ingest(self, test: Dict[str, Any], results: Dict[str, Any]):
+        outcome = test.get("outcome", "unknown")
+        duration_ms = round(sum(test.get(when, {}).get("duration", 0.0)
+                                for when in ("setup", "call", "teardown")) * 1000, 1)
+        summary = results["report_data"]["summary"]
+        summary[outcome] = summary.get(outcome, 0) + 1
+        summary["total"] += 1
+        results["report_data"]["tests"].append(test)
+        results["timings"][test["nodeid"]] = duration_ms
+        results["tests_run"] += 1
+
+        failure = failure_from_test(test)
+        if failure:
+            results["tests_failed"] += 1
+            results["failures"].append(failure)
+            line = f"❌ {test['nodeid']}: {failure['error'].splitlines()[0]} ({duration_ms:.0f}ms)"
+        elif outcome == "passed":
+            results["tests_passed"] += 1
+            line = f"✅ {test['nodeid']} ({duration_ms:.0f}ms)"
+        else:
+            line = f"⏭️ {test['nodeid']} {outcome}"
+        await self.log(results, line)
+
+        if self.events is not None:
+            await self.events.emit(CHECK_FINISHED, check=test["nodeid"], outcome=outcome, duration_ms=duration_ms)
+            if failure:
+                await self.events.emit(FAILURE, failure=failure)
+
+    async def log(self, results: Dict[str, Any], line: str):
+        await log_line(results, self.events, line)
+
+    async def kill_shards(self):
+        for process in self._processes:
+            if process.returncode is None:
+                process.kill()
+                await process.wait()
+        self._processes = []
@@ -0,0 +1,185 @@
+"""
+Worker Farm Module
+Process pool of test workers that claim jobs from the jobs table, each with its own browser pool
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import queue
+from typing import Any, Dict, List, Optional
+from backend.config import settings
+from backend.agent.browser_pool import browser_pool
+from backend.agent.executor import cancel_job, execute_job
+from backend.agent.job_queue import claim_job, lease_held, renew_lease, requeue_expired
+from backend.database.core import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+class WorkerFarm:
+    """
+    Spawns WORKER_PROCESSES worker processes and relays their job updates
+    back into the API process through a multiprocessing queue.
+    """
+
+    def __init__(self, notify, processes: Optional[int] = None, concurrency: Optional[int] = None):
+        self.notify = notify
+        self.processes = processes or settings.WORKER_PROCESSES
+        self.concurrency = concurrency or settings.WORKER_CONCURRENCY
+        self._mp = multiprocessing.get_context("spawn")
+        self._events = None
+        self._stop_event = None
+        self._workers: Dict[str, Any] = {}
+        self._tasks: List[asyncio.Task] = []
+        self.restarts_total = 0
+        self.requeued_total = 0
+
+    @property
+    def running(self) -> bool:
+        return bool(self._workers)
+
+    async def start(self):
+        self._events = self._mp.Queue()
+        self._stop_event = self._mp.Event()
+        for index in range(self.processes):
+            self._spawn(f"worker-{index}")
+        self._tasks = [
+            asyncio.create_task(self._relay_events()),
+            asyncio.create_task(self._supervise()),
+        ]
+        logger.info(f"Worker farm started with {self.processes} process(es)")
+
+    async def stop(self):
+        if not self._workers:
+            return
+        self._stop_event.set()
+        loop = asyncio.get_running_loop()
+        for process in self._workers.values():
+            await loop.run_in_executor(None, process.join, settings.WORKER_SHUTDOWN_SECONDS)
+            if process.is_alive():
+                process.terminate()
+        for task in self._tasks:
+            task.cancel()
+        self._workers = {}
+        self._tasks = []
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "processes": self.processes,
+            "alive": sum(1 for p in self._workers.values() if p.is_alive()),
+            "slots": self.processes * self.concurrency,
+            "restarts_total": self.restarts_total,
+            "requeued_total": self.requeued_total,
+        }
+
+    def _spawn(self, worker_id: str):
+        process = self._mp.Process(
+            target=worker_main,
+            args=(worker_id, self.concurrency, self._events, self._stop_event),
+            name=worker_id,
+            daemon=True,
+        )
+        process.start()
+        self._workers[worker_id] = process
+
+    async def _relay_events(self):
+        """Forward (job_id, message) pairs from workers to the WebSocket fan-out"""
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                job_id, message = await loop.run_in_executor(None, self._events.get, True, 0.5)
+            except queue.Empty:
+                continue
+            try:
+                await self.notify(job_id, message)
+            except Exception as e:
+                logger.error(f"Failed to relay update for job {job_id}: {e}")
+
+    async def _supervise(self):
+        """Restart crashed workers and re-queue jobs whose lease ran out"""
+        while True:
+            await asyncio.sleep(settings.WORKER_POLL_SECONDS)
+            for worker_id, process in list(self._workers.items()):
+                if not process.is_alive() and not self._stop_event.is_set():
+                    logger.warning(f"{worker_id} exited with code {process.exitcode}; restarting")
+                    self.restarts_total += 1
+                    self._spawn(worker_id)
+            db = SessionLocal()
+            try:
+                self.requeued_total += len(requeue_expired(db))
+            except Exception as e:
+                logger.error(f"Failed to re-queue expired jobs: {e}")
+            finally:
+                db.close()
+
+def worker_main(worker_id: str, concurrency: int, events, stop_event):
+    """Entry point of a worker process; spawned processes get their own pool and DB engine"""
+    asyncio.run(_worker_loop(worker_id, concurrency, events, stop_event))
+
+async def _worker_loop(worker_id: str, concurrency: int, events, stop_event):
+    async def notify(job_id: str, message: Dict[str, Any]):
+        events.put((job_id, message))
+
+    async def watch_lease(job_id: str):
+        """Renew the lease, and stop the run once the job is no longer ours (cancelled or re-queued)"""
+        loop = asyncio.get_running_loop()
+        renewed_at = loop.time()
+        while True:
+            await asyncio.sleep(settings.WORKER_POLL_SECONDS)
+            db = SessionLocal()
+            try:
+                if loop.time() - renewed_at >= settings.JOB_LEASE_SECONDS / 3:
+                    held = renew_lease(db, job_id, worker_id)
+                    renewed_at = loop.time()
+                else:
+                    held = lease_held(db, job_id, worker_id)
+            except Exception as e:
+                logger.error(f"{worker_id} failed to check lease on job {job_id}: {e}")
+                held = True
+            finally:
+                db.close()
+            if not held:
+                logger.info(f"{worker_id} lost job {job_id}; cancelling its run")
+                cancel_job(job_id)
+                return
+
+    async def run_claimed(job_id: str, test_url: str, provider: str, context: Dict[str, str],
+                          options: Dict[str, Any]):
+        lease_task = asyncio.create_task(watch_lease(job_id))
+        try:
+            await execute_job(job_id, test_url, provider, context, notify, worker_id=worker_id, options=options)
+        finally:
+            lease_task.cancel()
+
+    try:
+        await browser_pool.start()
+    except Exception as e:
+        logger.error(f"{worker_id} could not pre-launch its browser pool: {e}")
+
+    slots = asyncio.Semaphore(concurrency)
+    running = set()
+    while not stop_event.is_set():
+        await slots.acquire()
+        db = SessionLocal()
+        try:
+            job = claim_job(db, worker_id)
+            claimed = (job.id, job.test_url, job.provider or "uTest", job.context or {}, job.options or {}) if job else None
+        except Exception as e:
+            logger.error(f"{worker_id} failed to claim a job: {e}")
+            claimed = None
+        finally:
+            db.close()
+
+        if not claimed:
+            slots.release()
+            await asyncio.sleep(settings.WORKER_POLL_SECONDS)
+            continue
+
+        task = asyncio.create_task(run_claimed(*claimed))
+        running.add(task)
+        task.add_done_callback(running.discard)
+        task.add_done_callback(lambda _: slots.release())
+
+    if running:
+        await asyncio.gather(*running, return_exceptions=True)
+    await browser_pool.stop()
@@ -0,0 +1,267 @@
+"""
+Worker Hub Module
+API-side registry of remote worker nodes that lease jobs over HTTP and report their runs back
+"""
+
+import asyncio
+import logging
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+from backend.config import settings
+from backend.agent.executor import JobExecution, Notifier
+from backend.agent.job_queue import claim_job, renew_lease, requeue_expired
+from backend.database.core import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+class UnknownWorker(LookupError):
+    """The worker is not registered (never was, or was dropped as stale); it should register again"""
+
+class LeaseLost(LookupError):
+    """The job is no longer held by the reporting worker (cancelled, re-queued or already finished)"""
+
+class RemoteWorker:
+    """A registered worker node and the slots it reported free on its last call"""
+
+    def __init__(self, worker_id: str, name: str, capacity: int):
+        self.id = worker_id
+        self.name = name
+        self.capacity = capacity
+        self.free_slots = capacity
+        self.jobs: set = set()
+        self.assigned: List[Dict[str, Any]] = []  # Claimed for the worker, not yet handed over
+        self.polling = False
+        self.waiter: Optional[asyncio.Future] = None
+        self.last_seen = time.monotonic()
+        self.last_assigned = 0.0
+        self.jobs_total = 0
+
+    @property
+    def open_slots(self) -> int:
+        return self.free_slots - len(self.assigned)
+
+    def touch(self):
+        self.last_seen = time.monotonic()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "name": self.name,
+            "capacity": self.capacity,
+            "free_slots": self.free_slots,
+            "running": sorted(self.jobs),
+            "jobs_total": self.jobs_total,
+            "seen_seconds_ago": round(time.monotonic() - self.last_seen, 1),
+        }
+
+class WorkerHub:
+    """
+    Worker nodes register with their capacity and long-poll for work with the
+    number of slots they have free. Queued jobs are claimed from the jobs table
+    under the same lease the worker farm uses and go to the polling node with
+    the most open slots. Nodes renew leases with heartbeats and stream their
+    log lines, check events and results back, which are persisted here exactly
+    as for a local run. A node that stops heartbeating loses its leases and its
+    jobs are re-queued for the others.
+    """
+
+    def __init__(self, notify: Notifier, session_factory=None):
+        self.notify = notify
+        self.session_factory = session_factory or SessionLocal
+        self.workers: Dict[str, RemoteWorker] = {}
+        self.executions: Dict[str, JobExecution] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.dispatched_total = 0
+        self.requeued_total = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    async def start(self):
+        if not settings.REMOTE_WORKER_TOKEN:
+            # Leased jobs carry their run options and credential profiles to whoever asks
+            raise RuntimeError("REMOTE_WORKERS_ENABLED requires REMOTE_WORKER_TOKEN to be set")
+        self._task = asyncio.create_task(self._supervise())
+        logger.info("Worker hub accepting remote workers")
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        for worker in self.workers.values():
+            if worker.waiter and not worker.waiter.done():
+                worker.waiter.set_result(None)
+        for job_id in list(self.executions):
+            await self._drop_execution(job_id)
+
+    def register(self, name: str, capacity: int) -> RemoteWorker:
+        worker = RemoteWorker(f"{name}-{uuid.uuid4().hex[:8]}", name, capacity)
+        self.workers[worker.id] = worker
+        logger.info(f"Remote worker {worker.id} registered with {capacity} slot(s)")
+        return worker
+
+    async def lease(self, worker_id: str, free_slots: int, wait_seconds: float) -> List[Dict[str, Any]]:
+        """
+        Hand the worker up to free_slots jobs, waiting up to wait_seconds for one
+        to be queued when none is pending.
+        """
+        worker = self._worker(worker_id)
+        worker.touch()
+        worker.free_slots = max(0, min(free_slots, worker.capacity))
+        worker.polling = True
+        try:
+            self.dispatch()
+            if not worker.assigned and wait_seconds > 0:
+                worker.waiter = asyncio.get_running_loop().create_future()
+                try:
+                    await asyncio.wait_for(worker.waiter, wait_seconds)
+                except asyncio.TimeoutError:
+                    pass
+                finally:
+                    worker.waiter = None
+        finally:
+            worker.polling = False
+
+        jobs, worker.assigned = worker.assigned, []
+        for job in jobs:
+            execution = JobExecution(self.session_factory(), job["id"], job["test_url"], job["provider"],
+                                     job["context"], self.notify, worker_id=worker.id,
+                                     session_factory=self.session_factory)
+            if await execution.start():
+                self.executions[job["id"]] = execution
+                worker.jobs.add(job["id"])
+            else:
+                execution.db.close()
+        worker.touch()
+        return [job for job in jobs if job["id"] in worker.jobs]
+
+    def dispatch(self):
+        """Claim pending jobs for polling workers, most open slots first"""
+        if not any(w.polling and w.open_slots > 0 for w in self.workers.values()):
+            return
+        db = self.session_factory()
+        try:
+            while True:
+                candidates = [w for w in self.workers.values() if w.polling and w.open_slots > 0]
+                if not candidates:
+                    break
+                # Ties go to the worker that was given a job least recently
+                worker = max(candidates, key=lambda w: (w.open_slots, -w.last_assigned))
+                job = claim_job(db, worker.id)
+                if job is None:
+                    break
+                worker.assigned.append({
+                    "id": job.id,
+                    "test_url": job.test_url,
+                    "provider": job.provider or "uTest",
+                    "context": job.context or {},
+                    "options": job.options or {},
+                })
+                worker.last_assigned = time.monotonic()
+                worker.jobs_total += 1
+                self.dispatched_total += 1
+                if worker.waiter and not worker.waiter.done():
+                    worker.waiter.set_result(None)
+        except Exception as e:
+            logger.error(f"Failed to dispatch jobs to remote workers: {e}")
+        finally:
+            db.close()
+
+    def heartbeat(self, worker_id: str, job_ids: List[str], free_slots: int) -> List[str]:
+        """Renew the worker's leases; returns the jobs it should stop because they are no longer its own"""
+        worker = self._worker(worker_id)
+        worker.touch()
+        worker.free_slots = max(0, min(free_slots, worker.capacity))
+        db = self.session_factory()
+        try:
+            lost = [job_id for job_id in job_ids if not renew_lease(db, job_id, worker_id)]
+        finally:
+            db.close()
+        return lost
+
+    async def report_events(self, worker_id: str, job_id: str, events: List[Dict[str, Any]]):
+        execution = self._execution(worker_id, job_id)
+        for event in events:
+            await execution.handle_event(event)
+
+    async def report_result(self, worker_id: str, job_id: str, result: Optional[Dict[str, Any]] = None,
+                            cancelled: bool = False, error: Optional[str] = None):
+        execution = self._execution(worker_id, job_id)
+        del self.executions[job_id]
+        self.workers[worker_id].jobs.discard(job_id)
+        try:
+            if cancelled:
+                await execution.cancel()
+            elif result is None:
+                await execution.fail(RuntimeError(error or "Worker reported no result"))
+            else:
+                await execution.finish(result)
+        finally:
+            execution.db.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": len(self.workers),
+            "slots": sum(w.capacity for w in self.workers.values()),
+            "free_slots": sum(w.free_slots for w in self.workers.values()),
+            "running": len(self.executions),
+            "dispatched_total": self.dispatched_total,
+            "requeued_total": self.requeued_total,
+            "nodes": [w.to_dict() for w in self.workers.values()],
+        }
+
+    def _worker(self, worker_id: str) -> RemoteWorker:
+        worker = self.workers.get(worker_id)
+        if worker is None:
+            raise UnknownWorker(worker_id)
+        return worker
+
+    def _execution(self, worker_id: str, job_id: str) -> JobExecution:
+        worker = self._worker(worker_id)
+        worker.touch()
+        execution = self.executions.get(job_id)
+        if execution is None or execution.worker_id != worker_id:
+            raise LeaseLost(job_id)
+        return execution
+
+    async def _drop_execution(self, job_id: str):
+        execution = self.executions.pop(job_id)
+        worker = self.workers.get(execution.worker_id)
+        if worker:
+            worker.jobs.discard(job_id)
+        try:
+            await execution.log.close()
+        finally:
+            execution.db.close()
+
+    async def supervise_once(self):
+        """Forget silent workers, re-queue jobs whose lease ran out and offer queued jobs to pollers"""
+        now = time.monotonic()
+        for worker_id, worker in list(self.workers.items()):
+            if now - worker.last_seen > settings.REMOTE_WORKER_STALE_SECONDS and not worker.polling:
+                # Its leases run out on their own and the jobs are re-queued below
+                logger.warning(f"Remote worker {worker_id} stopped reporting; dropping it")
+                del self.workers[worker_id]
+                for job_id in list(worker.jobs):
+                    await self._drop_execution(job_id)
+
+        db = self.session_factory()
+        try:
+            requeued = requeue_expired(db)
+        finally:
+            db.close()
+        self.requeued_total += len(requeued)
+        for job_id in requeued:
+            if job_id in self.executions:
+                await self._drop_execution(job_id)
+        self.dispatch()
+
+    async def _supervise(self):
+        while True:
+            await asyncio.sleep(settings.WORKER_POLL_SECONDS)
+            try:
+                await self.supervise_once()
+            except Exception as e:
+                logger.error(f"Worker hub supervision failed: {e}")
@@ -0,0 +1,87 @@
+"""
+Analysis Benchmark
+Wall time and tokens to analyze a job's failures one at a time, concurrently and in one batched call,
+against a local mock LLM
+
+    python -m backend.benchmarks.bench_analysis --failures 5 --runs 3
+"""
+
+import argparse
+import asyncio
+import re
+import statistics
+import time
+from unittest.mock import patch
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from backend.config import settings
+from backend.agent.analyzer import TestAnalyzer, analyze_test_run_async
+from backend.agent.llm_client import llm_client
+from backend.benchmarks.mock_llm import MockLLM
+from backend.database.models import Base
+
+# A typical test cycle brief, repeated in every per-failure prompt
+CONTEXT = {
+    "overview": "Exploratory cycle for the storefront release candidate. Focus on the product listing, "
+                "search, cart and checkout flows on desktop Chrome. " * 3,
+    "instructions": "Report only reproducible issues. Include the URL, exact steps and the observed error. "
+                    "Out of scope: third-party payment pages, marketing pop-ups and known issue KI-104. " * 3,
+}
+
+def latency(prompt: str) -> float:
+    """0.3s per call, plus 0.1 * N seconds to write the report for failure N"""
+    numbers = [int(number) for number in re.findall(r"Test Failure(?: \d+)?: Check (\d+)", prompt)]
+    return 0.3 + 0.1 * sum(numbers)
+
+async def one_at_a_time(failures, db):
+    analyzer = TestAnalyzer()
+    for failure in failures:
+        await analyzer.generate_bug_report_async(failure, CONTEXT, "uTest")
+
+async def concurrent(failures, db):
+    await analyze_test_run_async("bench", {"failures": failures}, CONTEXT, "uTest", db, batch=False)
+
+async def batched(failures, db):
+    await analyze_test_run_async("bench", {"failures": failures}, CONTEXT, "uTest", db, batch=True)
+
+async def measure(failures, runs: int, session_factory, llm: MockLLM):
+    try:
+        await compare(failures, runs, session_factory, llm)
+    finally:
+        await llm_client.close()
+
+async def compare(failures, runs: int, session_factory, llm: MockLLM):
+    for label, analyze in (("one at a time", one_at_a_time), ("concurrent", concurrent), ("batched", batched)):
+        durations = []
+        requests, tokens = llm.requests, llm.prompt_tokens + llm.completion_tokens
+        for _ in range(runs):
+            db = session_factory()
+            started = time.perf_counter()
+            await analyze(failures, db)
+            durations.append(time.perf_counter() - started)
+            db.close()
+        print(f"{label:<14}: median {statistics.median(durations) * 1000:.0f}ms per job, "
+              f"{(llm.requests - requests) // runs} calls, "
+              f"~{(llm.prompt_tokens + llm.completion_tokens - tokens) // runs} tokens")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--failures", type=int, default=5)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    failures = [{"test": f"Check {index}", "error": "Element not found"} for index in range(1, args.failures + 1)]
+    # Every run must reach the mock LLM
+    with MockLLM(latency) as llm, patch.object(settings, "OPENAI_BASE_URL", llm.url), \
+         patch.object(settings, "OPENAI_API_KEY", "bench"), patch.object(settings, "LLM_CACHE_ENABLED", False):
+        calls = [latency(f"Test Failure: {failure['test']}") for failure in failures]
+        print(f"{len(calls)} failures; slowest call {max(calls):.1f}s, sum {sum(calls):.1f}s")
+        asyncio.run(measure(failures, args.runs, sessionmaker(bind=engine), llm))
+        print(f"peak concurrent requests at the mock LLM: {llm.peak_in_flight}; "
+              f"{len(llm.connections)} connections opened for {llm.requests} requests")
+
+if __name__ == "__main__":
+    main()
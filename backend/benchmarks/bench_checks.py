@@ -0,0 +1,67 @@
+"""
+Checks Benchmark
+Added run time of the console and interactive checks over the quick checks, and each check's
+median time against the per-check target; exits non-zero when a check misses it
+
+    python -m backend.benchmarks.bench_checks --runs 10 --target-ms 100
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+from typing import Dict, List
+from unittest.mock import patch
+from backend.agent.browser_pool import BrowserPool
+from backend.agent.checks import CHECK_REGISTRY
+from backend.agent.runner import TestRunner
+from backend.benchmarks.fixture_site import FixtureSite
+
+QUICK_CHECKS = ("page_load", "title", "basic_elements")
+PROBE_CHECKS = ("console", "interactive")
+
+async def median_timings(pool: BrowserPool, url: str, check_ids, runs: int) -> Dict[str, float]:
+    """Median run duration ("run") and median time of each check, in ms"""
+    registry = {check_id: CHECK_REGISTRY[check_id] for check_id in check_ids}
+    samples: Dict[str, List[float]] = {"run": []}
+    with patch.dict(CHECK_REGISTRY, registry, clear=True):
+        for _ in range(runs):
+            results = await TestRunner(pool=pool).run_basic_tests(url)
+            samples["run"].append(results["duration_ms"])
+            for name, duration in results["timings"].items():
+                samples.setdefault(name, []).append(duration)
+    return {name: statistics.median(durations) for name, durations in samples.items()}
+
+async def measure(url: str, runs: int, target_ms: float) -> bool:
+    pool = BrowserPool(size=1)
+    await pool.start()
+    try:
+        # One untimed run so both variants start from a warm browser
+        await median_timings(pool, url, QUICK_CHECKS, 1)
+        quick = (await median_timings(pool, url, QUICK_CHECKS, runs))["run"]
+        probed = await median_timings(pool, url, QUICK_CHECKS + PROBE_CHECKS, runs)
+        print(f"quick checks: median {quick:.0f}ms per run")
+        print(f"with console and interactive checks: median {probed['run']:.0f}ms per run "
+              f"(+{probed['run'] - quick:.0f}ms)")
+        within = True
+        for check_id in PROBE_CHECKS:
+            name = CHECK_REGISTRY[check_id].name
+            verdict = "ok" if probed[name] < target_ms else "OVER TARGET"
+            within = within and probed[name] < target_ms
+            print(f"{name:<28}: median {probed[name]:.0f}ms (target <{target_ms:.0f}ms) {verdict}")
+        return within
+    finally:
+        await pool.stop()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--target-ms", type=float, default=100)
+    args = parser.parse_args()
+    with FixtureSite() as site:
+        within = asyncio.run(measure(site.url + "/", args.runs, args.target_ms))
+    if not within:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
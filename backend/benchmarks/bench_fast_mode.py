@@ -0,0 +1,41 @@
+"""
+Fast Mode Benchmark
+Compares page-load latency and transferred bytes between full and fast runs
+
+    python -m backend.benchmarks.bench_fast_mode --runs 5
+"""
+
+import argparse
+import asyncio
+import statistics
+from backend.agent.browser_pool import BrowserPool
+from backend.agent.runner import TestRunner
+from backend.benchmarks.fixture_site import FixtureSite
+
+async def measure(url: str, runs: int):
+    pool = BrowserPool(size=1)
+    await pool.start()
+    try:
+        for fast in (False, True):
+            load_ms, transferred, blocked, saved = [], [], [], []
+            for _ in range(runs):
+                results = await TestRunner(pool=pool, options={"fast": fast}).run_basic_tests(url)
+                load_ms.append(results["timings"]["Page Load"])
+                transferred.append(results["network"]["bytes"])
+                blocked.append(results["network"]["blocked_requests"])
+                saved.append(results["network"]["blocked_bytes_estimate"])
+            print(f"{'fast' if fast else 'full'}: page load median {statistics.median(load_ms):.0f}ms, "
+                  f"{statistics.mean(transferred) / 1024:.0f} KiB transferred, "
+                  f"{statistics.mean(blocked):.0f} requests blocked (~{statistics.mean(saved) / 1024:.0f} KiB saved)")
+    finally:
+        await pool.stop()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+    with FixtureSite() as site:
+        asyncio.run(measure(site.url + "/heavy", args.runs))
+
+if __name__ == "__main__":
+    main()
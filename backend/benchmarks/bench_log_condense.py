@@ -0,0 +1,59 @@
+"""
+Log Condensation Benchmark
+Time and prompt tokens for condensing synthetic run logs of growing size, against sending the last 50 lines
+
+    python -m backend.benchmarks.bench_log_condense --lines 10000 50000 100000
+"""
+
+import argparse
+import random
+import time
+import uuid
+from backend.agent.log_condenser import condense_logs, estimate_tokens
+
+CAUSE = "ERROR Payment service refused connection: ECONNREFUSED 10.0.3.7:5432"
+
+def synthetic_log(size: int, seed: int = 7):
+    """Mostly repetitive INFO noise with colours, timestamps and IDs, one early cause and a tail of fallout"""
+    rng = random.Random(seed)
+    lines = []
+    for number in range(size):
+        stamp = f"2026-01-02T03:{number // 3600 % 60:02d}:{number % 60:02d}.{rng.randrange(1000):03d}Z"
+        kind = rng.random()
+        if kind < 0.6:
+            lines.append(f"\x1b[32m{stamp} INFO\x1b[0m GET /api/items?page={rng.randrange(20)} 200 "
+                         f"request_id={uuid.UUID(int=rng.getrandbits(128))}")
+        elif kind < 0.9:
+            lines.append(f"{stamp} DEBUG cache {'hit' if rng.random() < 0.8 else 'miss'} for key "
+                         f"{rng.getrandbits(64):016x}")
+        else:
+            lines.append(f"\x1b[33m{stamp} WARN\x1b[0m slow render of widget #{rng.randrange(50)}")
+    cause_at = size // 20
+    lines[cause_at:cause_at + 4] = [
+        CAUSE,
+        "Traceback (most recent call last):",
+        '  File "shop/checkout.py", line 88, in pay',
+        "ConnectionRefusedError: [Errno 111] Connection refused",
+    ]
+    lines.extend(f"ERROR Checkout step {step} failed: payment unavailable" for step in range(30))
+    return lines
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--lines", type=int, nargs="+", default=[10000, 50000, 100000])
+    parser.add_argument("--budget", type=int, default=1500)
+    args = parser.parse_args()
+
+    for size in args.lines:
+        lines = synthetic_log(size)
+        started = time.perf_counter()
+        condensed = condense_logs(lines, max_tokens=args.budget)
+        elapsed = time.perf_counter() - started
+        tail = "\n".join(lines[-50:])
+        print(f"{size:>7} lines: condensed in {elapsed * 1000:.0f}ms ({elapsed / size * 1e6:.2f}us/line); "
+              f"tokens raw {estimate_tokens(chr(10).join(lines))}, last 50 lines {estimate_tokens(tail)}, "
+              f"condensed {estimate_tokens(condensed)}; cause kept: "
+              f"{'yes' if CAUSE in condensed else 'no'} vs {'yes' if CAUSE in tail else 'no'} in the last 50")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""
+Pre-flight Benchmark
+Per-job latency for unreachable and failing targets with and without the HTTP pre-flight
+
+    python -m backend.benchmarks.bench_preflight --runs 5
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from unittest.mock import patch
+from backend.config import settings
+from backend.agent.browser_pool import BrowserPool
+from backend.agent.runner import TestRunner
+from backend.benchmarks.fixture_site import FixtureSite
+
+async def measure(targets, runs: int):
+    pool = BrowserPool(size=1)
+    await pool.start()
+    try:
+        for label, url in targets:
+            for enabled in (False, True):
+                durations = []
+                with patch.object(settings, "PREFLIGHT_ENABLED", enabled):
+                    for _ in range(runs):
+                        started = time.perf_counter()
+                        await TestRunner(pool=pool).run_basic_tests(url)
+                        durations.append((time.perf_counter() - started) * 1000)
+                print(f"{label:<18} pre-flight {'on ' if enabled else 'off'}: "
+                      f"median {statistics.median(durations):.0f}ms per job")
+    finally:
+        await pool.stop()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+    with FixtureSite() as site:
+        targets = [
+            ("connection refused", "http://127.0.0.1:9/"),
+            ("unknown host", "http://does-not-exist.invalid/"),
+            ("HTTP 503", site.url + "/error"),
+        ]
+        asyncio.run(measure(targets, args.runs))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Worker Farm Benchmark
+Measures job throughput against the local fixture site for 1..N worker processes
+
+    python -m backend.benchmarks.bench_worker_farm --jobs 40 --processes 1 2 4
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+# Point every process at one throwaway database; spawned workers re-import
+# this module, so they must reuse the path chosen by the parent
+os.environ.setdefault("BENCH_DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/bench.db")
+os.environ["DATABASE_URL"] = os.environ["BENCH_DATABASE_URL"]
+
+from backend.agent.worker_farm import WorkerFarm
+from backend.benchmarks.fixture_site import FixtureSite
+from backend.database.core import SessionLocal, init_db
+from backend.database.models import Job
+
+async def run_batch(url: str, jobs: int, processes: int, concurrency: int, warmup: float) -> float:
+    async def ignore(job_id, message):
+        pass
+
+    # Let the workers launch their browser pools before the clock starts
+    farm = WorkerFarm(notify=ignore, processes=processes, concurrency=concurrency)
+    await farm.start()
+    await asyncio.sleep(warmup)
+
+    db = SessionLocal()
+    job_ids = []
+    started = time.perf_counter()
+    for _ in range(jobs):
+        job = Job(status="PENDING", logs=[], test_url=url, provider="uTest", context={})
+        db.add(job)
+        db.commit()
+        job_ids.append(job.id)
+
+    try:
+        while True:
+            db.expire_all()
+            open_jobs = db.query(Job).filter(Job.id.in_(job_ids), Job.status.in_(["PENDING", "RUNNING"])).count()
+            if open_jobs == 0:
+                break
+            await asyncio.sleep(0.1)
+        elapsed = time.perf_counter() - started
+    finally:
+        await farm.stop()
+        db.close()
+    return jobs / elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--jobs", type=int, default=40)
+    parser.add_argument("--processes", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--concurrency", type=int, default=2)
+    parser.add_argument("--warmup", type=float, default=5.0)
+    args = parser.parse_args()
+
+    init_db()
+    with FixtureSite() as site:
+        baseline = None
+        for processes in args.processes:
+            throughput = asyncio.run(run_batch(site.url + "/", args.jobs, processes, args.concurrency, args.warmup))
+            baseline = baseline or throughput / processes
+            print(f"{processes} process(es): {throughput:.2f} jobs/s "
+                  f"(scaling efficiency {throughput / (baseline * processes):.0%})")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Fixture Site
+Small local HTTP site the benchmarks point the runner at
+"""
+
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+PAGES = {
+    "/": (200, "text/html", b"<html><head><title>Fixture Home</title></head>"
+                            b"<body><h1>Fixture</h1><a href='/about'>About</a>"
+                            b"<button>Buy</button><form><input name='q'></form></body></html>"),
+    "/about": (200, "text/html", b"<html><head><title>About</title></head><body><p>About us</p></body></html>"),
+    "/error": (503, "text/html", b"<html><head><title>Unavailable</title></head><body>Down</body></html>"),
+    "/heavy": (200, "text/html", b"<html><head><title>Heavy</title>"
+                                 b"<style>@font-face{font-family:F;src:url(/asset/font.woff2)}body{font-family:F}</style>"
+                                 b"</head><body><h1>Gallery</h1>"
+                                 + b"".join(b"<img src='/asset/photo%d.jpg'>" % i for i in range(20))
+                                 + b"<video src='/asset/clip.mp4' autoplay muted></video></body></html>"),
+}
+
+# Every /asset/* request gets a large opaque payload after a short delay
+ASSET_BYTES = 256 * 1024
+ASSET_DELAY_SECONDS = 0.05
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        if self.path.startswith("/asset/"):
+            time.sleep(ASSET_DELAY_SECONDS)
+            self.send_response(200)
+            self.send_header("Content-Type", "application/octet-stream")
+            self.send_header("Content-Length", str(ASSET_BYTES))
+            self.end_headers()
+            self.wfile.write(b"\0" * ASSET_BYTES)
+            return
+        status, content_type, body = PAGES.get(self.path.split("?")[0], (404, "text/plain", b"Not found"))
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+class FixtureSite:
+    """Serves PAGES on a free localhost port from a background thread"""
+
+    def __init__(self, handler=FixtureHandler):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
@@ -0,0 +1,99 @@
+"""
+Mock LLM Server
+Local OpenAI-compatible chat completions endpoint with artificial latency for the analysis benchmarks
+"""
+
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable
+
+def default_latency(prompt: str) -> float:
+    return 0.5
+
+class MockLLMHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        mock = self.server.mock
+        request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        prompt = request["messages"][-1]["content"]
+        mock.started(self.client_address)
+        try:
+            time.sleep(mock.latency(prompt))
+        finally:
+            mock.finished()
+        failures = re.findall(r"Test Failure(?: (\d+))?: (.+)", prompt)
+        reports = [{"index": int(index or 1), "summary": f"{test_name.strip()} is broken",
+                    "insights": "Reproduced by the mock LLM"} for index, test_name in failures]
+        # Batched prompts number their failures and get a JSON array back
+        content = json.dumps({"reports": reports} if failures and failures[0][0] else
+                             (reports[0] if reports else {"summary": "Unknown Test is broken"}))
+        prompt_tokens = sum(len(message["content"]) for message in request["messages"]) // 4
+        mock.count_tokens(prompt_tokens, len(content) // 4)
+        body = json.dumps({
+            "id": f"chatcmpl-{mock.requests}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "mock"),
+            "choices": [{"index": 0, "finish_reason": "stop",
+                         "message": {"role": "assistant", "content": content}}],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": len(content) // 4,
+                      "total_tokens": prompt_tokens + len(content) // 4},
+        }).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+class MockLLM:
+    """Answers POST {url}/chat/completions after latency(prompt) seconds, counting requests, connections and peak concurrency"""
+
+    def __init__(self, latency: Callable[[str], float] = default_latency, handler=MockLLMHandler):
+        self.latency = latency
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        self.server.mock = self
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.connections = set()
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def started(self, client_address):
+        with self._lock:
+            # Keep-alive requests arrive on the connection, and so from the address, they came on before
+            self.connections.add(client_address)
+            self.requests += 1
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+
+    def count_tokens(self, prompt_tokens: int, completion_tokens: int):
+        with self._lock:
+            self.prompt_tokens += prompt_tokens
+            self.completion_tokens += completion_tokens
+
+    def finished(self):
+        with self._lock:
+            self.in_flight -= 1
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
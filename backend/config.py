@@ -14,6 +14,21 @@ class Settings(BaseSettings):
     # OpenAI
     OPENAI_API_KEY: str = ""
     OPENAI_MODEL: str = "gpt-3.5-turbo-0125"
+    OPENAI_BASE_URL: str = ""  # OpenAI-compatible endpoint; empty uses the OpenAI API
+    ANALYSIS_CONCURRENCY: int = 8  # AI calls in flight at once across all jobs
+    ANALYSIS_TIMEOUT_SECONDS: float = 60
+    LLM_CONNECT_TIMEOUT_SECONDS: float = 5
+    LLM_MAX_CONNECTIONS: int = 20  # Keep-alive pool of the process-wide client
+    LLM_KEEPALIVE_SECONDS: float = 30
+    LLM_MAX_RETRIES: int = 2
+    ANALYSIS_BATCH: bool = False  # Opt-in: fewer tokens, but slower and later reports than concurrent calls
+    ANALYSIS_BATCH_WINDOW_SECONDS: float = 2.0  # Quiet time after a failure before its batch is analyzed
+    LOG_CONDENSE_MAX_TOKENS: int = 1500  # Budget for the run log in an analysis prompt
+
+    # LLM response cache
+    LLM_CACHE_ENABLED: bool = True
+    LLM_CACHE_TTL_SECONDS: int = 7 * 24 * 3600
+    LLM_CACHE_MEMORY_ENTRIES: int = 1000  # In-memory LRU in front of the llm_responses table
     
     # Authentication
     JWT_SECRET: str = "your-super-secret-jwt-key-change-in-production-minimum-32-characters-required"
@@ -24,7 +39,105 @@ class Settings(BaseSettings):
     
     # Testing
     TEST_TIMEOUT_SECONDS: int = 300
+    NAVIGATION_TIMEOUT_SECONDS: int = 10
+    CHECK_TIMEOUT_SECONDS: int = 30
+    CONSOLE_CHECK_ENABLED: bool = True
+    INTERACTIVE_CHECK_ENABLED: bool = True
+
+    # Performance metrics (budgets of 0 are disabled); off by default since budgets fail pages that passed before
+    PERF_METRICS_ENABLED: bool = False
+    PERF_BUDGET_LCP_MS: float = 4000
+    PERF_BUDGET_CLS: float = 0.25
+    PERF_BUDGET_TBT_MS: float = 600
+    PERF_REGRESSION_PERCENT: float = 25.0  # Worse than the URL's baseline by more than this is a regression
+    PERF_BASELINE_RUNS: int = 5  # Baseline is the median of this many recent runs
+    PERF_BASELINE_MIN_RUNS: int = 3
+
+    # HAR network capture and budgets (budgets of 0 are disabled)
+    HAR_CAPTURE: bool = False  # Capture every run, not only those that ask for it
+    NETWORK_BUDGET_BYTES: int = 5 * 1024 * 1024
+    NETWORK_BUDGET_REQUESTS: int = 150
+    NETWORK_BUDGET_THIRD_PARTY_SHARE: float = 0.5  # Fraction of transferred bytes
+    NETWORK_BUDGET_SLOWEST_MS: float = 5000
+
+    # Run progress streaming
+    RUN_EVENT_QUEUE_SIZE: int = 1000
+    LOG_FLUSH_INTERVAL_SECONDS: float = 0.25
+    LOG_FLUSH_MAX_LINES: int = 200
+
+    # Flaky check detection: failed checks are re-run this many times in parallel (0, the default, disables it)
+    FLAKY_RERUNS: int = 0
+    
+    # Pytest suite mode
+    SUITE_PATH: str = "backend/automation_tests"
+    SUITE_DEFAULT_SHARDS: int = 2
+    SUITE_MAX_SHARDS: int = 8
+
+    # Failure artifacts (relative paths are resolved from the repository root)
+    ARTIFACTS_DIR: str = "artifacts"
+    ARTIFACT_WORKERS: int = 2
+    ARTIFACT_CAPTURE_TIMEOUT_SECONDS: float = 5.0
+    ARTIFACT_SCREENSHOT_QUALITY: int = 80
+    ARTIFACTS_RECORD_VIDEO: bool = False
+    ARTIFACTS_RECORD_TRACE: bool = False
+    ARTIFACT_QUOTA_BYTES: int = 1024 * 1024 * 1024
+    ARTIFACT_MAX_AGE_DAYS: int = 30
+    ARTIFACT_ORPHAN_GRACE_SECONDS: int = 3600  # Keep unreferenced artifacts this long for analysis to link them
+    ARTIFACT_GC_INTERVAL_SECONDS: int = 300
+
+    # Targets behind a login: named profiles and their saved, encrypted storage state
+    # (relative paths are resolved from the repository root)
+    AUTH_PROFILES_FILE: str = "auth_profiles.json"
+    AUTH_STATE_DIR: str = "auth_state"
+    AUTH_STATE_KEY: str = ""  # Fernet key; when empty a random one is generated in AUTH_STATE_DIR/state.key
+    AUTH_STATE_TTL_SECONDS: int = 3600
+    AUTH_LOGIN_TIMEOUT_SECONDS: int = 30
+
+    # Browser pool
+    BROWSER_POOL_SIZE: int = 2
+    BROWSER_CONTEXTS_PER_BROWSER: int = 4
+    BROWSER_MAX_USES: int = 50
+    BROWSER_HEALTH_CHECK_SECONDS: int = 30
+    BROWSER_CLOSE_TIMEOUT_SECONDS: int = 5
+    
+    # HTTP pre-flight before launching a browser (opt-in: it fails unreachable pages without the browser's try)
+    PREFLIGHT_ENABLED: bool = False
+    PREFLIGHT_TIMEOUT_SECONDS: float = 5.0
+    PREFLIGHT_MAX_REDIRECTS: int = 10
+    PREFLIGHT_MAX_CONNECTIONS: int = 50
+    
+    # Result cache for unchanged targets
+    RESULT_CACHE_ENABLED: bool = True
+    RESULT_CACHE_TTL_SECONDS: int = 900
+    RESULT_CACHE_PROBE_TIMEOUT_SECONDS: float = 2.0  # HEAD probe on the request path; slower pages just run
+    
+    # Fast navigation mode
+    FAST_MODE_BLOCKED_RESOURCE_TYPES: str = "image,font,media"
+    FAST_MODE_BLOCKED_DOMAINS: str = "google-analytics.com,googletagmanager.com,doubleclick.net,connect.facebook.net,hotjar.com,segment.io"
+    
+    # Scheduling of jobs run inside the API process (priorities and per-user fair share)
+    SCHEDULER_MAX_CONCURRENT_RUNS: int = 4
+    SCHEDULER_MAX_QUEUED: int = 100  # Requests beyond this get 429 with Retry-After, in every execution mode
+    SCHEDULER_MAX_QUEUED_PER_USER: int = 25
+    SCHEDULER_USER_WEIGHTS: str = ""  # e.g. "ci=3,alice=2"; unlisted users weigh 1
+    SCHEDULER_DEFAULT_RUN_SECONDS: int = 30  # Run time assumed for Retry-After until runs have been timed
     
+    # Worker processes (0 runs jobs inside the API process)
+    WORKER_PROCESSES: int = 0
+    WORKER_CONCURRENCY: int = 2
+    WORKER_POLL_SECONDS: float = 1.0
+    WORKER_SHUTDOWN_SECONDS: int = 30
+    JOB_LEASE_SECONDS: int = 60
+    JOB_MAX_ATTEMPTS: int = 3
+
+    # Remote worker nodes (python -m backend.worker) leasing jobs over HTTP
+    REMOTE_WORKERS_ENABLED: bool = False  # Queued jobs wait for a remote worker instead of running in the API
+    REMOTE_WORKER_TOKEN: str = ""  # Shared secret workers send as a bearer token; required for remote workers
+    REMOTE_WORKER_LONG_POLL_SECONDS: float = 20.0
+    REMOTE_WORKER_HEARTBEAT_SECONDS: float = 10.0
+    REMOTE_WORKER_STALE_SECONDS: float = 60.0
+    REMOTE_WORKER_API_URL: str = "http://localhost:8000"
+
     # API
     API_HOST: str = "0.0.0.0"
     API_PORT: int = 8000
@@ -38,6 +151,32 @@ class Settings(BaseSettings):
     def cors_origins_list(self) -> List[str]:
         """Convert CORS_ORIGINS string to list"""
         return [origin.strip() for origin in self.CORS_ORIGINS.split(",")]
+    
+    @staticmethod
+    def _from_repository_root(path: str) -> str:
+        if os.path.isabs(path):
+            return path
+        return os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), path)
+    
+    @property
+    def artifacts_path(self) -> str:
+        return self._from_repository_root(self.ARTIFACTS_DIR)
+    
+    @property
+    def auth_profiles_path(self) -> str:
+        return self._from_repository_root(self.AUTH_PROFILES_FILE)
+    
+    @property
+    def auth_state_path(self) -> str:
+        return self._from_repository_root(self.AUTH_STATE_DIR)
+    
+    @property
+    def fast_mode_blocked_types(self) -> List[str]:
+        return [t.strip() for t in self.FAST_MODE_BLOCKED_RESOURCE_TYPES.split(",") if t.strip()]
+    
+    @property
+    def fast_mode_blocked_domains(self) -> List[str]:
+        return [d.strip().lower() for d in self.FAST_MODE_BLOCKED_DOMAINS.split(",") if d.strip()]
 
 # Global settings instance
 settings = Settings()
\ No newline at end of file
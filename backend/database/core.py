@@ -1,9 +1,22 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, inspect, text
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker
 from backend.database.models import Base
 from backend.config import settings
 
-engine = create_engine(settings.DATABASE_URL, connect_args={"check_same_thread": False})
+IS_SQLITE = make_url(settings.DATABASE_URL).get_backend_name() == "sqlite"
+
+engine = create_engine(settings.DATABASE_URL,
+                       connect_args={"check_same_thread": False, "timeout": 30} if IS_SQLITE else {})
+
+def _enable_wal(dbapi_connection, connection_record):
+    # Worker processes write to the same SQLite file as the API process
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.close()
+
+if IS_SQLITE:
+    event.listen(engine, "connect", _enable_wal)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 def get_db():
@@ -13,8 +26,44 @@ def get_db():
     finally:
         db.close()
 
+def _column_default(column) -> str:
+    """DEFAULT clause giving existing rows the model's scalar default, e.g. attempts = 0"""
+    default = column.default
+    if default is None or not default.is_scalar or isinstance(default.arg, (bool, dict, list)):
+        return ""
+    if isinstance(default.arg, (int, float)):
+        return f" DEFAULT {default.arg}"
+    if isinstance(default.arg, str):
+        return " DEFAULT '{}'".format(default.arg.replace("'", "''"))
+    return ""
+
+def add_missing_columns(engine):
+    """
+    create_all() creates missing tables but never alters existing ones, so add
+    the columns (and their indexes) that models gained since a database was
+    created. Safe to run on every start.
+    """
+    inspector = inspect(engine)
+    with engine.begin() as connection:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            added = set()
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                column_type = column.type.compile(dialect=engine.dialect)
+                connection.execute(text(
+                    f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}{_column_default(column)}"))
+                added.add(column.name)
+            for index in table.indexes:
+                if any(column.name in added for column in index.columns):
+                    index.create(connection, checkfirst=True)
+
 def create_db_and_tables(engine):
     Base.metadata.create_all(bind=engine)
+    add_missing_columns(engine)
 
 def init_db():
-    create_db_and_tables(engine)
\ No newline at end of file
+    create_db_and_tables(engine)
@@ -1,6 +1,7 @@
-from sqlalchemy import Column, String, DateTime, Text, ForeignKey, JSON
+from sqlalchemy import Column, String, DateTime, Text, ForeignKey, JSON, Integer, Float, Index
 from sqlalchemy.orm import declarative_base, relationship
 from datetime import datetime
+from typing import List
 import uuid
 
 Base = declarative_base()
@@ -10,11 +11,46 @@ class Job(Base):
     
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     status = Column(String, default="PENDING")
-    logs = Column(JSON, default=[])
+    logs = Column(JSON, default=[])  # Lines recorded with the job itself; run output goes to job_logs
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    # Run request, kept so queued jobs can be picked up by worker processes
+    test_url = Column(String, nullable=True)
+    provider = Column(String, nullable=True)
+    context = Column(JSON, default={})
+    options = Column(JSON, default={})
+    
+    # Queue lease held by the worker running the job
+    worker_id = Column(String, nullable=True, index=True)
+    lease_expires_at = Column(DateTime, nullable=True)
+    attempts = Column(Integer, default=0)
+    
+    # Scheduling: higher priorities run first, users share the rest fairly
+    priority = Column(Integer, default=0)
+    requested_by = Column(String, nullable=True, index=True)
+    
+    # Result cache: same request and unchanged page within the TTL reuse this job
+    cache_key = Column(String, nullable=True, index=True)
+    fingerprint = Column(String, nullable=True)
+    
+    # HAR recorded for the run, kept for passing runs too; counts as an artifact reference
+    har_path = Column(String, nullable=True)
+    
     bugs = relationship("Bug", back_populates="job")
+    log_entries = relationship("JobLog", order_by="JobLog.id")
+    
+    @property
+    def log_lines(self) -> List[str]:
+        return list(self.logs or []) + [entry.line for entry in self.log_entries]
+
+class JobLog(Base):
+    __tablename__ = "job_logs"
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    job_id = Column(String, ForeignKey("jobs.id"), index=True)
+    line = Column(Text)
+    created_at = Column(DateTime, default=datetime.utcnow)
 
 class Bug(Base):
     __tablename__ = "bugs"
@@ -34,3 +70,60 @@ class Bug(Base):
     environment = Column(Text, nullable=True)
     
     job = relationship("Job", back_populates="bugs")
+
+class Artifact(Base):
+    __tablename__ = "artifacts"
+    
+    # Content-addressed: one row and one file per distinct payload
+    hash = Column(String, primary_key=True)
+    path = Column(String, unique=True)  # URL under the /artifacts mount
+    size = Column(Integer)
+    refcount = Column(Integer, default=0)  # Bug rows and jobs linking to this artifact
+    writes = Column(Integer, default=1)  # Times this content was stored, for the dedup ratio
+    created_at = Column(DateTime, default=datetime.utcnow)
+    last_accessed_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+class PerfMetric(Base):
+    __tablename__ = "perf_metrics"
+    __table_args__ = (Index("ix_perf_metrics_url_created_at", "url", "created_at"),)
+    
+    # One row per run that measured the page; milliseconds from navigation start
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    job_id = Column(String, ForeignKey("jobs.id"), index=True)
+    url = Column(String)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    ttfb_ms = Column(Float, nullable=True)
+    fcp_ms = Column(Float, nullable=True)
+    dom_content_loaded_ms = Column(Float, nullable=True)
+    load_ms = Column(Float, nullable=True)
+    lcp_ms = Column(Float, nullable=True)
+    cls = Column(Float, nullable=True)
+    tbt_ms = Column(Float, nullable=True)
+    long_tasks = Column(Integer, nullable=True)
+    transfer_bytes = Column(Integer, nullable=True)
+
+class CheckStat(Base):
+    __tablename__ = "check_stats"
+    __table_args__ = (Index("ix_check_stats_url_test", "url", "test_name", unique=True),)
+    
+    # Outcomes of one check on one URL across runs
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    url = Column(String)
+    test_name = Column(String)
+    runs = Column(Integer, default=0)
+    failures = Column(Integer, default=0)  # Failed every rerun
+    flaky = Column(Integer, default=0)  # Failed, then passed a rerun
+    last_flaky_at = Column(DateTime, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class LLMResponse(Base):
+    __tablename__ = "llm_responses"
+    
+    # One cached chat completion per model and normalized prompt
+    key = Column(String, primary_key=True)
+    model = Column(String, index=True)
+    content = Column(Text)
+    prompt_tokens = Column(Integer, default=0)
+    completion_tokens = Column(Integer, default=0)
+    latency_ms = Column(Float, default=0.0)  # What the original call took, counted as saved on each hit
+    created_at = Column(DateTime, default=datetime.utcnow)
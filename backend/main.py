@@ -1,13 +1,30 @@
-from fastapi import FastAPI, BackgroundTasks, HTTPException, WebSocket, WebSocketDisconnect, Depends
+from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect, Depends, Header, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from backend.agent.runner import run_automation_tests
-from backend.agent.analyzer import analyze_test_run
+from backend.agent.browser_pool import browser_pool
+from backend.agent.preflight import preflight_client
+from backend.agent.artifact_store import artifact_store, bug_artifact_urls
+from backend.agent.auth_state import UnknownProfile, auth_state_cache
+from backend.agent.executor import TERMINAL_STATUSES, cancel_job, execute_job
+from backend.agent.flaky import flakiness
+from backend.agent.job_log import append_logs
+from backend.agent.job_queue import pending_count, queue_position
+from backend.agent.llm_cache import llm_cache
+from backend.agent.llm_client import llm_client
+from backend.agent.performance import trends as performance_trends
+from backend.agent.result_cache import cache_key, result_cache
+from backend.agent.scheduler import QueueFull, Reservation, job_scheduler
+from backend.agent.worker_farm import WorkerFarm
+from backend.agent.worker_hub import LeaseLost, UnknownWorker, WorkerHub
 from backend.database.core import init_db, get_db, SessionLocal
 from backend.database.models import Job, Bug
-from backend.schemas import BugSchema, TestRunRequest, JobSchema
+from backend.schemas import (
+    BugSchema, CheckFlakinessSchema, PerformanceTrendSchema, TestRunRequest, JobSchema, LeasedJobSchema, WorkerEventsRequest,
+    WorkerHeartbeatRequest, WorkerLeaseRequest, WorkerRegisterRequest, WorkerRegistration, WorkerResultRequest,
+)
 from backend.config import settings
 from backend.websocket import manager
+from jose import JWTError, jwt
 from pydantic import BaseModel, ConfigDict, ValidationError
 from typing import List, Optional, Dict, Any
 import uuid
@@ -15,11 +32,39 @@ import os
 from sqlalchemy.orm import Session
 from contextlib import asynccontextmanager
 import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+worker_farm = WorkerFarm(notify=manager.send_job_update)
+worker_hub = WorkerHub(notify=manager.send_job_update)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     init_db()
+    await artifact_store.start()
+    # One pooled LLM client for every analysis in this process
+    await llm_client.start()
+    if settings.REMOTE_WORKERS_ENABLED:
+        # Browsers live on the remote worker nodes
+        await worker_hub.start()
+    elif settings.WORKER_PROCESSES > 0:
+        # Browsers live in the worker processes, each with its own pool
+        await worker_farm.start()
+    else:
+        try:
+            await browser_pool.start()
+        except Exception as e:
+            # Jobs fall back to launching a private browser for their run
+            logger.error(f"Failed to pre-launch browser pool: {e}")
     yield
+    await worker_hub.stop()
+    await worker_farm.stop()
+    await browser_pool.stop()
+    await preflight_client.close()
+    await llm_client.close()
+    await artifact_store.stop()
+    artifact_store.shutdown()
 
 app = FastAPI(title="AI QA Agent Platform API", lifespan=lifespan)
 
@@ -33,7 +78,7 @@ app.add_middleware(
 )
 
 # Mount artifacts directory for static file serving
-ARTIFACTS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "artifacts")
+ARTIFACTS_DIR = settings.artifacts_path
 os.makedirs(ARTIFACTS_DIR, exist_ok=True)
 app.mount("/artifacts", StaticFiles(directory=ARTIFACTS_DIR), name="artifacts")
 
@@ -46,9 +91,40 @@ class JobStatusResponse(JobSchema):
 def health_check():
     return {"status": "ok", "version": "1.0.0"}
 
+@app.get("/metrics")
+def get_metrics():
+    return {
+        "browser_pool": browser_pool.stats(),
+        "worker_farm": worker_farm.stats(),
+        "remote_workers": worker_hub.stats(),
+        "artifacts": artifact_store.stats(),
+        "result_cache": result_cache.stats(),
+        "scheduler": job_scheduler.stats(),
+        "auth_state": auth_state_cache.stats(),
+        "llm_cache": llm_cache.stats(),
+        "llm_client": llm_client.stats(),
+    }
+
+@app.get("/metrics/performance", response_model=List[PerformanceTrendSchema])
+def get_performance_metrics(url: Optional[str] = None, limit: int = Query(20, ge=1, le=500),
+                            db: Session = Depends(get_db)):
+    """Page performance history per tested URL, optionally for a single URL"""
+    return performance_trends(db, url=url, limit=limit)
+
+@app.get("/metrics/flaky", response_model=List[CheckFlakinessSchema])
+def get_flaky_checks(url: Optional[str] = None, db: Session = Depends(get_db)):
+    """Checks that failed and then passed a rerun, with their flakiness rate per URL"""
+    return flakiness(db, url=url)
+
+@app.delete("/llm-cache")
+def invalidate_llm_cache(model: Optional[str] = None):
+    """Drop cached AI responses, e.g. after the prompts changed; only one model's when given"""
+    return {"removed": llm_cache.invalidate(model)}
+
 @app.websocket("/ws/{job_id}")
 async def websocket_endpoint(websocket: WebSocket, job_id: str):
     await manager.connect(websocket, job_id)
+    await send_log_snapshot(websocket, job_id)
     try:
         # Keep connection alive - no need to process incoming messages
         while True:
@@ -59,102 +135,225 @@ async def websocket_endpoint(websocket: WebSocket, job_id: str):
         print(f"WebSocket error for job {job_id}: {e}")
         manager.disconnect(websocket, job_id)
 
-async def execute_tests_task(job_id: str, test_url: str, provider: str, context: Dict[str, str]):
+async def send_log_snapshot(websocket: WebSocket, job_id: str):
+    """Catch a new subscriber up; lines flushed after this arrive as entries with higher ids"""
     db = SessionLocal()
     try:
-        # Fetch the job and set status to RUNNING
-        job = db.query(Job).filter(Job.id == job_id).first()
-        if not job:
-            return
-        
-        job.status = "RUNNING"
-        job.logs.append("Starting Playwright tests...")
-        db.commit()
-        
-        # Send WebSocket update
-        await manager.send_job_update(job_id, {
-            "status": "RUNNING",
-            "logs": job.logs,
-            "message": "Tests are running..."
-        })
-
-        # Run the tests
-        result = run_automation_tests(test_url)
-        
-        # Update job with results
-        job.status = result.get("status", "ERROR")
-        job.logs.extend(result.get("logs", []))
-        
-        # Analyze failures
-        bugs = []
-        if job.status == "FAILED":
-            bugs = analyze_test_run(job_id, result, context, provider, db)
-            job.logs.append(f"Found {len(bugs)} potential bugs.")
-        
-        db.commit()
-        
-        # Send final WebSocket update
-        await manager.send_job_update(job_id, {
-            "status": job.status,
-            "logs": job.logs,
-            "bugs": bugs,
-            "message": f"Tests completed with status: {job.status}"
-        })
-             
-    except Exception as e:
-        # Ensure job status is updated on unexpected error
         job = db.query(Job).filter(Job.id == job_id).first()
         if job:
-            job.status = "ERROR"
-            error_msg = f"An unexpected error occurred: {str(e)}"
-            job.logs.append(error_msg)
-            db.commit()
-            
-            # Send error WebSocket update
-            await manager.send_job_update(job_id, {
-                "status": "ERROR",
-                "logs": job.logs,
-                "message": error_msg
+            await websocket.send_json({
+                "status": job.status,
+                "logs": job.log_lines,
+                "log_id": job.log_entries[-1].id if job.log_entries else 0
             })
     finally:
         db.close()
 
+async def execute_tests_task(job_id: str, test_url: str, provider: str, context: Dict[str, str],
+                             options: Optional[Dict[str, Any]] = None):
+    await execute_job(job_id, test_url, provider, context, manager.send_job_update, options=options)
+
+def requester(request: Request) -> str:
+    """Fair-share identity: the user of a valid bearer token, otherwise the client's address"""
+    authorization = request.headers.get("authorization", "")
+    if authorization.startswith("Bearer "):
+        try:
+            subject = jwt.decode(authorization[7:], settings.JWT_SECRET, algorithms=["HS256"]).get("sub")
+            if subject:
+                return subject
+        except JWTError:
+            pass
+    return request.client.host if request.client else "anonymous"
+
+def queued_elsewhere() -> bool:
+    """Whether jobs wait in the jobs table for worker processes or nodes rather than in this process"""
+    return settings.REMOTE_WORKERS_ENABLED or worker_farm.running
+
+def admit(db: Session, user: str) -> Optional[Reservation]:
+    """
+    Raise QueueFull when the queue has no room for another of the user's jobs.
+    For this process's queue the place is reserved until the job is submitted
+    with the returned reservation or it is released.
+    """
+    if not queued_elsewhere():
+        return job_scheduler.reserve(user)
+    waiting = pending_count(db)
+    if waiting >= settings.SCHEDULER_MAX_QUEUED:
+        raise job_scheduler.reject(f"Job queue is full ({waiting} waiting)", waiting)
+    return None
+
+def position_of(db: Session, job: Job) -> Optional[int]:
+    if job.status == "RUNNING":
+        return 0
+    if job.status != "PENDING":
+        return None
+    if queued_elsewhere():
+        return queue_position(db, job)
+    return job_scheduler.position(job.id)
+
 @app.post("/run-tests", response_model=JobSchema)
-async def trigger_tests(background_tasks: BackgroundTasks, request: TestRunRequest, db: Session = Depends(get_db)):
+async def trigger_tests(request: TestRunRequest, http_request: Request, db: Session = Depends(get_db)):
+    reservation = None
     try:
         # Create a new job record in the database
-        new_job = Job(status="PENDING", logs=["Job accepted."])
-        db.add(new_job)
-        db.commit()
-        db.refresh(new_job)
-        
         context = {
             "overview": request.cycle_overview or "",
             "instructions": request.testing_instructions or ""
         }
+        options = {"fast": request.fast, "mode": request.mode, "shards": request.shards,
+                   "video": request.video, "trace": request.trace, "har": request.har}
+        if request.auth_profile:
+            auth_state_cache.profile(request.auth_profile)
+            options["auth_profile"] = request.auth_profile
+        
+        # Refused requests cost nothing: admission comes before the fingerprint request
+        user = requester(http_request)
+        reservation = admit(db, user)
         
-        # Add async task to background tasks
-        background_tasks.add_task(
-            execute_tests_task, 
-            new_job.id, 
-            request.test_url, 
-            request.provider, 
-            context
+        # An unchanged page tested the same way recently needs no new browser run or analysis.
+        # Logged-in pages cannot be fingerprinted without the login, so they always run.
+        key = cache_key(request.test_url, request.provider, context, options)
+        cached, fingerprint = await result_cache.lookup(db, key, request.test_url,
+                                                        bypass=request.no_cache or bool(request.auth_profile))
+        if cached is not None:
+            return JobSchema.model_validate(cached).model_copy(update={"cached": True})
+        new_job = Job(
+            status="PENDING",
+            logs=["Job accepted."],
+            test_url=request.test_url,
+            provider=request.provider,
+            context=context,
+            options=options,
+            cache_key=key,
+            fingerprint=fingerprint,
+            priority=request.priority,
+            requested_by=user
         )
+        db.add(new_job)
+        db.commit()
+        db.refresh(new_job)
         
-        return new_job
+        # Worker processes pick PENDING jobs up from the table themselves
+        if settings.REMOTE_WORKERS_ENABLED:
+            worker_hub.dispatch()
+        elif not worker_farm.running:
+            job_id = new_job.id
+            job_scheduler.submit(
+                job_id,
+                user,
+                request.priority,
+                lambda: execute_tests_task(job_id, request.test_url, request.provider, context, options),
+                reservation=reservation
+            )
+        
+        response = JobSchema.model_validate(new_job)
+        response.queue_position = position_of(db, new_job)
+        return response
+    except UnknownProfile as e:
+        raise HTTPException(status_code=422, detail=f"Unknown credential profile: {e.args[0]}")
+    except QueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
     except ValidationError as e:
         raise HTTPException(status_code=422, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail="Internal server error")
+    finally:
+        # Cache hits and failed requests give their place back
+        if reservation is not None:
+            job_scheduler.release(reservation)
 
 @app.get("/jobs/{job_id}", response_model=JobStatusResponse)
 def get_job_status(job_id: str, db: Session = Depends(get_db)):
     job = db.query(Job).filter(Job.id == job_id).first()
     if not job:
         raise HTTPException(status_code=404, detail="Job not found")
+    # Evidence that is being looked at should be the last to be evicted
+    artifact_store.touch(db, [job.har_path] + [url for bug in job.bugs for url in bug_artifact_urls(bug)])
+    response = JobStatusResponse.model_validate(job)
+    response.queue_position = position_of(db, job)
+    return response
+
+@app.post("/jobs/{job_id}/cancel", response_model=JobSchema)
+async def cancel_job_run(job_id: str, db: Session = Depends(get_db)):
+    job = db.query(Job).filter(Job.id == job_id).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job.status in TERMINAL_STATUSES:
+        raise HTTPException(status_code=409, detail=f"Job already finished with status {job.status}")
+    
+    # Recording the status first also stops queued jobs and runs in worker
+    # processes, which drop a job once it is no longer RUNNING under their lease
+    job.status = "CANCELLED"
+    entries = append_logs(db, job_id, ["Job cancelled by request."])
+    db.flush()
+    payload = [{"id": entry.id, "line": entry.line} for entry in entries]
+    db.commit()
+    job_scheduler.remove(job_id)
+    cancel_job(job_id)
+    
+    await manager.send_job_update(job_id, {
+        "status": "CANCELLED",
+        "entries": payload,
+        "message": "Job cancelled"
+    })
     return job
 
 @app.get("/bugs", response_model=List[BugSchema])
 def list_bugs(db: Session = Depends(get_db)):
     return db.query(Bug).order_by(Bug.created_at.desc()).all()
+
+def require_worker_token(authorization: Optional[str] = Header(None)):
+    if not settings.REMOTE_WORKER_TOKEN:
+        raise HTTPException(status_code=503, detail="Remote workers are not configured")
+    if authorization != f"Bearer {settings.REMOTE_WORKER_TOKEN}":
+        raise HTTPException(status_code=401, detail="Invalid worker token")
+
+@app.post("/workers/register", response_model=WorkerRegistration, dependencies=[Depends(require_worker_token)])
+def register_worker(request: WorkerRegisterRequest):
+    worker = worker_hub.register(request.name, request.capacity)
+    return WorkerRegistration(
+        worker_id=worker.id,
+        long_poll_seconds=settings.REMOTE_WORKER_LONG_POLL_SECONDS,
+        heartbeat_seconds=settings.REMOTE_WORKER_HEARTBEAT_SECONDS,
+    )
+
+@app.post("/workers/{worker_id}/lease", response_model=List[LeasedJobSchema],
+          dependencies=[Depends(require_worker_token)])
+async def lease_jobs(worker_id: str, request: WorkerLeaseRequest):
+    """Long-poll for up to free_slots jobs; an empty list means none was queued in time"""
+    wait = request.wait_seconds
+    if wait is None or wait > settings.REMOTE_WORKER_LONG_POLL_SECONDS:
+        wait = settings.REMOTE_WORKER_LONG_POLL_SECONDS
+    try:
+        return await worker_hub.lease(worker_id, request.free_slots, wait)
+    except UnknownWorker:
+        raise HTTPException(status_code=404, detail="Worker not registered")
+
+@app.post("/workers/{worker_id}/heartbeat", dependencies=[Depends(require_worker_token)])
+def worker_heartbeat(worker_id: str, request: WorkerHeartbeatRequest):
+    """Renew the leases on the node's jobs; "cancel" lists the ones it must stop"""
+    try:
+        return {"cancel": worker_hub.heartbeat(worker_id, request.jobs, request.free_slots)}
+    except UnknownWorker:
+        raise HTTPException(status_code=404, detail="Worker not registered")
+
+@app.post("/workers/{worker_id}/jobs/{job_id}/events", dependencies=[Depends(require_worker_token)])
+async def report_job_events(worker_id: str, job_id: str, request: WorkerEventsRequest):
+    try:
+        await worker_hub.report_events(worker_id, job_id, request.events)
+    except UnknownWorker:
+        raise HTTPException(status_code=404, detail="Worker not registered")
+    except LeaseLost:
+        raise HTTPException(status_code=409, detail="Job is no longer leased to this worker")
+    return {"accepted": len(request.events)}
+
+@app.post("/workers/{worker_id}/jobs/{job_id}/result", dependencies=[Depends(require_worker_token)])
+async def report_job_result(worker_id: str, job_id: str, request: WorkerResultRequest):
+    try:
+        await worker_hub.report_result(worker_id, job_id, result=request.result,
+                                       cancelled=request.cancelled, error=request.error)
+    except UnknownWorker:
+        raise HTTPException(status_code=404, detail="Worker not registered")
+    except LeaseLost:
+        raise HTTPException(status_code=409, detail="Job is no longer leased to this worker")
+    return {"status": "ok"}
@@ -1,6 +1,6 @@
-from pydantic import BaseModel, ConfigDict, field_validator
+from pydantic import AliasChoices, BaseModel, ConfigDict, Field, field_validator
 from datetime import datetime
-from typing import Optional, List, Any
+from typing import Optional, List, Any, Dict, Literal
 import re
 
 class BugSchema(BaseModel):
@@ -23,17 +23,60 @@ class BugSchema(BaseModel):
 class JobSchema(BaseModel):
     id: str
     status: str
-    logs: List[Any]
+    logs: List[Any] = Field(validation_alias=AliasChoices("log_lines", "logs"))
     created_at: datetime
     updated_at: datetime
+    har_path: Optional[str] = None
+    cached: bool = False  # Result of an earlier run of the same request on the unchanged page
+    queue_position: Optional[int] = None  # 1-based place while PENDING, 0 once running
     
     model_config = ConfigDict(from_attributes=True)
 
+class PerfMetricSchema(BaseModel):
+    job_id: str
+    created_at: datetime
+    ttfb_ms: Optional[float] = None
+    fcp_ms: Optional[float] = None
+    dom_content_loaded_ms: Optional[float] = None
+    load_ms: Optional[float] = None
+    lcp_ms: Optional[float] = None
+    cls: Optional[float] = None
+    tbt_ms: Optional[float] = None
+    long_tasks: Optional[int] = None
+    transfer_bytes: Optional[int] = None
+    
+    model_config = ConfigDict(from_attributes=True)
+
+class PerformanceTrendSchema(BaseModel):
+    url: str
+    runs: int
+    latest: PerfMetricSchema
+    baseline: Dict[str, float]  # Median of recent runs, per metric
+    history: List[PerfMetricSchema]  # Oldest first
+
+class CheckFlakinessSchema(BaseModel):
+    url: str
+    test: str
+    runs: int
+    failures: int  # Failed every rerun
+    flaky: int  # Failed, then passed a rerun
+    flaky_rate: float
+    last_flaky_at: Optional[datetime] = None
+
 class TestRunRequest(BaseModel):
     test_url: str
     cycle_overview: Optional[str] = ""
     testing_instructions: Optional[str] = ""
     provider: Optional[str] = "uTest"
+    fast: bool = False  # Skip images, fonts, media and blocklisted third parties
+    mode: Literal["basic", "suite"] = "basic"  # "suite" runs the pytest automation suite
+    shards: Optional[int] = Field(default=None, ge=1)  # Suite worker processes, capped by SUITE_MAX_SHARDS
+    video: bool = False  # Keep a screen recording when the run fails
+    trace: bool = False  # Keep a Playwright trace when the run fails
+    har: bool = False  # Record a HAR file and check the network budgets
+    no_cache: bool = False  # Run even if a cached result for the unchanged page exists
+    auth_profile: Optional[str] = None  # Credential profile to run logged in with
+    priority: int = Field(default=0, ge=0, le=9)  # Higher runs first; users share each priority fairly
     
     @field_validator('test_url')
     @classmethod
@@ -49,3 +92,35 @@ class TestRunRequest(BaseModel):
         if not url_pattern.match(v):
             raise ValueError('Invalid URL format')
         return v
+
+class WorkerRegisterRequest(BaseModel):
+    name: str = "worker"
+    capacity: int = Field(default=1, ge=1)  # Jobs the node runs at once
+
+class WorkerRegistration(BaseModel):
+    worker_id: str
+    long_poll_seconds: float
+    heartbeat_seconds: float
+
+class WorkerLeaseRequest(BaseModel):
+    free_slots: int = Field(ge=0)
+    wait_seconds: Optional[float] = Field(default=None, ge=0)  # Defaults to REMOTE_WORKER_LONG_POLL_SECONDS
+
+class LeasedJobSchema(BaseModel):
+    id: str
+    test_url: str
+    provider: str
+    context: Dict[str, str]
+    options: Dict[str, Any]
+
+class WorkerHeartbeatRequest(BaseModel):
+    jobs: List[str] = []  # Jobs the node is running
+    free_slots: int = Field(ge=0)
+
+class WorkerEventsRequest(BaseModel):
+    events: List[Dict[str, Any]]  # Run events in the order the run emitted them
+
+class WorkerResultRequest(BaseModel):
+    result: Optional[Dict[str, Any]] = None
+    cancelled: bool = False
+    error: Optional[str] = None  # Why the node has no result
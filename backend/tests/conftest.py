@@ -0,0 +1,228 @@
+import asyncio
+import os
+import pytest
+from unittest.mock import patch
+from backend.config import settings
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from backend.agent import page_probe, runner
+from backend.agent.browser_pool import BrowserPool
+from backend.agent.artifact_store import artifact_store
+from backend.database.models import Base
+
+class FakeResponse:
+    def __init__(self, status=200):
+        self.status = status
+        self.status_text = "OK" if status < 400 else "Error"
+        self.headers = {"content-type": "text/html"}
+
+class FakeRequest:
+    def __init__(self, url, size=1000, duration_ms=50.0, status=200, resource_type="document", failure=None):
+        self.url = url
+        self.method = "GET"
+        self.headers = {"user-agent": "fake"}
+        self.resource_type = resource_type
+        self.failure = failure
+        self.status = status
+        self.size = size
+        self.timing = {"startTime": 1700000000000.0, "domainLookupStart": -1, "domainLookupEnd": -1,
+                       "connectStart": -1, "secureConnectionStart": -1, "connectEnd": -1,
+                       "requestStart": 1.0, "responseStart": duration_ms / 2, "responseEnd": duration_ms}
+
+    async def sizes(self):
+        return {"requestBodySize": 0, "requestHeadersSize": 100, "responseBodySize": self.size,
+                "responseHeadersSize": 0}
+
+    async def response(self):
+        return FakeResponse(self.status)
+
+class FakeConsoleMessage:
+    def __init__(self, type, text):
+        self.type = type
+        self.text = text
+
+class FakeVideo:
+    def __init__(self, directory):
+        self.file = os.path.join(directory, f"{id(self)}.webm")
+        with open(self.file, "wb") as f:
+            f.write(b"webm")
+
+    async def path(self):
+        return self.file
+
+class FakeTracing:
+    def __init__(self):
+        self.started = False
+        self.saved_to = None
+
+    async def start(self, **options):
+        self.started = True
+
+    async def stop(self, path=None):
+        self.started = False
+        if path:
+            with open(path, "wb") as f:
+                f.write(b"trace")
+            self.saved_to = path
+
+class FakePage:
+    def __init__(self, context):
+        self.context = context
+        self.url = "about:blank"
+        self.closed = False
+        self.screenshots = 0
+        video_dir = context.options.get("record_video_dir")
+        self.video = FakeVideo(video_dir) if video_dir else None
+
+    async def goto(self, url, **options):
+        playwright = self.context.browser.playwright
+        await asyncio.sleep(playwright.goto_delay)
+        self.url = url
+        if playwright.login_url and url != playwright.login_url and not (
+                playwright.sessions_valid and self.context.options.get("storage_state")):
+            # Behind a login: without a valid session the site redirects to its login page
+            self.url = playwright.login_url
+        for kind, text in self.context.browser.playwright.console:
+            self.context.emit("console", FakeConsoleMessage(kind, text))
+        for request in self.context.browser.playwright.requests:
+            self.context.emit("requestfailed" if request.failure else "requestfinished", request)
+        return FakeResponse(self.context.browser.playwright.status)
+
+    async def wait_for_load_state(self, state="load", **options):
+        await asyncio.sleep(0)
+
+    async def title(self):
+        playwright = self.context.browser.playwright
+        return playwright.titles.pop(0) if playwright.titles else playwright.title
+
+    async def query_selector(self, selector):
+        return object()
+
+    async def fill(self, selector, value, **options):
+        self.context.browser.playwright.filled[selector] = value
+
+    async def click(self, selector, **options):
+        self.url = self.url.rsplit("/", 1)[0] + "/dashboard"
+
+    async def evaluate(self, expression, arg=None):
+        playwright = self.context.browser.playwright
+        if expression == page_probe.INTERACTIVE_SCRIPT:
+            return dict(playwright.interactive)
+        return dict(playwright.metrics)
+
+    async def screenshot(self, **options):
+        self.screenshots += 1
+        return b"jpeg"
+
+    async def close(self):
+        self.closed = True
+
+class FakeContext:
+    def __init__(self, browser, options=None):
+        self.browser = browser
+        self.options = options or {}
+        self.tracing = FakeTracing()
+        self.pages = []
+        self.closed = False
+        self.routes = []
+        self.listeners = {}
+
+    async def route(self, pattern, handler):
+        self.routes.append((pattern, handler))
+
+    def on(self, event, handler):
+        self.listeners.setdefault(event, []).append(handler)
+
+    def emit(self, event, *args):
+        for handler in self.listeners.get(event, []):
+            result = handler(*args)
+            if asyncio.iscoroutine(result):
+                asyncio.ensure_future(result)
+
+    async def storage_state(self):
+        return {"cookies": [{"name": "session", "value": "secret-session"}], "origins": []}
+
+    async def new_page(self):
+        page = FakePage(self)
+        self.pages.append(page)
+        return page
+
+    async def close(self):
+        self.closed = True
+
+class FakeBrowser:
+    def __init__(self, playwright):
+        self.playwright = playwright
+        self.connected = True
+        self.contexts = []
+
+    def is_connected(self):
+        return self.connected
+
+    async def new_context(self, **options):
+        context = FakeContext(self, options)
+        self.contexts.append(context)
+        return context
+
+    async def close(self):
+        self.connected = False
+
+class FakePlaywright:
+    """Stands in for the Playwright driver so pool and runner tests need no real browser"""
+
+    def __init__(self):
+        self.launched = []
+        self.stopped = False
+        self.chromium = self
+        self.goto_delay = 0
+        self.status = 200
+        self.title = "Fixture Page"
+        self.titles = []  # Returned by successive title() calls before falling back to title
+        self.login_url = None  # When set, pages redirect here unless the context has a valid storage_state
+        self.sessions_valid = True
+        self.filled = {}  # Selector -> value typed by page.fill()
+        self.requests = []  # FakeRequests reported to context listeners on every goto
+        self.console = []  # (type, text) console messages logged on every goto
+        self.interactive = {"counts": {"clickable": 1, "links": 1, "forms": 1, "inputs": 1},
+                            "visible": {"clickable": 1, "links": 1, "forms": 1, "inputs": 1},
+                            "unlabeled": 0, "sample": []}
+        self.metrics = {"ttfb_ms": 80, "fcp_ms": 400, "dom_content_loaded_ms": 450, "load_ms": 900,
+                        "lcp_ms": 1200, "cls": 0.02, "tbt_ms": 40, "long_tasks": 1, "transfer_bytes": 20480}
+
+    async def launch(self, **options):
+        browser = FakeBrowser(self)
+        self.launched.append(browser)
+        return browser
+
+    async def start(self):
+        return self
+
+    async def stop(self):
+        self.stopped = True
+
+def run_with_pool(options=None, url="https://example.com", contexts_per_browser=None):
+    """Run the built-in checks on url with a fresh single-browser pool"""
+    async def scenario():
+        pool = BrowserPool(size=1, contexts_per_browser=contexts_per_browser)
+        await pool.start()
+        try:
+            return await runner.TestRunner(pool=pool, options=options).run_basic_tests(url)
+        finally:
+            await pool.stop()
+    return asyncio.run(scenario())
+
+def memory_session_factory():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(bind=engine)
+
+@pytest.fixture
+def fake_playwright(tmp_path):
+    fake = FakePlaywright()
+    # Fake targets are not reachable over real HTTP, so skip the pre-flight probe
+    with patch("backend.agent.browser_pool.async_playwright", return_value=fake), \
+         patch.object(settings, "PREFLIGHT_ENABLED", False), \
+         patch.object(artifact_store, "root", tmp_path / "artifacts"), \
+         patch.object(artifact_store, "session_factory", memory_session_factory()):
+        yield fake
@@ -1,4 +1,15 @@
-from backend.agent.analyzer import analyze_test_run
+import asyncio
+import json
+from types import SimpleNamespace
+from backend.agent import analyzer as analyzer_module
+from backend.agent.analyzer import analyze_test_run, analyze_test_run_async
+from backend.agent.browser_pool import BrowserPool
+from backend.agent.events import FAILURE
+from backend.agent.executor import JobExecution, execute_job
+from backend.agent.llm_client import LLMClient
+from backend.config import settings
+from backend.database.models import Bug, CheckStat, Job
+from backend.tests.conftest import memory_session_factory
 from unittest.mock import patch, MagicMock
 
 def test_analyze_no_failure():
@@ -77,3 +88,217 @@ def test_analyze_duplicate_failure(MockAIClient):
     mock_ai.analyze_failure.assert_not_called()
     mock_db.add.assert_not_called()
 
+
+def pooled(completions, max_concurrency=None):
+    """The shared LLM client around a fake OpenAI client"""
+    return LLMClient(client=SimpleNamespace(chat=SimpleNamespace(completions=completions)),
+                     max_concurrency=max_concurrency)
+
+class FakeCompletions:
+    """Async chat completions that take longer for earlier failures and track how many run at once"""
+
+    def __init__(self):
+        self.in_flight = 0
+        self.peak = 0
+
+    async def create(self, messages, **kwargs):
+        prompt = messages[-1]["content"]
+        number = int(prompt.split("Test Failure: Check ")[1].split()[0])
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        await asyncio.sleep(0.01 * (4 - number))
+        self.in_flight -= 1
+        content = json.dumps({"summary": f"Check {number} is broken"})
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+def test_failures_are_analyzed_concurrently_within_a_shared_limit():
+    db = memory_session_factory()()
+    completions = FakeCompletions()
+    client = pooled(completions, max_concurrency=4)
+    failures = [{"test": f"Check {number}", "error": "Element not found"} for number in (1, 2, 3)]
+    saved = []
+
+    async def on_bug(bug):
+        # Each bug is committed before it is reported
+        saved.append(db.query(Bug).count())
+
+    async def scenario():
+        return await asyncio.gather(*(
+            analyze_test_run_async(job_id, {"failures": failures}, {}, "uTest", db, on_bug=on_bug,
+                                   analyzer=analyzer_module.TestAnalyzer(client=client), batch=False)
+            for job_id in ("job-1", "job-2")))
+
+    with patch.object(settings, "LLM_CACHE_ENABLED", False):
+        first, second = asyncio.run(scenario())
+
+    # Six calls across two jobs, never more than the shared client's limit at once
+    assert completions.peak == 4 and client.stats()["requests"] == 6
+    assert [bug["summary"] for bug in first][0] == "Check 3 is broken"
+    assert len(first) == len(second) == 3
+    assert saved == [1, 2, 3, 4, 5, 6]
+
+class BatchCompletions:
+    """Answers a batched prompt with one report per failure, or with a broken answer first when asked to"""
+
+    def __init__(self, broken=False):
+        self.broken = broken
+        self.prompts = []
+
+    async def create(self, messages, **kwargs):
+        prompt = messages[-1]["content"]
+        self.prompts.append(prompt)
+        if "Test Failure 1:" not in prompt:
+            content = json.dumps({"summary": "Analyzed on its own"})
+        elif self.broken:
+            content = json.dumps({"reports": [{"index": 1, "summary": "Only the first"}]})
+        else:
+            content = json.dumps({"reports": [{"index": 2, "summary": "Title missing because the page failed"},
+                                              {"index": 1, "summary": "Page does not load",
+                                               "steps": ["Open the page", "See the 503"]}]})
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+def analyze_batch(completions):
+    db = memory_session_factory()()
+    analyzer = analyzer_module.TestAnalyzer(client=pooled(completions))
+    failures = [{"test": "Page Load", "error": "HTTP 503"}, {"test": "Page Title", "error": "Title is empty"}]
+    with patch.object(settings, "LLM_CACHE_ENABLED", False):
+        return asyncio.run(analyze_test_run_async("job-1", {"failures": failures}, {"overview": "Shop"}, "uTest", db,
+                                                  analyzer=analyzer, batch=True))
+
+def test_batched_answers_are_mapped_back_to_their_failures():
+    completions = BatchCompletions()
+
+    bugs = analyze_batch(completions)
+
+    assert len(completions.prompts) == 1 and completions.prompts[0].count("Overview: Shop") == 1
+    assert [(bug["test_name"], bug["summary"]) for bug in bugs] == [
+        ("Page Load", "Page does not load"), ("Page Title", "Title missing because the page failed")]
+    assert bugs[0]["steps"] == "Open the page\nSee the 503"
+
+def test_unusable_batched_answer_falls_back_to_a_call_per_failure():
+    completions = BatchCompletions(broken=True)
+
+    bugs = analyze_batch(completions)
+
+    assert len(completions.prompts) == 3
+    assert [bug["summary"] for bug in bugs] == ["Analyzed on its own"] * 2
+
+def test_job_result_is_kept_when_a_bug_cannot_be_saved(fake_playwright):
+    fake_playwright.title = ""
+    session_factory = memory_session_factory()
+    db = session_factory()
+    job = Job(status="PENDING", logs=[])
+    db.add(job)
+    db.commit()
+    job_id = job.id
+
+    async def notify(job_id, message):
+        pass
+
+    async def scenario():
+        pool = BrowserPool(size=1)
+        await pool.start()
+        with patch("backend.agent.runner.browser_pool", pool), \
+             patch("backend.agent.executor.SessionLocal", session_factory), \
+             patch.object(analyzer_module, "add_bug", side_effect=RuntimeError("database is locked")), \
+             patch.object(settings, "FLAKY_RERUNS", 0):
+            await execute_job(job_id, "https://example.com", "uTest", {}, notify)
+        await pool.stop()
+
+    asyncio.run(scenario())
+
+    db.expire_all()
+    assert db.get(Job, job_id).status == "FAILED"
+    assert db.query(CheckStat).filter(CheckStat.test_name == "Title Check").one().runs == 1
+    assert db.query(Bug).count() == 0
+
+def test_only_failures_found_close_together_are_batched():
+    calls = []
+
+    async def record(job_id, test_results, *args, **kwargs):
+        calls.append([failure["test"] for failure in test_results["failures"]])
+        return []
+
+    async def notify(job_id, message):
+        pass
+
+    async def scenario():
+        execution = JobExecution(MagicMock(), "job-1", "https://example.com", "uTest", {}, notify)
+        for name in ("Page Load", "Title Check"):
+            await execution.handle_event({"type": FAILURE, "failure": {"test": name, "error": "broken"}})
+        await asyncio.sleep(0.15)
+        assert calls == [["Page Load", "Title Check"]]
+        await execution.handle_event({"type": FAILURE, "failure": {"test": "Console Errors", "error": "broken"}})
+        await asyncio.sleep(0.15)
+        await asyncio.gather(*execution.analyses)
+
+    with patch("backend.agent.executor.analyze_test_run_async", record), \
+         patch.object(settings, "ANALYSIS_BATCH", True), \
+         patch.object(settings, "ANALYSIS_BATCH_WINDOW_SECONDS", 0.05):
+        asyncio.run(scenario())
+
+    assert calls == [["Page Load", "Title Check"], ["Console Errors"]]
+
+def test_failures_streamed_as_events_are_not_analyzed_again_from_the_result():
+    calls = []
+
+    async def record(job_id, test_results, *args, **kwargs):
+        calls.append([failure["test"] for failure in test_results["failures"]])
+        return []
+
+    async def notify(job_id, message):
+        pass
+
+    db = memory_session_factory()()
+    job = Job(status="PENDING", logs=[])
+    db.add(job)
+    db.commit()
+    streamed = [{"test": f"Check {number}", "error": "broken"} for number in range(500)]
+
+    async def scenario():
+        execution = JobExecution(db, job.id, "https://example.com", "uTest", {}, notify)
+        await execution.start()
+        for failure in streamed:
+            await execution.handle_event({"type": FAILURE, "failure": failure})
+        # A remote worker's result holds its own copies of the streamed failures
+        failures = json.loads(json.dumps(streamed)) + [{"test": "Late Check", "error": "broken"}]
+        await execution.finish({"status": "FAILED", "failures": failures})
+
+    with patch("backend.agent.executor.analyze_test_run_async", record), \
+         patch.object(settings, "ANALYSIS_BATCH", False):
+        asyncio.run(scenario())
+
+    assert len(calls) == 501 and calls[-1] == ["Late Check"]
+
+def test_each_analysis_saves_bugs_through_its_own_session():
+    sessions = []
+
+    async def record(job_id, test_results, context, provider, db, **kwargs):
+        sessions.append(db)
+        # A bug that fails to save rolls back only the analysis' own session
+        db.rollback()
+        return []
+
+    async def notify(job_id, message):
+        pass
+
+    factory = memory_session_factory()
+    db = factory()
+    job = Job(status="PENDING", logs=[])
+    db.add(job)
+    db.commit()
+
+    async def scenario():
+        execution = JobExecution(db, job.id, "https://example.com", "uTest", {}, notify, session_factory=factory)
+        await execution.start()
+        for name in ("Page Load", "Title Check"):
+            await execution.handle_event({"type": FAILURE, "failure": {"test": name, "error": "broken"}})
+        await execution.finish({"status": "FAILED", "failures": [], "logs": ["Run finished"]})
+
+    with patch("backend.agent.executor.analyze_test_run_async", record), \
+         patch.object(settings, "ANALYSIS_BATCH", False):
+        asyncio.run(scenario())
+
+    assert len(sessions) == 2 and db not in sessions and sessions[0] is not sessions[1]
+    db.expire_all()
+    assert db.get(Job, job.id).status == "FAILED"
@@ -0,0 +1,117 @@
+import asyncio
+import json
+from datetime import datetime, timedelta
+import pytest
+from backend.agent.analyzer import add_bug as add_reported_bug
+from backend.agent.artifact_store import ArtifactStore, bug_artifact_urls
+from backend.database.models import Artifact, Bug, Job
+from backend.tests.conftest import memory_session_factory
+
+@pytest.fixture
+def store(tmp_path):
+    store = ArtifactStore(root=str(tmp_path), session_factory=memory_session_factory(),
+                          quota_bytes=10_000, max_age_days=7, orphan_grace_seconds=3600)
+    yield store
+    store.shutdown()
+
+def age(store, url, **fields):
+    db = store.session_factory()
+    db.query(Artifact).filter(Artifact.path == url).update(fields)
+    db.commit()
+    db.close()
+
+def add_bug(store, screenshot_path):
+    db = store.session_factory()
+    job = Job(status="FAILED", logs=[])
+    db.add(job)
+    db.flush()
+    bug = Bug(job_id=job.id, test_name="Page Load", summary="s", steps="", actual_result="",
+              expected_result="", severity="Critical", screenshot_path=screenshot_path)
+    db.add(bug)
+    store.add_references(db, [screenshot_path])
+    db.commit()
+    bug_id = bug.id
+    db.close()
+    return bug_id
+
+def test_identical_content_is_stored_once(store, tmp_path):
+    async def scenario():
+        first = await store.put_bytes(b"x" * 1000, ".jpg")
+        second = await store.put_bytes(b"x" * 1000, ".jpg")
+        recording = tmp_path / "video.webm"
+        recording.write_bytes(b"x" * 1000)
+        third = await store.put_file(recording, ".jpg")
+        return first, second, third, recording
+
+    first, second, third, recording = asyncio.run(scenario())
+
+    assert first == second == third
+    assert not recording.exists()
+    assert len([p for p in (tmp_path / "cas").rglob("*") if p.is_file()]) == 1
+    stats = store.stats()
+    assert stats["objects"] == 1
+    assert stats["bytes_stored"] == 1000
+    assert stats["bytes_written"] == 3000
+    assert stats["dedup_ratio"] == 3.0
+
+def test_gc_evicts_unreferenced_then_least_recently_used(store):
+    async def scenario():
+        return [await store.put_bytes(bytes([i]) * 4000, ".jpg") for i in range(3)]
+
+    old_referenced, unreferenced, recent_referenced = asyncio.run(scenario())
+    old_bug = add_bug(store, old_referenced)
+    add_bug(store, recent_referenced)
+    age(store, old_referenced, last_accessed_at=datetime.utcnow() - timedelta(days=1))
+
+    evicted = asyncio.run(store.collect())
+    assert evicted == {"expired": 0, "orphaned": 0, "over_quota": 1}
+    assert not store.file_for(unreferenced).exists()
+
+    store.quota_bytes = 5000
+    asyncio.run(store.collect())
+    assert not store.file_for(old_referenced).exists()
+    assert store.file_for(recent_referenced).exists()
+
+    db = store.session_factory()
+    assert db.get(Bug, old_bug).screenshot_path is None
+    db.close()
+    assert store.stats()["evictions_total"] == 2
+
+def test_gc_drops_expired_and_orphaned_artifacts(store):
+    async def scenario():
+        return [await store.put_bytes(bytes([i]), ".jpg") for i in range(3)]
+
+    expired, orphaned, fresh_orphan = asyncio.run(scenario())
+    add_bug(store, expired)
+    age(store, expired, last_accessed_at=datetime.utcnow() - timedelta(days=8))
+    age(store, orphaned, created_at=datetime.utcnow() - timedelta(hours=2))
+
+    assert asyncio.run(store.collect()) == {"expired": 1, "orphaned": 1, "over_quota": 0}
+    assert store.file_for(fresh_orphan).exists()
+
+def test_trace_and_har_links_are_counted_touched_and_dropped_on_eviction(store, monkeypatch):
+    async def scenario():
+        return await store.put_bytes(b"trace", ".zip"), await store.put_bytes(b"har", ".har.gz")
+
+    trace, har = asyncio.run(scenario())
+    monkeypatch.setattr("backend.agent.analyzer.artifact_store", store)
+    db = store.session_factory()
+    job = Job(status="FAILED", logs=[])
+    db.add(job)
+    db.flush()
+    bug = add_reported_bug(db, job.id, {
+        "summary": "s", "test_name": "Page Load", "severity": "Critical", "status": "NEW", "steps": "",
+        "actual_result": "", "expected_result": "", "environment": {"url": "https://example.com",
+                                                                    "trace": trace, "har": har}})
+    db.commit()
+    assert bug_artifact_urls(bug) == [trace, har]
+    assert [artifact.refcount for artifact in db.query(Artifact)] == [1, 1]
+
+    age(store, trace, last_accessed_at=datetime.utcnow() - timedelta(days=8))
+    age(store, har, last_accessed_at=datetime.utcnow() - timedelta(days=8))
+    store.touch(db, [har])
+    assert asyncio.run(store.collect()) == {"expired": 1, "orphaned": 0, "over_quota": 0}
+
+    db.expire_all()
+    assert json.loads(db.get(Bug, bug.id).environment) == {"url": "https://example.com", "har": har}
+    db.close()
@@ -0,0 +1,79 @@
+import asyncio
+import json
+from unittest.mock import MagicMock, patch
+from backend.agent.analyzer import analyze_test_run
+from backend.agent.artifact_store import artifact_store
+from backend.agent.browser_pool import BrowserPool
+from backend.agent.executor import execute_job
+from backend.database.models import Bug, Job
+from backend.tests.conftest import memory_session_factory, run_with_pool
+
+def served_file(url_path):
+    return artifact_store.root / url_path[len("/artifacts/"):]
+
+def test_failure_keeps_screenshot_video_and_trace(fake_playwright):
+    fake_playwright.title = ""
+
+    results = run_with_pool(options={"video": True, "trace": True})
+
+    failure = results["failures"][0]
+    assert failure["screenshot_path"].endswith(".jpg")
+    assert served_file(failure["screenshot_path"]).read_bytes() == b"jpeg"
+    assert served_file(failure["video_path"]).read_bytes() == b"webm"
+    assert served_file(failure["trace_path"]).read_bytes() == b"trace"
+    assert results["artifacts"]["files"] == 3
+    assert results["artifacts"]["capture_ms"] > 0
+    assert not any(p.is_file() for p in artifact_store.scratch_root.rglob("*"))
+
+    db = MagicMock()
+    bugs = analyze_test_run("job-1", results, {}, "uTest", db)
+    bug = db.add.call_args[0][0]
+    assert bug.screenshot_path == failure["screenshot_path"]
+    assert bug.video_path == failure["video_path"]
+    assert bugs[0]["environment"]["trace"] == failure["trace_path"]
+
+def test_passing_run_captures_nothing(fake_playwright):
+    results = run_with_pool(options={"video": True, "trace": True})
+
+    assert results["status"] == "COMPLETED"
+    assert results["artifacts"] == {"capture_ms": results["artifacts"]["capture_ms"], "files": 0, "bytes": 0}
+    page = fake_playwright.launched[0].contexts[0].pages[0]
+    assert page.screenshots == 0
+    assert not any(p.is_file() for p in artifact_store.root.rglob("*"))
+
+def test_streamed_failure_is_analyzed_before_cleanup_and_linked_to_recordings_after(fake_playwright):
+    fake_playwright.title = ""
+    session_factory = memory_session_factory()
+    db = session_factory()
+    job = Job(status="PENDING", logs=["Job accepted."])
+    db.add(job)
+    db.commit()
+    job_id = job.id
+    order = []
+    release = BrowserPool.release
+
+    async def record_release(self, context):
+        order.append("release")
+        return await release(self, context)
+
+    async def notify(job_id, message):
+        if message.get("message", "").startswith("Failure found"):
+            order.append("failure")
+
+    async def scenario():
+        pool = BrowserPool(size=1)
+        await pool.start()
+        with patch("backend.agent.runner.browser_pool", pool), \
+             patch("backend.agent.executor.SessionLocal", session_factory), \
+             patch.object(BrowserPool, "release", record_release):
+            await execute_job(job_id, "https://example.com", "uTest", {}, notify,
+                              options={"video": True, "trace": True})
+        await pool.stop()
+
+    asyncio.run(scenario())
+
+    assert order == ["failure", "release"]
+    db.expire_all()
+    [bug] = db.query(Bug).filter(Bug.job_id == job_id).all()
+    assert served_file(bug.video_path).read_bytes() == b"webm"
+    assert served_file(json.loads(bug.environment)["trace"]).read_bytes() == b"trace"
@@ -0,0 +1,94 @@
+import asyncio
+import time
+from pathlib import Path
+from unittest.mock import patch
+import pytest
+from cryptography.fernet import Fernet
+from backend.agent import runner
+from backend.agent.auth_state import AuthProfile, AuthStateCache, LoginFailed
+from backend.agent.browser_pool import BrowserPool
+from backend.config import settings
+
+LOGIN_URL = "https://example.com/login"
+KEY = Fernet.generate_key()
+
+@pytest.fixture
+def auth_cache(tmp_path, fake_playwright):
+    fake_playwright.login_url = LOGIN_URL
+    profiles = {"shop": AuthProfile("shop", login_url=LOGIN_URL, username="qa@example.com", password="pw")}
+    cache = AuthStateCache(directory=str(tmp_path / "auth_state"), key=KEY, profiles=profiles)
+    with patch.object(runner, "auth_state_cache", cache), patch.object(settings, "FLAKY_RERUNS", 0):
+        yield cache
+
+def run_logged_in(runs=1):
+    async def scenario():
+        pool = BrowserPool(size=1, contexts_per_browser=4)
+        await pool.start()
+        try:
+            return [await runner.TestRunner(pool=pool, options={"auth_profile": "shop"})
+                    .run_basic_tests("https://example.com/account") for _ in range(runs)]
+        finally:
+            await pool.stop()
+    return asyncio.run(scenario())
+
+def test_login_runs_once_and_later_contexts_start_logged_in(auth_cache, fake_playwright):
+    results = run_logged_in(runs=2)
+
+    assert [r["status"] for r in results] == ["COMPLETED", "COMPLETED"]
+    assert auth_cache.stats() == {"hits": 1, "logins": 1, "invalidations": 0}
+    assert fake_playwright.filled == {"input[type=email], input[name=username], input[name=email]": "qa@example.com",
+                                      "input[type=password]": "pw"}
+    # Saved encrypted; another process with the same key reuses it, one with another key cannot read it
+    [saved] = list(Path(auth_cache.directory).iterdir())
+    assert b"secret-session" not in saved.read_bytes()
+    assert AuthStateCache(directory=auth_cache.directory, key=KEY)._cached("shop")["cookies"][0]["name"] == "session"
+    assert AuthStateCache(directory=auth_cache.directory, key=Fernet.generate_key())._cached("shop") is None
+
+def test_redirect_to_the_login_page_invalidates_the_saved_login(auth_cache, fake_playwright):
+    run_logged_in()
+    fake_playwright.sessions_valid = False
+
+    [result] = run_logged_in()
+
+    assert result["status"] == "FAILED"
+    assert [f["test"] for f in result["failures"]] == ["Page Load"]
+    assert "Redirected to the login page" in result["failures"][0]["error"]
+    assert auth_cache.invalidations == 1
+    assert list(Path(auth_cache.directory).iterdir()) == []
+
+def test_expired_state_logs_in_again(auth_cache):
+    auth_cache._store("shop", {"cookies": [], "origins": []}, time.time() - 1)
+
+    run_logged_in()
+
+    assert auth_cache.logins == 1 and auth_cache.hits == 0
+
+def test_failed_login_is_shared_with_the_runs_that_waited_for_it(auth_cache, fake_playwright):
+    # Submitting the form lands on /dashboard, which this profile treats as its login page
+    auth_cache.profile("shop").login_url = "https://example.com/dashboard"
+
+    async def scenario():
+        pool = BrowserPool(size=1, contexts_per_browser=4)
+        await pool.start()
+        try:
+            return await asyncio.gather(*(auth_cache.storage_state("shop", pool) for _ in range(3)),
+                                        return_exceptions=True)
+        finally:
+            await pool.stop()
+    outcomes = asyncio.run(scenario())
+
+    assert all(isinstance(outcome, LoginFailed) for outcome in outcomes)
+    assert auth_cache.logins == 1
+
+def test_state_key_is_generated_once_per_directory_and_private(tmp_path):
+    directory = str(tmp_path / "auth_state")
+
+    with patch.object(settings, "AUTH_STATE_KEY", ""):
+        first = AuthStateCache(directory=directory, profiles={})
+        first._store("shop", {"cookies": [], "origins": []}, time.time() + 60)
+        second = AuthStateCache(directory=directory, profiles={})
+
+        assert second._cached("shop") == {"cookies": [], "origins": []}
+    key_file = Path(directory) / "state.key"
+    assert key_file.stat().st_mode & 0o777 == 0o600
+    Fernet(key_file.read_bytes())
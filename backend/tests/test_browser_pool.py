@@ -0,0 +1,68 @@
+import asyncio
+from backend.agent.browser_pool import BrowserPool
+
+def test_leases_reuse_warm_browsers(fake_playwright):
+    async def scenario(fake):
+        pool = BrowserPool(size=2, contexts_per_browser=2, max_uses=100)
+        await pool.start()
+        for _ in range(10):
+            async with pool.lease() as context:
+                assert not context.closed
+            assert context.closed
+        assert len(fake.launched) == 2
+        assert pool.stats()["leases_total"] == 10
+        await pool.stop()
+
+    asyncio.run(scenario(fake_playwright))
+    assert fake_playwright.stopped
+
+def test_browser_recycled_after_max_uses(fake_playwright):
+    async def scenario(fake):
+        pool = BrowserPool(size=1, contexts_per_browser=1, max_uses=2)
+        await pool.start()
+        first = fake.launched[0]
+        for _ in range(3):
+            async with pool.lease() as context:
+                pass
+        assert context.browser is not first
+        assert not first.connected
+        assert pool.stats()["recycled_total"] == 1
+        await pool.stop()
+
+    asyncio.run(scenario(fake_playwright))
+
+def test_disconnected_browser_is_replaced(fake_playwright):
+    async def scenario(fake):
+        pool = BrowserPool(size=1, contexts_per_browser=1, max_uses=100)
+        await pool.start()
+        fake.launched[0].connected = False
+        async with pool.lease() as context:
+            assert context.browser is fake.launched[1]
+        assert pool.stats()["unhealthy_total"] == 1
+        await pool.stop()
+
+    asyncio.run(scenario(fake_playwright))
+
+def test_saturated_pool_reports_queue_depth(fake_playwright):
+    async def scenario(fake):
+        pool = BrowserPool(size=1, contexts_per_browser=2, max_uses=100)
+        await pool.start()
+        first = await pool.acquire()
+        second = await pool.acquire()
+        waiter = asyncio.create_task(pool.acquire())
+        await asyncio.sleep(0)
+
+        stats = pool.stats()
+        assert stats["capacity"] == 2
+        assert stats["in_use"] == 2
+        assert stats["available"] == 0
+        assert stats["queue_depth"] == 1
+
+        await pool.release(first)
+        third = await asyncio.wait_for(waiter, timeout=1)
+        assert pool.stats()["queue_depth"] == 0
+        await pool.release(second)
+        await pool.release(third)
+        await pool.stop()
+
+    asyncio.run(scenario(fake_playwright))
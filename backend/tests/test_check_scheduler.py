@@ -0,0 +1,94 @@
+import asyncio
+import time
+import pytest
+from backend.agent.check_scheduler import CheckResult, CheckScheduler, ScheduledCheck
+from backend.agent.browser_pool import BrowserPool
+from backend.agent import runner
+
+def sleeping_check(events, name, delay, passed=True):
+    async def run(page):
+        events.append(f"start:{name}")
+        await asyncio.sleep(delay)
+        events.append(f"end:{name}")
+        return CheckResult(passed, name, error=None if passed else f"{name} failed")
+    return run
+
+def test_dependents_wait_for_navigation_and_run_concurrently():
+    events = []
+    pages = []
+
+    async def new_page():
+        pages.append(object())
+        return pages[-1]
+
+    checks = [
+        ScheduledCheck("Load", sleeping_check(events, "Load", 0.1)),
+        ScheduledCheck("A", sleeping_check(events, "A", 0.2), depends_on=["Load"]),
+        ScheduledCheck("B", sleeping_check(events, "B", 0.2, passed=False), depends_on=["Load"]),
+        ScheduledCheck("Independent", sleeping_check(events, "Independent", 0.2)),
+    ]
+
+    started = time.perf_counter()
+    results = asyncio.run(CheckScheduler(checks).run(new_page))
+    elapsed = time.perf_counter() - started
+
+    assert events.index("end:Load") < events.index("start:A")
+    assert events.index("end:Load") < events.index("start:B")
+    assert events.index("start:Independent") < events.index("end:Load")
+    assert elapsed < 0.45
+    assert len(pages) == 2
+    assert [r.passed for r in results] == [True, True, False, True]
+    assert all(r.duration_ms > 0 for r in results)
+
+def test_rejects_dependency_cycles():
+    checks = [
+        ScheduledCheck("A", sleeping_check([], "A", 0), depends_on=["B"]),
+        ScheduledCheck("B", sleeping_check([], "B", 0), depends_on=["A"]),
+    ]
+    with pytest.raises(ValueError):
+        CheckScheduler(checks)
+
+def test_runner_reports_per_check_timings(fake_playwright):
+    fake_playwright.title = ""
+
+    async def scenario():
+        pool = BrowserPool(size=1)
+        await pool.start()
+        results = await runner.TestRunner(pool=pool).run_basic_tests("https://example.com")
+        await pool.stop()
+        return results
+
+    results = asyncio.run(scenario())
+    assert results["status"] == "FAILED"
+    assert set(results["timings"]) == {"Page Load", "Title Check", "Basic Elements Check",
+                                        "Console Errors Check", "Interactive Elements Check"}
+    assert results["duration_ms"] >= max(results["timings"].values())
+    assert [(f["test"], f["error"]) for f in results["failures"]] == [("Title Check", "Page title is empty or missing")]
+
+def test_check_cut_off_at_its_timeout():
+    checks = [
+        ScheduledCheck("Slow", sleeping_check([], "Slow", 5), timeout=0.1),
+        ScheduledCheck("Fast", sleeping_check([], "Fast", 0)),
+    ]
+    slow, fast = asyncio.run(CheckScheduler(checks).run(lambda: asyncio.sleep(0)))
+    assert slow.timed_out and not slow.passed
+    assert slow.error == "Timed out after 0.1s"
+    assert fast.passed
+
+def test_run_deadline_times_out_and_frees_pool_slot(fake_playwright):
+    fake_playwright.goto_delay = 5
+
+    async def scenario():
+        pool = BrowserPool(size=1, contexts_per_browser=1)
+        await pool.start()
+        deadline = asyncio.get_running_loop().time() + 0.2
+        results = await runner.TestRunner(pool=pool).run_basic_tests("https://example.com", deadline=deadline)
+        stats = pool.stats()
+        await pool.stop()
+        return results, stats
+
+    results, stats = asyncio.run(scenario())
+    assert results["status"] == "TIMEOUT"
+    assert results["duration_ms"] < 1000
+    assert stats["in_use"] == 0
+    assert all(context.closed for context in fake_playwright.launched[0].contexts)
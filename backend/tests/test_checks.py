@@ -0,0 +1,67 @@
+import pytest
+from backend.agent import checks
+from backend.agent import analyzer as analyzer_module
+from backend.agent.check_scheduler import CheckResult
+from backend.tests.conftest import run_with_pool
+
+class FooterCheck(checks.Check):
+    id = "footer"
+    name = "Footer Check"
+    depends_on = ("page_load",)
+    severity = "Low"
+    steps = ("Scroll to the bottom of the page", "Look for a footer ({error})")
+    expected_result = "Page should end with a footer"
+
+    @classmethod
+    def enabled(cls, options):
+        return not options.get("fast")
+
+    async def run(self, page):
+        return CheckResult(False, "No footer found", error="footer missing")
+
+@pytest.fixture
+def footer_check(monkeypatch):
+    monkeypatch.setitem(checks.CHECK_REGISTRY, FooterCheck.id, FooterCheck)
+    return FooterCheck
+
+def test_registered_check_is_scheduled_without_runner_changes(fake_playwright, footer_check):
+    results = run_with_pool()
+
+    assert results["tests_run"] == 6
+    assert "Footer Check" in results["timings"]
+    assert [(f["test"], f["error"]) for f in results["failures"]] == [("Footer Check", "footer missing")]
+
+    fast = run_with_pool(options={"fast": True})
+    assert "Footer Check" not in fast["timings"]
+
+def test_analyzer_uses_check_metadata(footer_check):
+    analyzer = analyzer_module.TestAnalyzer()
+    failure = {"test": "Footer Check", "error": "footer missing"}
+
+    assert analyzer.generate_steps(failure, {}).splitlines() == [
+        "1. Open web browser",
+        "2. Navigate to the test URL",
+        "3. Scroll to the bottom of the page",
+        "4. Look for a footer (footer missing)",
+    ]
+    assert analyzer.generate_expected_result(failure) == "Page should end with a footer"
+    assert analyzer.determine_severity(failure) == "Low"
+    assert analyzer.determine_severity({"test": "Footer Check", "error": "Timeout 10000ms"}) == "High"
+    assert analyzer.determine_severity({"test": "Page Load", "error": "HTTP 500"}) == "Critical"
+    assert analyzer.generate_expected_result({"test": "test_login", "error": "x"}) == "Test should pass without errors"
+
+def test_register_rejects_duplicate_ids():
+    class Duplicate(checks.Check):
+        id = "page_load"
+        name = "Another Page Load"
+
+    with pytest.raises(ValueError):
+        checks.register_check(Duplicate)
+
+def test_check_without_run_cannot_be_instantiated():
+    class Unfinished(checks.Check):
+        id = "unfinished"
+        name = "Unfinished Check"
+
+    with pytest.raises(TypeError):
+        Unfinished(runner=None)
@@ -0,0 +1,27 @@
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.pool import StaticPool
+from backend.database.core import create_db_and_tables
+
+def test_existing_tables_gain_the_columns_added_since_they_were_created():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    with engine.begin() as connection:
+        # The jobs and bugs tables as the first release created them
+        connection.execute(text("CREATE TABLE jobs (id VARCHAR PRIMARY KEY, status VARCHAR, logs JSON, "
+                                "created_at DATETIME, updated_at DATETIME)"))
+        connection.execute(text("CREATE TABLE bugs (id VARCHAR PRIMARY KEY, job_id VARCHAR, test_name VARCHAR, "
+                                "summary VARCHAR, steps TEXT, actual_result TEXT, expected_result TEXT, "
+                                "severity VARCHAR, screenshot_path VARCHAR, video_path VARCHAR, "
+                                "created_at DATETIME, status VARCHAR, environment TEXT)"))
+        connection.execute(text("INSERT INTO jobs (id, status) VALUES ('old', 'COMPLETED')"))
+
+    create_db_and_tables(engine)
+    create_db_and_tables(engine)
+
+    inspector = inspect(engine)
+    columns = {column["name"] for column in inspector.get_columns("jobs")}
+    assert {"test_url", "provider", "context", "options", "worker_id", "lease_expires_at", "attempts",
+            "cache_key", "fingerprint", "priority", "requested_by"} <= columns
+    assert {"ix_jobs_worker_id", "ix_jobs_cache_key", "ix_jobs_requested_by"} <= {
+        index["name"] for index in inspector.get_indexes("jobs")}
+    with engine.connect() as connection:
+        assert connection.execute(text("SELECT attempts, priority FROM jobs WHERE id = 'old'")).one() == (0, 0)
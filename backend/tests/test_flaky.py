@@ -0,0 +1,119 @@
+import asyncio
+import threading
+from unittest.mock import patch
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from backend.agent import runner
+from backend.agent.browser_pool import BrowserPool
+from backend.agent.flaky import flakiness, record_checks
+from backend.config import settings
+from backend.database.models import Base
+from backend.tests.conftest import memory_session_factory, run_with_pool
+
+def run_with_reruns(reruns=2):
+    with patch.object(settings, "FLAKY_RERUNS", reruns):
+        return run_with_pool(contexts_per_browser=4)
+
+def test_check_that_passes_a_rerun_is_flaky_not_failed(fake_playwright):
+    fake_playwright.titles = ["", "", "Fixture Page"]
+
+    results = run_with_reruns()
+
+    assert results["status"] == "COMPLETED"
+    assert results["failures"] == []
+    assert results["flaky"] == [{"test": "Title Check", "error": "Page title is empty or missing",
+                                 "reruns": 2, "passed_reruns": 1}]
+    assert results["tests_passed"] == results["tests_run"]
+    assert "⚠️ Title Check is flaky: failed, then passed 1/2 reruns" in results["logs"]
+
+def test_check_that_fails_every_rerun_stays_a_failure(fake_playwright):
+    fake_playwright.title = ""
+
+    results = run_with_reruns()
+
+    assert results["status"] == "FAILED"
+    assert [f["test"] for f in results["failures"]] == ["Title Check"]
+    assert results["flaky"] == []
+    assert "Title Check failed all 2 reruns: consistent failure" in results["logs"]
+
+def test_reruns_can_be_disabled(fake_playwright):
+    fake_playwright.titles = ["", "Fixture Page"]
+
+    results = run_with_reruns(reruns=0)
+
+    assert [f["test"] for f in results["failures"]] == ["Title Check"]
+    assert "flaky" not in results
+
+def test_reruns_are_off_by_default(fake_playwright):
+    fake_playwright.titles = ["", "Fixture Page"]
+
+    results = run_with_pool()
+
+    assert [f["test"] for f in results["failures"]] == ["Title Check"]
+    assert "flaky" not in results
+
+def test_concurrent_runs_with_reruns_do_not_deadlock_a_saturated_pool(fake_playwright):
+    fake_playwright.title = ""
+
+    async def scenario():
+        pool = BrowserPool(size=1, contexts_per_browser=2)
+        await pool.start()
+        try:
+            runs = (runner.TestRunner(pool=pool).run_basic_tests("https://example.com") for _ in range(2))
+            return await asyncio.wait_for(asyncio.gather(*runs), timeout=5)
+        finally:
+            await pool.stop()
+    with patch.object(settings, "FLAKY_RERUNS", 2):
+        results = asyncio.run(scenario())
+
+    assert [r["status"] for r in results] == ["FAILED", "FAILED"]
+    for result in results:
+        assert [f["test"] for f in result["failures"]] == ["Title Check"]
+        assert "Not re-running Title Check: no free browser contexts" in result["logs"]
+
+def test_flakiness_rate_is_kept_per_check_and_url():
+    db = memory_session_factory()()
+    url = "https://example.com"
+    timings = {"Pre-flight": 5.0, "Page Load": 100.0, "Title Check": 2.0}
+    record_checks(db, url, {"timings": timings, "flaky": [{"test": "Title Check"}]})
+    db.commit()
+    record_checks(db, url, {"timings": timings, "failures": [{"test": "Title Check"}]})
+    record_checks(db, url, {"timings": timings})
+    record_checks(db, "https://other.example", {"timings": timings})
+    db.commit()
+
+    [title] = flakiness(db)
+
+    assert (title["url"], title["test"]) == (url, "Title Check")
+    assert (title["runs"], title["failures"], title["flaky"], title["flaky_rate"]) == (3, 1, 1, 0.333)
+    assert flakiness(db, url="https://other.example") == []
+
+def test_processes_recording_the_same_url_at_once_add_up(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'stats.db'}", connect_args={"timeout": 30})
+    Base.metadata.create_all(bind=engine)
+    factory = sessionmaker(bind=engine)
+    url = "https://example.com"
+    barrier = threading.Barrier(4)
+    errors = []
+
+    def record(flaky):
+        db = factory()
+        try:
+            barrier.wait()
+            result = {"timings": {"Title Check": 2.0}, "flaky": [{"test": "Title Check"}] if flaky else []}
+            record_checks(db, url, result)
+            db.commit()
+        except Exception as e:
+            errors.append(e)
+        finally:
+            db.close()
+
+    threads = [threading.Thread(target=record, args=(index % 2 == 0,)) for index in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    [title] = flakiness(factory())
+    assert (title["runs"], title["flaky"]) == (4, 2) and title["last_flaky_at"] is not None
@@ -0,0 +1,126 @@
+import asyncio
+import gzip
+import json
+from unittest.mock import MagicMock, patch
+from backend.agent.analyzer import analyze_test_run
+from backend.agent.artifact_store import artifact_store
+from backend.agent.browser_pool import BrowserPool
+from backend.agent.executor import execute_job
+from backend.agent.har import HarRecorder
+from backend.config import settings
+from backend.database.models import Artifact, Job
+from backend.tests.conftest import FakeRequest, memory_session_factory, run_with_pool
+
+def read_har(url_path):
+    with gzip.open(artifact_store.root / url_path[len("/artifacts/"):], "rt", encoding="utf-8") as f:
+        return json.load(f)
+
+def page_requests():
+    return [
+        FakeRequest("https://www.example.com/", size=3000, duration_ms=120),
+        FakeRequest("https://cdn.example.com/app.js?v=2", size=5000, duration_ms=300, resource_type="script"),
+        FakeRequest("https://tracker.test/pixel.gif", size=2000, duration_ms=40, resource_type="image"),
+        FakeRequest("https://ads.test/slot.js", failure="net::ERR_BLOCKED_BY_CLIENT", resource_type="script"),
+    ]
+
+def test_har_is_streamed_to_a_compressed_file(fake_playwright):
+    fake_playwright.requests = page_requests()
+
+    results = run_with_pool(options={"har": True}, url="https://www.example.com")
+
+    assert results["status"] == "COMPLETED"
+    assert "Network Budget" in results["timings"]
+    har = results["network"]["har"]
+    assert har["entries"] == 4
+    assert har["failed_requests"] == 1
+    assert har["bytes"] == 10000
+    assert har["third_party_share"] == 0.2
+    assert har["slowest_url"] == "https://cdn.example.com/app.js?v=2"
+
+    log = read_har(har["path"])["log"]
+    assert log["version"] == "1.2"
+    entries = {entry["request"]["url"]: entry for entry in log["entries"]}
+    assert entries["https://cdn.example.com/app.js?v=2"]["request"]["queryString"] == [{"name": "v", "value": "2"}]
+    assert entries["https://cdn.example.com/app.js?v=2"]["timings"]["receive"] == 150.0
+    assert entries["https://ads.test/slot.js"]["response"]["status"] == 0
+    assert not any(p.is_file() for p in artifact_store.scratch_root.rglob("*"))
+
+def test_budget_violations_become_failures(fake_playwright):
+    fake_playwright.requests = page_requests()
+
+    with patch.object(settings, "NETWORK_BUDGET_REQUESTS", 3), \
+         patch.object(settings, "NETWORK_BUDGET_SLOWEST_MS", 200):
+        results = run_with_pool(options={"har": True}, url="https://www.example.com")
+
+    assert results["status"] == "FAILED"
+    [failure] = results["failures"]
+    assert failure["test"] == "Network Budget"
+    assert failure["error"] == ("4 requests exceed the budget of 3; Slowest request took 300ms, above the "
+                                "200ms budget: https://cdn.example.com/app.js?v=2")
+    assert failure["har_path"] == results["network"]["har"]["path"]
+
+    bugs = analyze_test_run("job-1", results, {}, "uTest", MagicMock())
+    assert bugs[0]["environment"]["har"] == failure["har_path"]
+
+def test_runs_without_capture_record_no_har(fake_playwright):
+    fake_playwright.requests = page_requests()
+
+    results = run_with_pool(url="https://www.example.com")
+
+    assert "Network Budget" not in results["timings"]
+    assert "har" not in results["network"]
+    assert results["network"]["requests"] == 3
+
+def test_har_of_a_passing_run_is_kept_by_its_job(fake_playwright):
+    fake_playwright.requests = page_requests()
+    session_factory = memory_session_factory()
+    db = session_factory()
+    job = Job(status="PENDING", logs=[])
+    db.add(job)
+    db.commit()
+    job_id = job.id
+
+    async def notify(job_id, message):
+        pass
+
+    async def scenario():
+        pool = BrowserPool(size=1)
+        await pool.start()
+        with patch("backend.agent.runner.browser_pool", pool), \
+             patch("backend.agent.executor.SessionLocal", session_factory), \
+             patch.object(artifact_store, "session_factory", session_factory):
+            await execute_job(job_id, "https://www.example.com", "uTest", {}, notify, options={"har": True})
+            await pool.stop()
+            return await artifact_store.collect()
+
+    with patch.object(artifact_store, "orphan_grace_seconds", 0):
+        evicted = asyncio.run(scenario())
+
+    db.expire_all()
+    job = db.get(Job, job_id)
+    assert job.status == "COMPLETED"
+    assert evicted["orphaned"] == 0
+    assert f"HAR saved: {job.har_path}" in job.log_lines
+    assert db.query(Artifact).filter(Artifact.path == job.har_path).one().refcount == 1
+    assert read_har(job.har_path)["log"]["entries"]
+
+def test_har_is_finished_before_its_context_is_released(fake_playwright):
+    fake_playwright.requests = page_requests()
+    calls = []
+    finish, release = HarRecorder.finish, BrowserPool.release
+
+    async def record_finish(self):
+        calls.append("har")
+        return await finish(self)
+
+    async def record_release(self, context):
+        calls.append("release")
+        return await release(self, context)
+
+    with patch.object(HarRecorder, "finish", record_finish), patch.object(BrowserPool, "release", record_release):
+        results = run_with_pool(options={"har": True}, url="https://www.example.com")
+
+    assert calls == ["har", "release"]
+    assert results["network"]["har"]["entries"] == 4
+    # Recordings in progress are never under the directory served at /artifacts
+    assert artifact_store.root not in artifact_store.scratch_root.parents
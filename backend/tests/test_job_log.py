@@ -0,0 +1,73 @@
+import asyncio
+import time
+from unittest.mock import patch
+from backend.agent.browser_pool import BrowserPool
+from backend.agent.executor import execute_job
+from backend.agent.job_log import JobLogWriter
+from backend.database.models import Job, JobLog
+from backend.tests.conftest import memory_session_factory
+
+def test_lines_are_batched_into_one_insert_and_one_push():
+    db = memory_session_factory()()
+    job = Job(status="RUNNING", logs=["Job accepted."])
+    db.add(job)
+    db.commit()
+    pushes = []
+
+    async def notify(job_id, message):
+        pushes.append(message)
+
+    async def scenario():
+        log = JobLogWriter(db, job.id, notify, interval=0.05)
+        await log.write("one")
+        await log.write("two", "three")
+        assert pushes == []
+        await asyncio.sleep(0.1)
+        await log.write("four")
+        await log.close()
+
+    asyncio.run(scenario())
+
+    assert [[entry["line"] for entry in push["entries"]] for push in pushes] == [["one", "two", "three"], ["four"]]
+    ids = [entry["id"] for push in pushes for entry in push["entries"]]
+    assert ids == sorted(ids)
+    db.expire_all()
+    assert job.log_lines == ["Job accepted.", "one", "two", "three", "four"]
+
+def test_run_logs_are_pushed_while_the_run_is_in_progress(fake_playwright):
+    fake_playwright.goto_delay = 0.5
+    session_factory = memory_session_factory()
+    db = session_factory()
+    job = Job(status="PENDING", logs=["Job accepted."])
+    db.add(job)
+    db.commit()
+    job_id = job.id
+    pushes = []
+
+    async def notify(job_id, message):
+        pushes.append((time.perf_counter(), message))
+
+    async def scenario():
+        pool = BrowserPool(size=1)
+        await pool.start()
+        with patch("backend.agent.runner.browser_pool", pool), \
+             patch("backend.agent.executor.SessionLocal", session_factory):
+            started = time.perf_counter()
+            await execute_job(job_id, "https://example.com", "uTest", {}, notify)
+            finished = time.perf_counter()
+        await pool.stop()
+        return started, finished
+
+    started, finished = asyncio.run(scenario())
+
+    streamed = [(at, entry["line"]) for at, message in pushes for entry in message.get("entries", [])]
+    first_check_at = next(at for at, line in streamed if line.startswith("Running 5 checks"))
+    assert first_check_at - started < 0.4 < finished - started
+    assert any(message.get("event", {}).get("type") == "check_started" for _, message in pushes)
+    assert pushes[-1][1]["status"] == "COMPLETED"
+
+    db.expire_all()
+    lines = db.get(Job, job_id).log_lines
+    assert lines[:3] == ["Job accepted.", "Starting Playwright tests...", "Starting tests for URL: https://example.com"]
+    assert lines[-1].startswith("All tests passed")
+    assert db.query(JobLog).count() == len(lines) - 1
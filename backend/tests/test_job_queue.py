@@ -0,0 +1,70 @@
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from backend.agent.job_queue import claim_job, queue_position, renew_lease, requeue_expired
+from backend.database.models import Base, Job
+
+@pytest.fixture
+def queue_db():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    try:
+        yield session
+    finally:
+        session.close()
+
+def add_job(db, url="https://example.com", **fields):
+    job = Job(status="PENDING", logs=[], test_url=url, context={}, **fields)
+    db.add(job)
+    db.commit()
+    return job
+
+def test_claims_oldest_pending_job_once(queue_db):
+    older = add_job(queue_db, created_at=datetime.utcnow() - timedelta(minutes=1))
+    newer = add_job(queue_db)
+
+    first = claim_job(queue_db, "worker-0")
+    second = claim_job(queue_db, "worker-1")
+
+    assert first.id == older.id
+    assert second.id == newer.id
+    assert first.status == "RUNNING" and first.worker_id == "worker-0"
+    assert first.attempts == 1
+    assert claim_job(queue_db, "worker-2") is None
+
+def test_expired_lease_is_requeued_and_renewal_prevents_it(queue_db):
+    add_job(queue_db)
+    add_job(queue_db)
+    lost = claim_job(queue_db, "worker-0", lease_seconds=-1)
+    healthy = claim_job(queue_db, "worker-1", lease_seconds=-1)
+    assert renew_lease(queue_db, healthy.id, "worker-1")
+    assert not renew_lease(queue_db, healthy.id, "worker-0")
+
+    assert requeue_expired(queue_db) == [lost.id]
+    queue_db.refresh(lost)
+    assert lost.status == "PENDING"
+    assert lost.worker_id is None
+    assert claim_job(queue_db, "worker-2").id == lost.id
+
+def test_job_fails_after_max_attempts(queue_db):
+    job = add_job(queue_db, attempts=2)
+    claim_job(queue_db, "worker-0", lease_seconds=-1)
+
+    requeue_expired(queue_db, max_attempts=3)
+    queue_db.refresh(job)
+    assert job.status == "ERROR"
+
+def test_claims_by_priority_then_users_with_fewest_running_jobs(queue_db):
+    old = datetime.utcnow() - timedelta(minutes=5)
+    add_job(queue_db, requested_by="alice", created_at=old)
+    busy = add_job(queue_db, requested_by="alice", created_at=old + timedelta(seconds=1))
+    idle = add_job(queue_db, requested_by="bob")
+    urgent = add_job(queue_db, requested_by="alice", priority=5)
+
+    assert claim_job(queue_db, "worker-0").id == urgent.id
+    # Alice already has a job running, so Bob's newer job goes before her older one
+    assert claim_job(queue_db, "worker-1").id == idle.id
+    assert queue_position(queue_db, busy) == 2
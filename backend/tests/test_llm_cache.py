@@ -0,0 +1,98 @@
+import asyncio
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from backend.agent.llm_cache import LLMCache, normalize_prompt
+from backend.database.models import LLMResponse
+from backend.tests.conftest import memory_session_factory
+
+class FakeClient:
+    """Async OpenAI-style client that answers after a short delay and counts its calls"""
+
+    def __init__(self):
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=self)
+
+    async def create(self, model, messages, **params):
+        self.calls += 1
+        await asyncio.sleep(0.02)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=f"answer {self.calls}"))],
+                               usage=SimpleNamespace(prompt_tokens=120, completion_tokens=30))
+
+def prompt(text):
+    return [{"role": "system", "content": "You are a QA expert."}, {"role": "user", "content": text}]
+
+def test_same_failure_is_answered_from_the_cache():
+    factory = memory_session_factory()
+    cache = LLMCache(session_factory=factory)
+    client = FakeClient()
+
+    async def scenario():
+        first = await cache.complete(client, "gpt", prompt("Error: Timeout 10000ms at 2026-01-02T03:04:05Z"))
+        # Timestamps, durations and spacing differ between runs of the same failure
+        again = await cache.complete(client, "gpt", prompt("Error:  Timeout 12000ms\nat 2026-02-03T04:05:06Z"))
+        other_model = await cache.complete(client, "gpt-4", prompt("Error: Timeout 10000ms at 2026-01-02T03:04:05Z"))
+        # Another process with an empty memory finds the stored answer
+        restarted = LLMCache(session_factory=factory)
+        from_db = await restarted.complete(client, "gpt", prompt("Error: Timeout 1ms at 2026-01-02T03:04:05Z"))
+        return first, again, other_model, from_db
+
+    first, again, other_model, from_db = asyncio.run(scenario())
+
+    assert (first, again, other_model, from_db) == ("answer 1", "answer 1", "answer 2", "answer 1")
+    assert client.calls == 2
+    stats = cache.stats()
+    assert stats["hits"] == 1 and stats["memory_hits"] == 1 and stats["misses"] == 2
+    assert stats["hit_rate"] == 0.333 and stats["saved_tokens"] == 150 and stats["saved_latency_ms"] >= 20
+    assert normalize_prompt("HTTP 503 at  2026-01-02 03:04:05") == "HTTP 503 at <time>"
+
+def test_expired_and_invalidated_answers_are_not_reused():
+    factory = memory_session_factory()
+    cache = LLMCache(session_factory=factory, ttl_seconds=60)
+    client = FakeClient()
+
+    async def ask(model="gpt"):
+        return await cache.complete(client, model, prompt("Page title is empty or missing"))
+
+    asyncio.run(ask())
+    asyncio.run(ask("gpt-4"))
+    db = factory()
+    db.query(LLMResponse).update({LLMResponse.created_at: datetime.utcnow() - timedelta(seconds=61)})
+    db.commit()
+    cache._memory.clear()
+    assert asyncio.run(ask()) == "answer 3"
+    assert db.query(LLMResponse).count() == 2
+
+    assert cache.invalidate("gpt") == 1
+    assert asyncio.run(ask()) == "answer 4"
+    assert cache.invalidate() == 2 and cache.stats()["memory_entries"] == 0
+
+def test_identical_prompts_in_flight_share_one_call():
+    cache = LLMCache(session_factory=memory_session_factory())
+    client = FakeClient()
+
+    async def scenario():
+        return await asyncio.gather(*(cache.complete(client, "gpt", prompt("HTTP 503")) for _ in range(5)))
+
+    assert asyncio.run(scenario()) == ["answer 1"] * 5
+    assert client.calls == 1
+
+def test_answers_the_caller_rejects_are_not_cached():
+    factory = memory_session_factory()
+    cache = LLMCache(session_factory=factory)
+    client = FakeClient()
+
+    def parse(content):
+        return content if content != "answer 1" else None
+
+    async def ask(parse=None):
+        return await cache.complete(client, "gpt", prompt("Element not found"), parse=parse)
+
+    assert asyncio.run(ask(parse)) is None
+    assert factory().query(LLMResponse).count() == 0
+    assert asyncio.run(ask(parse)) == "answer 2"
+    assert asyncio.run(ask(parse)) == "answer 2" and client.calls == 2
+
+    # An answer cached before a stricter caller rejects it is dropped and asked again
+    assert asyncio.run(ask(lambda content: None if content == "answer 2" else content)) == "answer 3"
+    assert cache.stats()["rejected"] == 1
+    assert [row.content for row in factory().query(LLMResponse)] == ["answer 3"]
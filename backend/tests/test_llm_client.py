@@ -0,0 +1,60 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+from backend.agent import analyzer as analyzer_module
+from backend.agent.analyzer import analyze_test_run_async
+from backend.agent.llm_client import LLMClient, llm_client
+from backend.benchmarks.mock_llm import MockLLM
+from backend.config import settings
+from backend.tests.conftest import memory_session_factory
+
+def test_analyzers_share_the_process_wide_client():
+    assert analyzer_module.TestAnalyzer().client is llm_client
+
+def test_jobs_reuse_pooled_connections_to_the_llm():
+    db = memory_session_factory()()
+    failures = [{"test": f"Check {number}", "error": "Element not found"} for number in range(4)]
+
+    with MockLLM(lambda prompt: 0.05) as llm, patch.object(settings, "OPENAI_BASE_URL", llm.url), \
+         patch.object(settings, "LLM_CACHE_ENABLED", False):
+        client = LLMClient(api_key="test", max_concurrency=2)
+
+        async def scenario():
+            try:
+                for job_id in ("job-1", "job-2", "job-3"):
+                    await analyze_test_run_async(job_id, {"failures": failures}, {}, "uTest", db,
+                                                 analyzer=analyzer_module.TestAnalyzer(client=client), batch=False)
+            finally:
+                await client.close()
+
+        asyncio.run(scenario())
+
+    # Twelve requests over the two keep-alive connections the concurrency limit allows
+    assert llm.requests == 12 and llm.peak_in_flight == 2
+    assert len(llm.connections) == 2
+    assert client.stats()["peak_in_flight"] == 2 and client.stats()["failures"] == 0
+
+def test_client_of_a_previous_event_loop_is_closed():
+    client = LLMClient(api_key="test")
+
+    async def current():
+        return await client.openai_client()
+
+    first = asyncio.run(current())
+    second = asyncio.run(current())
+
+    assert second is not first and first.is_closed()
+    asyncio.run(client.close())
+
+def test_sync_client_is_limited_across_threads():
+    messages = [{"role": "user", "content": "Test Failure: Check 1"}]
+
+    with MockLLM(lambda prompt: 0.1) as llm, patch.object(settings, "OPENAI_BASE_URL", llm.url):
+        client = LLMClient(api_key="test", max_concurrency=2)
+        with ThreadPoolExecutor(max_workers=6) as threads:
+            list(threads.map(lambda _: client.sync_client.chat.completions.create(model="gpt", messages=messages),
+                             range(6)))
+        asyncio.run(client.close())
+
+    assert llm.requests == 6 and llm.peak_in_flight == 2
+    assert client.stats()["peak_in_flight"] == 2
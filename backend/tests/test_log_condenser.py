@@ -0,0 +1,37 @@
+from backend.agent.log_condenser import condense_logs, estimate_tokens
+
+def test_repeats_colours_timestamps_and_ids_are_folded_away():
+    lines = [
+        "\x1b[32m2026-01-02T03:04:05.123Z INFO\x1b[0m Polling job 3f2b8c1e-0d4a-4c61-9a57-2b1f0e6c9d10",
+        "2026-01-02T03:04:06.456Z INFO Polling job 9a1d2e3f-4b5c-4d6e-8f70-1a2b3c4d5e6f",
+        "[12:00:01] WARN retrying request",
+        "",
+        "[12:00:02] WARN retrying request",
+        "2026-01-02T03:04:07Z INFO Polling job 11111111-2222-3333-4444-555555555555",
+    ]
+
+    assert condense_logs(lines).splitlines() == [
+        "INFO Polling job <id> [x3]",
+        "WARN retrying request [x2]",
+    ]
+
+def test_budget_keeps_the_first_error_with_its_stack_and_the_end_of_the_log():
+    lines = [f"INFO step {number} ok" for number in range(5000)]
+    lines[100:104] = [
+        "ERROR Unhandled exception in checkout",
+        "Traceback (most recent call last):",
+        '  File "shop/cart.py", line 42, in total',
+        "KeyError: 'price'",
+    ]
+    lines.append("Tests completed: 3/5 passed")
+
+    condensed = condense_logs(lines, max_tokens=300)
+
+    assert estimate_tokens(condensed) + len(condensed.splitlines()) <= 300
+    kept = condensed.splitlines()
+    assert kept[0] == "INFO step 0 ok" and kept[-1] == "Tests completed: 3/5 passed"
+    start = kept.index("ERROR Unhandled exception in checkout")
+    assert kept[start - 2:start + 4] == [
+        "INFO step 98 ok", "INFO step 99 ok", "ERROR Unhandled exception in checkout",
+        "Traceback (most recent call last):", '  File "shop/cart.py", line 42, in total', "KeyError: 'price'"]
+    assert any(line.startswith("... ") and line.endswith(" lines omitted ...") for line in kept)
@@ -81,3 +81,122 @@ def test_run_tests_trigger(mock_get_current_user, mock_execute_tests, client_wit
     mock_execute_tests.assert_called_once()
 
 
+
+def test_health_latency_flat_while_jobs_run(fake_playwright, db_session):
+    import asyncio
+    import time
+    import httpx
+    from backend.main import execute_tests_task
+    from backend.agent.browser_pool import BrowserPool
+    from backend.database.models import Job
+
+    fake_playwright.goto_delay = 0.5
+    job_ids = []
+    for _ in range(4):
+        job = Job(status="PENDING", logs=["Job accepted."])
+        db_session.add(job)
+        db_session.commit()
+        job_ids.append(job.id)
+
+    async def timed_health(client):
+        started = time.perf_counter()
+        response = await client.get("/health")
+        assert response.status_code == 200
+        return time.perf_counter() - started
+
+    pool = BrowserPool(size=1, contexts_per_browser=4)
+
+    async def scenario():
+        await pool.start()
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            baseline = await timed_health(client)
+            jobs = [
+                asyncio.create_task(execute_tests_task(job_id, "https://example.com", "uTest", {}))
+                for job_id in job_ids
+            ]
+            latencies = []
+            while not all(job.done() for job in jobs):
+                latencies.append(await timed_health(client))
+                await asyncio.sleep(0.02)
+            await asyncio.gather(*jobs)
+        await pool.stop()
+        return baseline, latencies
+
+    with patch("backend.agent.executor.SessionLocal", lambda: db_session), \
+         patch.object(db_session, "close"), \
+         patch("backend.agent.runner.browser_pool", pool):
+        baseline, latencies = asyncio.run(scenario())
+
+    assert len(latencies) >= 5
+    assert len(fake_playwright.launched) == 1
+    assert max(latencies) < baseline + 0.2
+    for job_id in job_ids:
+        assert db_session.get(Job, job_id).status == "COMPLETED"
+
+def test_cancel_running_job(fake_playwright, db_session):
+    import asyncio
+    import httpx
+    from backend.main import execute_tests_task
+    from backend.agent.browser_pool import BrowserPool
+    from backend.database.models import Job
+
+    fake_playwright.goto_delay = 5
+    job = Job(status="PENDING", logs=["Job accepted."])
+    db_session.add(job)
+    db_session.commit()
+    pool = BrowserPool(size=1, contexts_per_browser=1)
+
+    async def scenario():
+        await pool.start()
+        run = asyncio.create_task(execute_tests_task(job.id, "https://example.com", "uTest", {}))
+        await asyncio.sleep(0.1)
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.post(f"/jobs/{job.id}/cancel")
+            await asyncio.wait_for(run, timeout=2)
+            repeat = await client.post(f"/jobs/{job.id}/cancel")
+        stats = pool.stats()
+        await pool.stop()
+        return response, repeat, stats
+
+    with patch("backend.agent.executor.SessionLocal", lambda: db_session), \
+         patch.object(db_session, "close"), \
+         patch("backend.agent.runner.browser_pool", pool):
+        app.dependency_overrides[get_db] = lambda: db_session
+        try:
+            response, repeat, stats = asyncio.run(scenario())
+        finally:
+            del app.dependency_overrides[get_db]
+
+    assert response.status_code == 200
+    assert response.json()["status"] == "CANCELLED"
+    assert repeat.status_code == 409
+    assert stats["in_use"] == 0
+    db_session.refresh(job)
+    assert job.status == "CANCELLED"
+
+@patch("backend.main.execute_tests_task")
+def test_run_tests_returns_cached_result_for_unchanged_page(mock_execute_tests, client_with_db, db_session):
+    import httpx
+    from backend.agent.preflight import PreflightClient
+    from backend.agent.result_cache import cache_key, result_cache
+    from backend.database.models import Job
+
+    client = PreflightClient(transport=httpx.MockTransport(
+        lambda request: httpx.Response(200, headers={"ETag": '"v1"'})))
+    request = {"test_url": "https://example.com", "cycle_overview": "", "testing_instructions": ""}
+    options = {"fast": False, "mode": "basic", "shards": None, "video": False, "trace": False, "har": False}
+    previous = Job(status="COMPLETED", logs=["Job accepted."], test_url="https://example.com",
+                   cache_key=cache_key("https://example.com", "uTest", {"overview": "", "instructions": ""}, options),
+                   fingerprint='200 https://example.com etag:"v1"')
+    db_session.add(previous)
+    db_session.commit()
+
+    with patch.object(result_cache, "client", client):
+        cached = client_with_db.post("/run-tests", json=request).json()
+        forced = client_with_db.post("/run-tests", json={**request, "no_cache": True}).json()
+
+    assert cached["id"] == previous.id and cached["cached"] is True
+    assert forced["id"] != previous.id and forced["cached"] is False
+    mock_execute_tests.assert_called_once()
@@ -0,0 +1,56 @@
+import asyncio
+from backend.agent.network import NetworkRecorder, resource_sizes
+
+class FakeRequest:
+    def __init__(self, url, resource_type, body_size=0):
+        self.url = url
+        self.resource_type = resource_type
+        self.body_size = body_size
+
+    async def sizes(self):
+        return {"responseBodySize": self.body_size, "responseHeadersSize": 100}
+
+class FakeRoute:
+    def __init__(self, request):
+        self.request = request
+        self.outcome = None
+
+    async def abort(self, error_code=None):
+        self.outcome = "aborted"
+
+    async def continue_(self):
+        self.outcome = "continued"
+
+def test_fast_mode_blocks_heavy_resources_and_blocklisted_domains():
+    recorder = NetworkRecorder(fast=True, blocked_types=["image", "font"], blocked_domains=["analytics.example"])
+    resource_sizes.record("https://site.example/hero.png", 50000)
+    routes = [
+        FakeRoute(FakeRequest("https://site.example/", "document")),
+        FakeRoute(FakeRequest("https://site.example/hero.png", "image")),
+        FakeRoute(FakeRequest("https://cdn.analytics.example/a.js", "script")),
+        FakeRoute(FakeRequest("https://site.example/app.js", "script")),
+    ]
+
+    async def scenario():
+        for route in routes:
+            await recorder._route(route)
+
+    asyncio.run(scenario())
+    assert [r.outcome for r in routes] == ["continued", "aborted", "aborted", "continued"]
+    stats = recorder.stats()
+    assert stats["mode"] == "fast"
+    assert stats["blocked_requests"] == 2
+    assert stats["blocked_by_type"] == {"image": 1, "script": 1}
+    assert stats["blocked_bytes_estimate"] == 50000
+
+def test_full_mode_records_transferred_bytes():
+    recorder = NetworkRecorder(fast=False)
+
+    async def scenario():
+        await recorder._on_request_finished(FakeRequest("https://site.example/big.jpg", "image", 2000))
+        await recorder._on_request_finished(FakeRequest("https://site.example/", "document", 500))
+
+    asyncio.run(scenario())
+    assert recorder.stats()["requests"] == 2
+    assert recorder.stats()["bytes"] == 2700
+    assert resource_sizes.get("https://site.example/big.jpg") == 2100
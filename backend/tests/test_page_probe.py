@@ -0,0 +1,48 @@
+from unittest.mock import patch
+from backend.config import settings
+from backend.tests.conftest import run_with_pool
+
+def test_console_errors_logged_during_navigation_fail_the_check(fake_playwright):
+    fake_playwright.console = [("log", "hello"), ("error", "TypeError: x is undefined"),
+                               ("error", "Failed to load resource: net::ERR_BLOCKED_BY_CLIENT")]
+
+    results = run_with_pool()
+
+    assert results["status"] == "FAILED"
+    assert results["console"]["errors"] == 2
+    assert [(f["test"], f["error"]) for f in results["failures"]] == [(
+        "Console Errors Check",
+        "TypeError: x is undefined; Failed to load resource: net::ERR_BLOCKED_BY_CLIENT",
+    )]
+
+def test_fast_mode_ignores_requests_it_blocked_itself(fake_playwright):
+    fake_playwright.console = [("error", "Failed to load resource: net::ERR_BLOCKED_BY_CLIENT")]
+
+    results = run_with_pool(options={"fast": True})
+
+    assert results["status"] == "COMPLETED"
+    assert results["console"] == {"errors": 0, "samples": []}
+
+def test_interactive_elements_come_from_one_probe(fake_playwright):
+    results = run_with_pool()
+    assert results["interactive"]["visible"]["clickable"] == 1
+    assert any(line.startswith("✅ Interactive elements: 1 buttons, 1 links, 1 form fields in 1 forms")
+               for line in results["logs"])
+
+    fake_playwright.interactive = {"counts": {"clickable": 2, "links": 0, "forms": 0, "inputs": 0},
+                                   "visible": {"clickable": 0, "links": 0, "forms": 0, "inputs": 0},
+                                   "unlabeled": 0, "sample": []}
+    results = run_with_pool()
+    assert [(f["test"], f["error"]) for f in results["failures"]] == [
+        ("Interactive Elements Check", "No visible buttons, links or form fields found")]
+
+def test_console_and_interactive_checks_can_be_turned_off(fake_playwright):
+    fake_playwright.console = [("error", "TypeError: x is undefined")]
+
+    with patch.object(settings, "CONSOLE_CHECK_ENABLED", False), \
+         patch.object(settings, "INTERACTIVE_CHECK_ENABLED", False):
+        results = run_with_pool()
+
+    assert results["status"] == "COMPLETED"
+    assert set(results["timings"]) == {"Page Load", "Title Check", "Basic Elements Check"}
+    assert "console" not in results and "interactive" not in results
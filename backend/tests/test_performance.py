@@ -0,0 +1,99 @@
+import asyncio
+from unittest.mock import patch
+import pytest
+from backend.agent import performance
+from backend.agent.browser_pool import BrowserPool
+from backend.agent.executor import execute_job
+from backend.config import settings
+from backend.database.models import Bug, Job, PerfMetric
+from backend.tests.conftest import memory_session_factory, run_with_pool
+
+def metrics(**overrides):
+    values = {"ttfb_ms": 100, "fcp_ms": 500, "dom_content_loaded_ms": 600, "load_ms": 1000,
+              "lcp_ms": 2000, "cls": 0.05, "tbt_ms": 100, "long_tasks": 2, "transfer_bytes": 1000}
+    values.update(overrides)
+    return values
+
+@pytest.fixture
+def perf_metrics():
+    with patch.object(settings, "PERF_METRICS_ENABLED", True):
+        yield
+
+def test_metrics_are_off_by_default(fake_playwright):
+    results = run_with_pool()
+
+    assert results["status"] == "COMPLETED"
+    assert "performance" not in results and "Performance Metrics" not in results["timings"]
+
+def test_metrics_are_collected_and_checked_against_budgets(fake_playwright, perf_metrics):
+    results = run_with_pool()
+    assert results["status"] == "COMPLETED"
+    assert results["performance"]["lcp_ms"] == 1200
+    assert any(line.startswith("✅ Performance: TTFB 80ms") for line in results["logs"])
+
+    fake_playwright.metrics = metrics(lcp_ms=5200.4, cls=0.31)
+    results = run_with_pool()
+    assert results["status"] == "FAILED"
+    assert [(f["test"], f["error"]) for f in results["failures"]] == [(
+        "Performance Metrics",
+        "LCP 5200ms exceeds the 4000ms budget; CLS 0.310 exceeds the 0.250 budget",
+    )]
+
+def test_regressions_are_measured_against_the_median_of_recent_runs():
+    db = memory_session_factory()()
+    url = "https://example.com"
+
+    # No baseline until enough runs have been recorded
+    for lcp in (2000, 2100, 1900):
+        assert performance.record_run(db, "job", url, metrics(lcp_ms=lcp)) == []
+    db.commit()
+
+    assert performance.baseline(db, url)["lcp_ms"] == 2000
+    assert performance.record_run(db, "job", url, metrics(lcp_ms=2400, tbt_ms=120)) == []
+
+    failures = performance.record_run(db, "job", url, metrics(lcp_ms=3100, cls=0.06, ttfb_ms=130))
+    assert [f["error"] for f in failures] == ["LCP regressed to 3100ms, 51% above the 2050ms baseline"]
+    assert db.query(PerfMetric).count() == 5
+
+def test_trends_group_history_by_url():
+    db = memory_session_factory()()
+    for url, lcp in [("https://a.example", 1000), ("https://b.example", 3000), ("https://a.example", 1100)]:
+        performance.record_run(db, "job", url, metrics(lcp_ms=lcp))
+    db.commit()
+
+    trends = performance.trends(db)
+    assert [(t["url"], t["runs"]) for t in trends] == [("https://a.example", 2), ("https://b.example", 1)]
+    assert [row.lcp_ms for row in trends[0]["history"]] == [1000, 1100]
+    assert trends[0]["latest"].lcp_ms == 1100
+    assert [t["url"] for t in performance.trends(db, url="https://b.example")] == ["https://b.example"]
+
+def test_regression_fails_the_job_and_files_a_bug(fake_playwright, perf_metrics):
+    session_factory = memory_session_factory()
+    db = session_factory()
+    for _ in range(3):
+        performance.record_run(db, "earlier", "https://example.com", metrics(lcp_ms=1000))
+    job = Job(status="PENDING", logs=["Job accepted."])
+    db.add(job)
+    db.commit()
+    job_id = job.id
+    fake_playwright.metrics = metrics(lcp_ms=1800)
+
+    async def notify(job_id, message):
+        pass
+
+    async def scenario():
+        pool = BrowserPool(size=1)
+        await pool.start()
+        with patch("backend.agent.runner.browser_pool", pool), \
+             patch("backend.agent.executor.SessionLocal", session_factory):
+            await execute_job(job_id, "https://example.com", "uTest", {}, notify)
+        await pool.stop()
+
+    asyncio.run(scenario())
+
+    db.expire_all()
+    assert db.get(Job, job_id).status == "FAILED"
+    assert any(line.startswith("❌ Performance regression: LCP regressed to 1800ms")
+               for line in db.get(Job, job_id).log_lines)
+    assert [bug.test_name for bug in db.query(Bug).all()] == ["Performance Metrics"]
+    assert db.query(PerfMetric).filter(PerfMetric.job_id == job_id).count() == 1
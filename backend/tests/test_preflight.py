@@ -0,0 +1,88 @@
+import asyncio
+import httpx
+from unittest.mock import patch
+from backend.config import settings
+from backend.agent import runner
+from backend.agent.preflight import PreflightClient
+
+def routing_transport(routes):
+    def handler(request):
+        outcome = routes[request.url.path]
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+    return httpx.MockTransport(handler)
+
+def test_follows_redirects_and_passes_client_errors_to_browser():
+    transport = routing_transport({
+        "/old": httpx.Response(301, headers={"Location": "https://site.example/new"}),
+        "/new": httpx.Response(403),
+    })
+    result = asyncio.run(PreflightClient(transport=transport).check("https://site.example/old"))
+    assert result.ok
+    assert result.status == 403
+    assert result.redirects == ["https://site.example/old"]
+    assert result.final_url == "https://site.example/new"
+    assert result.tls is True
+
+def test_server_and_connection_errors_fail_fast():
+    transport = routing_transport({
+        "/down": httpx.Response(503),
+        "/refused": httpx.ConnectError("[Errno 111] Connection refused"),
+        "/tls": httpx.ConnectError("[SSL: CERTIFICATE_VERIFY_FAILED] certificate verify failed"),
+    })
+    client = PreflightClient(transport=transport)
+
+    async def scenario():
+        return [await client.check(f"https://site.example/{path}") for path in ("down", "refused", "tls")]
+
+    down, refused, tls = asyncio.run(scenario())
+    assert down.as_failure() == {"test": "Page Load", "error": "HTTP 503"}
+    assert refused.error.startswith("Connection failed")
+    assert tls.error.startswith("TLS error") and tls.tls is False
+
+def test_runner_skips_browser_when_preflight_fails(fake_playwright):
+    transport = routing_transport({"/": httpx.ConnectError("Name or service not known")})
+
+    async def scenario():
+        return await runner.TestRunner().run_basic_tests("https://unreachable.example/")
+
+    with patch.object(settings, "PREFLIGHT_ENABLED", True), \
+         patch("backend.agent.runner.preflight_client", PreflightClient(transport=transport)):
+        results = asyncio.run(scenario())
+
+    assert results["status"] == "FAILED"
+    assert results["failures"] == [{"test": "Page Load", "error": "Connection failed: Name or service not known"}]
+    assert results["tests_run"] == 1
+    assert fake_playwright.launched == []
+
+def test_timeouts_and_other_errors_leave_the_verdict_to_the_browser(fake_playwright):
+    transport = routing_transport({
+        "/slow": httpx.ReadTimeout("timed out"),
+        "/reset": httpx.RemoteProtocolError("Server disconnected without sending a response"),
+    })
+    client = PreflightClient(transport=transport)
+
+    async def scenario():
+        return [await client.check(f"https://site.example/{path}") for path in ("slow", "reset")]
+
+    slow, reset = asyncio.run(scenario())
+    assert slow.ok and slow.status is None and slow.error.startswith("Timed out")
+    assert reset.ok and reset.error.startswith("HTTP error")
+
+    with patch.object(settings, "PREFLIGHT_ENABLED", True), \
+         patch("backend.agent.runner.preflight_client", client):
+        results = asyncio.run(runner.TestRunner().run_basic_tests("https://site.example/slow"))
+
+    assert results["status"] == "COMPLETED"
+    assert any(line.startswith("Pre-flight inconclusive: Timed out") for line in results["logs"])
+    assert len(fake_playwright.launched) == 1
+
+def test_client_of_a_previous_event_loop_is_closed():
+    client = PreflightClient(transport=routing_transport({"/": httpx.Response(200)}))
+
+    asyncio.run(client.check("https://site.example/"))
+    first = client._client
+    asyncio.run(client.check("https://site.example/"))
+
+    assert first.is_closed and client._client is not first
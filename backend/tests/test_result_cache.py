@@ -0,0 +1,87 @@
+import asyncio
+from datetime import datetime, timedelta
+import httpx
+from backend.agent.preflight import PreflightClient
+from backend.agent.result_cache import ResultCache, cache_key
+from backend.database.models import Job
+from backend.tests.conftest import memory_session_factory
+
+def site(pages):
+    return PreflightClient(transport=httpx.MockTransport(lambda request: pages[request.url.path]))
+
+def test_fingerprint_is_a_head_probe_for_validators():
+    methods = []
+
+    def handler(request):
+        methods.append(request.method)
+        return {
+            "/etag": httpx.Response(200, headers={"ETag": '"v1"'}),
+            "/modified": httpx.Response(200, headers={"Last-Modified": "Wed, 21 Oct 2026 07:28:00 GMT"}),
+            "/plain": httpx.Response(200),
+            "/missing": httpx.Response(404, headers={"ETag": '"gone"'}),
+        }[request.url.path]
+
+    client = PreflightClient(transport=httpx.MockTransport(handler))
+
+    async def scenario():
+        return {path: await client.fingerprint(f"https://site.example/{path}")
+                for path in ("etag", "modified", "plain", "missing")}
+
+    prints = asyncio.run(scenario())
+
+    assert prints["etag"] == '200 https://site.example/etag etag:"v1"'
+    assert prints["modified"] == "200 https://site.example/modified last-modified:Wed, 21 Oct 2026 07:28:00 GMT"
+    # Without a validator the page would have to be downloaded, so it is not cached
+    assert prints["plain"] is None
+    assert prints["missing"] is None
+    assert set(methods) == {"HEAD"}
+    assert asyncio.run(client.fingerprint("http://[::1/")) is None
+
+def test_lookup_reuses_a_recent_job_for_the_unchanged_page():
+    db = memory_session_factory()()
+    pages = {"/": httpx.Response(200, headers={"ETag": '"v1"'})}
+    cache = ResultCache(client=site(pages), ttl_seconds=600)
+    url = "https://site.example/"
+    key = cache_key(url, "uTest", {}, {"fast": False})
+
+    async def lookup(bypass=False, key=key):
+        return await cache.lookup(db, key, url, bypass=bypass)
+
+    cached, fingerprint = asyncio.run(lookup())
+    assert cached is None
+    db.add(Job(status="FAILED", test_url=url, cache_key=key, fingerprint=fingerprint))
+    db.commit()
+
+    cached, _ = asyncio.run(lookup())
+    assert cached.status == "FAILED"
+
+    # Bypassing sends no probe at all
+    pages.clear()
+    assert asyncio.run(lookup(bypass=True)) == (None, None)
+    pages["/"] = httpx.Response(200, headers={"ETag": '"v1"'})
+
+    # Different options are a different result
+    assert asyncio.run(lookup(key=cache_key(url, "uTest", {}, {"fast": True})))[0] is None
+
+    # A changed page does not match
+    pages["/"] = httpx.Response(200, headers={"ETag": '"v2"'})
+    assert asyncio.run(lookup())[0] is None
+
+    assert cache.stats() == {"enabled": True, "ttl_seconds": 600, "hits": 1, "misses": 3, "bypassed": 1,
+                             "unfingerprinted": 0, "hit_ratio": 0.25}
+
+def test_expired_and_unsettled_jobs_are_not_reused():
+    db = memory_session_factory()()
+    cache = ResultCache(client=site({"/": httpx.Response(200, headers={"ETag": '"v1"'})}), ttl_seconds=60)
+    url = "https://site.example/"
+    key = cache_key(url, "uTest", {}, {})
+    fingerprint = '200 https://site.example/ etag:"v1"'
+    db.add_all([
+        Job(status="COMPLETED", cache_key=key, fingerprint=fingerprint,
+            updated_at=datetime.utcnow() - timedelta(minutes=5)),
+        Job(status="ERROR", cache_key=key, fingerprint=fingerprint),
+        Job(status="RUNNING", cache_key=key, fingerprint=fingerprint),
+    ])
+    db.commit()
+
+    assert asyncio.run(cache.lookup(db, key, url)) == (None, fingerprint)
@@ -0,0 +1,176 @@
+import asyncio
+from unittest.mock import patch
+import httpx
+import pytest
+from backend.agent.scheduler import JobScheduler, QueueFull, parse_weights
+from backend.database.models import Job
+from backend.main import app, get_db, job_scheduler
+from backend.tests.conftest import memory_session_factory
+
+def run_order(scheduler, submissions):
+    """Submit (job_id, user, priority) while one run holds the only slot; return the order they ran in"""
+    started = []
+
+    async def scenario():
+        gate = asyncio.Event()
+
+        def start(job_id):
+            async def run():
+                started.append(job_id)
+                await gate.wait()
+            return run
+
+        scheduler.submit("blocker", "nobody", 0, start("blocker"))
+        await asyncio.sleep(0)
+        for job_id, user, priority in submissions:
+            scheduler.submit(job_id, user, priority, start(job_id))
+        positions = {job_id: scheduler.position(job_id) for job_id, _, _ in submissions}
+        gate.set()
+        while scheduler.stats()["running"] or scheduler.queued:
+            await asyncio.sleep(0.01)
+        return positions
+
+    positions = asyncio.run(scenario())
+    return started[1:], positions
+
+def test_users_take_turns_regardless_of_batch_size():
+    scheduler = JobScheduler(max_concurrent=1, max_queued=50, max_queued_per_user=50, weights={})
+    batch = [(f"a{i}", "alice", 0) for i in range(4)] + [("b0", "bob", 0), ("b1", "bob", 0)]
+
+    order, positions = run_order(scheduler, batch)
+
+    assert order == ["a0", "b0", "a1", "b1", "a2", "a3"]
+    # Positions predict the order runs actually start in
+    assert sorted(positions, key=positions.get) == order
+
+def test_weights_and_priorities():
+    scheduler = JobScheduler(max_concurrent=1, max_queued=50, max_queued_per_user=50, weights=parse_weights("ci=2"))
+    batch = [(f"ci{i}", "ci", 0) for i in range(4)] + [(f"b{i}", "bob", 0) for i in range(2)] + [("urgent", "bob", 5)]
+
+    order, _ = run_order(scheduler, batch)
+
+    assert order == ["urgent", "ci0", "b0", "ci1", "ci2", "b1", "ci3"]
+
+def test_full_queue_is_rejected_with_a_retry_estimate():
+    scheduler = JobScheduler(max_concurrent=1, max_queued=3, max_queued_per_user=2, weights={})
+
+    async def scenario():
+        never = asyncio.Event()
+
+        async def run():
+            await never.wait()
+
+        for job_id in ("running", "a1", "a2"):
+            scheduler.submit(job_id, "alice", 0, run)
+        with pytest.raises(QueueFull) as per_user:
+            scheduler.submit("a3", "alice", 0, run)
+        scheduler.submit("b1", "bob", 0, run)
+        with pytest.raises(QueueFull) as full:
+            scheduler.submit("c1", "carol", 0, run)
+
+        # Alice's running job already used her turn, so Bob is next
+        assert scheduler.remove("a2") and scheduler.position("b1") == 1
+        scheduler.submit("c1", "carol", 0, run)
+
+        never.set()
+        while scheduler.stats()["running"] or scheduler.queued:
+            await asyncio.sleep(0.01)
+        return per_user.value, full.value
+
+    per_user, full = asyncio.run(scenario())
+
+    assert "already have 2 jobs waiting" in str(per_user)
+    assert full.retry_after == 90  # Three waiting runs at the default 30s each, one at a time
+    assert scheduler.stats()["rejected_total"] == 2 and scheduler.stats()["started_total"] == 4
+
+def test_run_tests_returns_429_when_the_queue_is_full():
+    factory = memory_session_factory()
+
+    def override_get_db():
+        db = factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    async def scenario():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://api") as client:
+            return await client.post("/run-tests", json={"test_url": "https://example.com", "no_cache": True})
+
+    app.dependency_overrides[get_db] = override_get_db
+    try:
+        with patch.object(job_scheduler, "max_queued", 0), \
+             patch("backend.main.result_cache.lookup", return_value=(None, None)):
+            response = asyncio.run(scenario())
+    finally:
+        del app.dependency_overrides[get_db]
+
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
+
+def test_concurrent_requests_cannot_overfill_the_queue_or_leave_orphan_jobs():
+    factory = memory_session_factory()
+
+    def override_get_db():
+        db = factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    async def slow_lookup(db, key, url, bypass=False):
+        await asyncio.sleep(0.01)
+        return None, None
+
+    async def scenario():
+        gate = asyncio.Event()
+
+        async def run(*args, **kwargs):
+            await gate.wait()
+
+        with patch("backend.main.execute_tests_task", side_effect=run):
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://api") as client:
+                responses = await asyncio.gather(*[
+                    client.post("/run-tests", json={"test_url": "https://example.com", "no_cache": True})
+                    for _ in range(4)
+                ])
+            gate.set()
+            while job_scheduler.stats()["running"] or job_scheduler.queued:
+                await asyncio.sleep(0.01)
+        return responses
+
+    app.dependency_overrides[get_db] = override_get_db
+    rejected_before = job_scheduler.rejected_total
+    try:
+        with patch.object(job_scheduler, "max_queued", 1), \
+             patch("backend.main.result_cache.lookup", side_effect=slow_lookup):
+            responses = asyncio.run(scenario())
+    finally:
+        del app.dependency_overrides[get_db]
+
+    assert sorted(r.status_code for r in responses) == [200, 429, 429, 429]
+    # Every job row belongs to an accepted request, and each refusal is counted once
+    db = factory()
+    assert db.query(Job).count() == 1
+    db.close()
+    assert job_scheduler.rejected_total - rejected_before == 3
+    assert not job_scheduler._reserved
+
+def test_each_refused_job_is_counted_once():
+    scheduler = JobScheduler(max_concurrent=1, max_queued=1, max_queued_per_user=1, weights={})
+
+    async def scenario():
+        async def run():
+            pass
+
+        reservation = scheduler.reserve("alice")
+        with pytest.raises(QueueFull):
+            scheduler.reserve("bob")
+        # The reserved place is not checked again, so it cannot be refused twice
+        scheduler.submit("a1", "alice", 0, run, reservation=reservation)
+        while scheduler.stats()["running"] or scheduler.queued:
+            await asyncio.sleep(0.01)
+
+    asyncio.run(scenario())
+
+    assert scheduler.stats()["rejected_total"] == 1 and scheduler.stats()["started_total"] == 1
@@ -0,0 +1,81 @@
+import asyncio
+import textwrap
+import time
+from backend.agent.analyzer import analyze_test_run
+from backend.agent.events import CHECK_FINISHED, FAILURE, EventStream
+from backend.agent.suite_runner import SuiteRunner, failure_from_test
+from unittest.mock import MagicMock
+
+SUITE = textwrap.dedent("""
+    import os
+    import time
+    import pytest
+
+    def test_fails_fast():
+        assert os.environ["TARGET_URL"] == "https://nothing.example"
+
+    def test_slow():
+        time.sleep(2)
+
+    def test_passes():
+        pass
+
+    @pytest.mark.skip(reason="not today")
+    def test_skipped():
+        pass
+""")
+
+def test_suite_streams_results_from_shards(tmp_path):
+    (tmp_path / "test_site.py").write_text(SUITE)
+    seen = []
+    streamed_failures = []
+    started = time.perf_counter()
+
+    async def scenario():
+        events = EventStream()
+
+        async def consume():
+            async for event in events:
+                if event["type"] == CHECK_FINISHED:
+                    seen.append((event["check"].split("::")[-1], event["outcome"], time.perf_counter() - started))
+                elif event["type"] == FAILURE:
+                    streamed_failures.append(event["failure"])
+
+        consumer = asyncio.create_task(consume())
+        results = await SuiteRunner(str(tmp_path), shards=2, events=events).run("https://example.com")
+        events.close()
+        await consumer
+        return results
+
+    results = asyncio.run(scenario())
+
+    assert results["status"] == "FAILED"
+    assert results["tests_run"] == 4
+    assert results["tests_passed"] == 2
+    assert results["tests_failed"] == 1
+    assert sorted(name for name, _, _ in seen) == ["test_fails_fast", "test_passes", "test_skipped", "test_slow"]
+    assert results["report_data"]["summary"] == {"total": 4, "passed": 2, "failed": 1, "skipped": 1}
+
+    # The failure was delivered while the slow test was still running in the other shard
+    failed_at = next(at for name, _, at in seen if name == "test_fails_fast")
+    slow_at = next(at for name, _, at in seen if name == "test_slow")
+    assert failed_at < slow_at - 1
+
+    assert streamed_failures == results["failures"]
+    failure = results["failures"][0]
+    assert failure["test"].endswith("test_fails_fast")
+    assert "AssertionError" in failure["error"] or "assert" in failure["error"]
+    assert "test_fails_fast" in failure["details"]
+
+def test_failures_read_from_report_data():
+    report = {"tests": [
+        {"nodeid": "test_1", "outcome": "failed",
+         "call": {"outcome": "failed", "crash": {"message": "Error"}, "longrepr": "Traceback"}},
+        {"nodeid": "test_2", "outcome": "passed", "call": {"outcome": "passed"}},
+    ]}
+
+    assert [failure_from_test(t) for t in report["tests"]] == [
+        {"test": "test_1", "error": "Error", "details": "Traceback"}, None]
+
+    bugs = analyze_test_run("job-1", {"status": "FAILED", "report_data": report}, {}, "uTest", MagicMock())
+    assert [bug["test_name"] for bug in bugs] == ["test_1"]
@@ -0,0 +1,160 @@
+import asyncio
+from datetime import datetime, timedelta
+from unittest.mock import patch
+import httpx
+import pytest
+from backend.agent.worker_hub import LeaseLost, WorkerHub
+from backend.config import settings
+from backend.database.models import Job
+from backend.main import app, get_db, worker_hub
+from backend.tests.conftest import memory_session_factory
+from backend.worker import WorkerNode
+
+async def notify(job_id, message):
+    pass
+
+def queue_jobs(db, count):
+    jobs = [Job(status="PENDING", logs=["Job accepted."], test_url=f"https://example.com/{index}",
+                provider="uTest", context={}, options={}) for index in range(count)]
+    db.add_all(jobs)
+    db.commit()
+    return [job.id for job in jobs]
+
+@pytest.fixture
+def hub_api():
+    factory = memory_session_factory()
+
+    def override_get_db():
+        db = factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    with patch.object(worker_hub, "session_factory", factory), \
+         patch.object(settings, "REMOTE_WORKERS_ENABLED", True), \
+         patch.object(settings, "REMOTE_WORKER_TOKEN", "shared-secret"), \
+         patch.object(settings, "RESULT_CACHE_ENABLED", False), \
+         patch.object(settings, "REMOTE_WORKER_LONG_POLL_SECONDS", 0.2), \
+         patch.object(settings, "REMOTE_WORKER_HEARTBEAT_SECONDS", 0.1):
+        yield factory
+    del app.dependency_overrides[get_db]
+    worker_hub.workers.clear()
+
+def test_worker_nodes_run_queued_jobs_and_stream_them_back(fake_playwright, hub_api):
+    transport = httpx.ASGITransport(app=app)
+    nodes = [WorkerNode(api_url="http://api", name="box-a", capacity=2, transport=transport),
+             WorkerNode(api_url="http://api", name="box-b", capacity=1, transport=transport)]
+
+    async def scenario():
+        stop = asyncio.Event()
+        running = [asyncio.create_task(node.run(stop)) for node in nodes]
+        async with httpx.AsyncClient(transport=transport, base_url="http://api") as client:
+            job_ids = []
+            for index in range(4):
+                response = await client.post("/run-tests", json={"test_url": f"https://example.com/{index}"})
+                job_ids.append(response.json()["id"])
+
+            db = hub_api()
+            try:
+                for _ in range(200):
+                    db.expire_all()
+                    if all(job.status == "COMPLETED" for job in db.query(Job).filter(Job.id.in_(job_ids))):
+                        break
+                    await asyncio.sleep(0.05)
+                stop.set()
+                await asyncio.gather(*running)
+                metrics = (await client.get("/metrics")).json()["remote_workers"]
+                jobs = db.query(Job).filter(Job.id.in_(job_ids)).all()
+                return [(job.status, job.worker_id, job.log_lines) for job in jobs], metrics
+            finally:
+                db.close()
+
+    jobs, metrics = asyncio.run(scenario())
+
+    assert [status for status, _, _ in jobs] == ["COMPLETED"] * 4
+    for _, _, lines in jobs:
+        assert lines[:2] == ["Job accepted.", "Starting Playwright tests..."]
+        assert any(line.startswith("✅ Page loaded") for line in lines)
+    assert {worker_id.rsplit("-", 1)[0] for _, worker_id, _ in jobs} == {"box-a", "box-b"}
+    assert sum(node.completed_total for node in nodes) == 4
+    assert metrics["workers"] == 2 and metrics["slots"] == 3
+    assert metrics["dispatched_total"] == 4 and metrics["running"] == 0
+
+def test_jobs_go_to_the_polling_worker_with_the_most_free_slots():
+    factory = memory_session_factory()
+    hub = WorkerHub(notify=notify, session_factory=factory)
+    small = hub.register("small", capacity=1)
+    large = hub.register("large", capacity=3)
+
+    async def scenario():
+        polls = [asyncio.create_task(hub.lease(worker.id, worker.capacity, wait_seconds=1))
+                 for worker in (small, large)]
+        await asyncio.sleep(0.01)
+        queue_jobs(factory(), 3)
+        hub.dispatch()
+        return await asyncio.gather(*polls)
+
+    small_jobs, large_jobs = asyncio.run(scenario())
+
+    # Three open slots on the large worker beat one on the small one until they are level
+    assert len(large_jobs) == 2 and len(small_jobs) == 1
+    assert hub.stats()["running"] == 3
+
+def test_jobs_of_a_silent_worker_are_requeued_for_the_others():
+    factory = memory_session_factory()
+    hub = WorkerHub(notify=notify, session_factory=factory)
+    db = factory()
+    [job_id] = queue_jobs(db, 1)
+    lost = hub.register("lost", capacity=1)
+    spare = hub.register("spare", capacity=1)
+
+    async def scenario():
+        [leased] = await hub.lease(lost.id, 1, wait_seconds=0)
+        assert leased["id"] == job_id
+
+        # The lost worker stops heartbeating and its lease runs out
+        db.query(Job).filter(Job.id == job_id).update({Job.lease_expires_at: datetime.utcnow() - timedelta(seconds=1)})
+        db.commit()
+        lost.last_seen -= 60
+        with patch.object(settings, "REMOTE_WORKER_STALE_SECONDS", 30):
+            await hub.supervise_once()
+
+        [released] = await hub.lease(spare.id, 1, wait_seconds=0)
+        assert released["id"] == job_id
+        with pytest.raises(LeaseLost):
+            await hub.report_events(spare.id, "another-job", [])
+        await hub.report_result(spare.id, job_id, result={"status": "COMPLETED", "logs": ["✅ Page loaded"]})
+
+    asyncio.run(scenario())
+
+    assert set(hub.workers) == {spare.id}
+    assert hub.stats()["requeued_total"] == 1
+    job = db.query(Job).filter(Job.id == job_id).first()
+    assert job.status == "COMPLETED" and job.attempts == 2
+    assert "Worker lost; job re-queued." in job.log_lines
+
+def test_heartbeat_tells_the_worker_to_stop_cancelled_jobs():
+    factory = memory_session_factory()
+    hub = WorkerHub(notify=notify, session_factory=factory)
+    db = factory()
+    job_ids = queue_jobs(db, 2)
+    worker = hub.register("box", capacity=2)
+    asyncio.run(hub.lease(worker.id, 2, wait_seconds=0))
+
+    db.query(Job).filter(Job.id == job_ids[0]).update({Job.status: "CANCELLED"})
+    db.commit()
+
+    assert hub.heartbeat(worker.id, job_ids, free_slots=0) == [job_ids[0]]
+
+def test_hub_refuses_to_run_without_a_worker_token(hub_api):
+    with patch.object(settings, "REMOTE_WORKER_TOKEN", ""):
+        with pytest.raises(RuntimeError, match="REMOTE_WORKER_TOKEN"):
+            asyncio.run(WorkerHub(notify=notify).start())
+
+        async def register():
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://api") as client:
+                return await client.post("/workers/register", json={"name": "box", "capacity": 1})
+
+        assert asyncio.run(register()).status_code == 503
@@ -0,0 +1,252 @@
+"""
+Worker Node
+Runs test jobs leased from the API server over HTTP and streams their progress back
+
+    python -m backend.worker --api-url http://api-host:8000 --capacity 2 --processes 2
+
+The API server needs REMOTE_WORKERS_ENABLED so it leaves queued jobs to the
+nodes, and both sides the same REMOTE_WORKER_TOKEN. Screenshots, videos and traces are written to the node's own
+ARTIFACTS_DIR; point it at storage the API serves /artifacts from to keep
+their links working.
+"""
+
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import socket
+from typing import Any, Dict, List, Optional
+import httpx
+from backend.config import settings
+from backend.agent.events import EventStream
+from backend.agent.runner import run_automation_tests_async
+
+logger = logging.getLogger(__name__)
+
+class WorkerNode:
+    """
+    Registers with the API server, long-polls for as many jobs as it has free
+    slots and runs each one locally. Log lines and check events are posted
+    back in batches while the run goes on, and the result when it ends; the
+    API server analyzes and persists them. A heartbeat renews the job leases
+    and stops runs the server no longer wants (cancelled or re-queued).
+    """
+
+    def __init__(self, api_url: Optional[str] = None, name: Optional[str] = None, capacity: int = 1,
+                 token: Optional[str] = None, transport: Optional[httpx.AsyncBaseTransport] = None,
+                 run_tests=run_automation_tests_async):
+        self.api_url = api_url or settings.REMOTE_WORKER_API_URL
+        self.name = name or socket.gethostname()
+        self.capacity = capacity
+        self.token = token if token is not None else settings.REMOTE_WORKER_TOKEN
+        self.transport = transport
+        self.run_tests = run_tests
+        self.worker_id: Optional[str] = None
+        self.long_poll_seconds = settings.REMOTE_WORKER_LONG_POLL_SECONDS
+        self.heartbeat_seconds = settings.REMOTE_WORKER_HEARTBEAT_SECONDS
+        self.runs: Dict[str, asyncio.Task] = {}
+        self.jobs: Dict[str, asyncio.Task] = {}
+        self.completed_total = 0
+        self._client: Optional[httpx.AsyncClient] = None
+
+    async def run(self, stop: Optional[asyncio.Event] = None):
+        """Lease and run jobs until stop is set, then let the running ones finish"""
+        stop = stop or asyncio.Event()
+        headers = {"Authorization": f"Bearer {self.token}"} if self.token else {}
+        async with httpx.AsyncClient(base_url=self.api_url, transport=self.transport, headers=headers,
+                                     timeout=httpx.Timeout(self.long_poll_seconds + 10)) as client:
+            self._client = client
+            heartbeat = asyncio.create_task(self._heartbeat())
+            try:
+                while not stop.is_set():
+                    await self._poll(stop)
+                if self.jobs:
+                    await asyncio.gather(*self.jobs.values(), return_exceptions=True)
+            finally:
+                heartbeat.cancel()
+                for task in self.jobs.values():
+                    task.cancel()
+                self._client = None
+
+    async def register(self):
+        response = await self._client.post("/workers/register", json={"name": self.name, "capacity": self.capacity})
+        response.raise_for_status()
+        registration = response.json()
+        self.worker_id = registration["worker_id"]
+        self.long_poll_seconds = registration["long_poll_seconds"]
+        self.heartbeat_seconds = registration["heartbeat_seconds"]
+        logger.info(f"Registered with {self.api_url} as {self.worker_id} ({self.capacity} slot(s))")
+
+    async def _poll(self, stop: asyncio.Event):
+        free = self.capacity - len(self.jobs)
+        if free <= 0:
+            # Full; wait for a slot instead of asking for work
+            await asyncio.wait(list(self.jobs.values()), return_when=asyncio.FIRST_COMPLETED)
+            return
+        try:
+            if self.worker_id is None:
+                await self.register()
+            lease = asyncio.create_task(self._client.post(
+                f"/workers/{self.worker_id}/lease",
+                json={"free_slots": free, "wait_seconds": self.long_poll_seconds},
+            ))
+            stopped = asyncio.create_task(stop.wait())
+            await asyncio.wait({lease, stopped}, return_when=asyncio.FIRST_COMPLETED)
+            stopped.cancel()
+            if not lease.done():
+                # Stopping; anything claimed for this poll is re-queued once its lease expires
+                lease.cancel()
+                return
+            response = lease.result()
+            if response.status_code == 404:
+                # The server restarted or dropped us as stale
+                self.worker_id = None
+                return
+            response.raise_for_status()
+        except httpx.HTTPError as e:
+            logger.error(f"Could not lease jobs from {self.api_url}: {e}")
+            await asyncio.sleep(settings.WORKER_POLL_SECONDS)
+            return
+
+        for job in response.json():
+            task = asyncio.create_task(self.run_job(job))
+            self.jobs[job["id"]] = task
+            task.add_done_callback(lambda _, job_id=job["id"]: self.jobs.pop(job_id, None))
+
+    async def run_job(self, job: Dict[str, Any]):
+        job_id = job["id"]
+        events = EventStream()
+        run = asyncio.create_task(self.run_tests(job["test_url"], options=job["options"], events=events))
+        self.runs[job_id] = run
+        sender = asyncio.create_task(self._send_events(job_id, events))
+        try:
+            await asyncio.wait({run})
+        finally:
+            self.runs.pop(job_id, None)
+            events.close()
+        await sender
+
+        if run.cancelled():
+            payload = {"cancelled": True}
+        elif run.exception() is not None:
+            payload = {"error": str(run.exception())}
+        else:
+            payload = {"result": run.result()}
+        await self._post(f"/workers/{self.worker_id}/jobs/{job_id}/result", payload, job_id)
+        self.completed_total += 1
+
+    async def _send_events(self, job_id: str, events: EventStream):
+        """Post the run's events in batches of up to LOG_FLUSH_MAX_LINES, at least every LOG_FLUSH_INTERVAL_SECONDS"""
+        batch: List[Dict[str, Any]] = []
+        loop = asyncio.get_running_loop()
+        flush_at = None
+        while True:
+            timeout = None if flush_at is None else max(0.0, flush_at - loop.time())
+            try:
+                batch.append(await asyncio.wait_for(events.__anext__(), timeout))
+                if flush_at is None:
+                    flush_at = loop.time() + settings.LOG_FLUSH_INTERVAL_SECONDS
+                if len(batch) < settings.LOG_FLUSH_MAX_LINES:
+                    continue
+            except asyncio.TimeoutError:
+                pass
+            except StopAsyncIteration:
+                break
+            await self._post(f"/workers/{self.worker_id}/jobs/{job_id}/events", {"events": batch}, job_id)
+            batch = []
+            flush_at = None
+        if batch:
+            await self._post(f"/workers/{self.worker_id}/jobs/{job_id}/events", {"events": batch}, job_id)
+
+    async def _post(self, path: str, payload: Dict[str, Any], job_id: str):
+        """Report to the server, retrying briefly; a job the server no longer gives us is stopped"""
+        for attempt in range(3):
+            try:
+                response = await self._client.post(path, json=payload)
+            except httpx.HTTPError as e:
+                logger.warning(f"Reporting job {job_id} failed ({e}); retrying")
+                await asyncio.sleep(settings.WORKER_POLL_SECONDS * (attempt + 1))
+                continue
+            if response.status_code in (404, 409):
+                logger.info(f"Job {job_id} is no longer leased to {self.worker_id}; stopping it")
+                self._cancel(job_id)
+                return
+            if response.is_success:
+                return
+            logger.warning(f"Reporting job {job_id} failed with HTTP {response.status_code}; retrying")
+            await asyncio.sleep(settings.WORKER_POLL_SECONDS * (attempt + 1))
+        logger.error(f"Gave up reporting job {job_id} to {self.api_url}")
+
+    async def _heartbeat(self):
+        while True:
+            await asyncio.sleep(self.heartbeat_seconds)
+            if self.worker_id is None:
+                continue
+            try:
+                response = await self._client.post(f"/workers/{self.worker_id}/heartbeat", json={
+                    "jobs": list(self.jobs), "free_slots": max(0, self.capacity - len(self.jobs)),
+                })
+                if response.status_code == 404:
+                    self.worker_id = None
+                    continue
+                response.raise_for_status()
+            except httpx.HTTPError as e:
+                logger.warning(f"Heartbeat to {self.api_url} failed: {e}")
+                continue
+            for job_id in response.json()["cancel"]:
+                logger.info(f"Server released job {job_id}; cancelling its run")
+                self._cancel(job_id)
+
+    def _cancel(self, job_id: str):
+        run = self.runs.get(job_id)
+        if run and not run.done():
+            run.cancel()
+
+def node_main(api_url: str, name: str, capacity: int):
+    """Entry point of one node process; each gets its own browser pool"""
+    logging.basicConfig(level=logging.INFO, format=f"%(asctime)s {name} %(levelname)s %(message)s")
+    asyncio.run(_serve(WorkerNode(api_url=api_url, name=name, capacity=capacity)))
+
+async def _serve(node: WorkerNode):
+    from backend.agent.browser_pool import browser_pool
+    from backend.database.core import init_db
+
+    # Artifact bookkeeping stays local to the node
+    init_db()
+    try:
+        await browser_pool.start()
+    except Exception as e:
+        logger.error(f"Could not pre-launch the browser pool: {e}")
+    try:
+        await node.run()
+    finally:
+        await browser_pool.stop()
+
+def main():
+    parser = argparse.ArgumentParser(description="Run test jobs leased from the API server")
+    parser.add_argument("--api-url", default=settings.REMOTE_WORKER_API_URL)
+    parser.add_argument("--name", default=socket.gethostname())
+    parser.add_argument("--capacity", type=int, default=settings.WORKER_CONCURRENCY, help="jobs run at once per process")
+    parser.add_argument("--processes", type=int, default=1, help="independent nodes to start on this machine")
+    args = parser.parse_args()
+
+    if args.processes == 1:
+        node_main(args.api_url, args.name, args.capacity)
+        return
+    context = multiprocessing.get_context("spawn")
+    processes = [
+        context.Process(target=node_main, args=(args.api_url, f"{args.name}-{index}", args.capacity),
+                        name=f"{args.name}-{index}")
+        for index in range(args.processes)
+    ]
+    for process in processes:
+        process.start()
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        for process in processes:
+            process.terminate()
+
+if __name__ == "__main__":
+    main()
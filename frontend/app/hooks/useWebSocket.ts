@@ -2,21 +2,34 @@
 
 import { useEffect, useRef, useState } from 'react';
 
+interface LogEntry {
+  id: number;
+  line: string;
+}
+
 interface WebSocketMessage {
-  status: string;
-  logs: string[];
+  status?: string;
+  logs?: string[];      // Full snapshot, sent when the socket connects
+  log_id?: number;      // Id of the last line in the snapshot
+  entries?: LogEntry[]; // Lines appended since the previous message
   bugs?: any[];
-  message: string;
+  event?: any;
+  message?: string;
 }
 
 export function useWebSocket(jobId: string | null) {
   const [lastMessage, setLastMessage] = useState<WebSocketMessage | null>(null);
+  const [logs, setLogs] = useState<string[]>([]);
   const [connectionStatus, setConnectionStatus] = useState<'Connecting' | 'Open' | 'Closed'>('Closed');
   const ws = useRef<WebSocket | null>(null);
+  const lastLogId = useRef(0);
 
   useEffect(() => {
     if (!jobId) return;
 
+    setLogs([]);
+    lastLogId.current = 0;
+
     const API_URL = process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8000';
     const wsUrl = API_URL.replace('http', 'ws') + `/ws/${jobId}`;
 
@@ -29,7 +42,19 @@ export function useWebSocket(jobId: string | null) {
 
     ws.current.onmessage = (event) => {
       try {
-        const message = JSON.parse(event.data);
+        const message: WebSocketMessage = JSON.parse(event.data);
+        // Apply log updates here rather than from lastMessage so no delta is lost to batching
+        if (message.logs) {
+          setLogs(message.logs);
+          lastLogId.current = message.log_id ?? lastLogId.current;
+        }
+        if (message.entries) {
+          const fresh = message.entries.filter(entry => entry.id > lastLogId.current);
+          if (fresh.length > 0) {
+            lastLogId.current = fresh[fresh.length - 1].id;
+            setLogs(prev => [...prev, ...fresh.map(entry => entry.line)]);
+          }
+        }
         setLastMessage(message);
       } catch (error) {
         console.error('Failed to parse WebSocket message:', error);
@@ -52,5 +77,5 @@ export function useWebSocket(jobId: string | null) {
     };
   }, [jobId]);
 
-  return { lastMessage, connectionStatus };
+  return { lastMessage, logs, connectionStatus };
 }
\ No newline at end of file
@@ -15,7 +15,7 @@ interface LoadingState {
 export default function Dashboard() {
   const isOffline = useOffline();
   
-  const [status, setStatus] = useState<'IDLE' | 'PENDING' | 'RUNNING' | 'COMPLETED' | 'FAILED' | 'ERROR'>('IDLE');
+  const [status, setStatus] = useState<'IDLE' | 'PENDING' | 'RUNNING' | 'COMPLETED' | 'FAILED' | 'ERROR' | 'TIMEOUT' | 'CANCELLED'>('IDLE');
   const [loadingState, setLoadingState] = useState<LoadingState>({ type: 'idle', message: 'Ready to start testing' });
   const [logs, setLogs] = useState<string[]>([]);
   const [jobId, setJobId] = useState<string | null>(null);
@@ -32,14 +32,23 @@ export default function Dashboard() {
   const [testingInstructions, setTestingInstructions] = useState('');
 
   // WebSocket connection
-  const { lastMessage, connectionStatus } = useWebSocket(jobId);
+  const { lastMessage, logs: streamedLogs, connectionStatus } = useWebSocket(jobId);
+
+  // Run output streams in line by line once the job has been accepted
+  useEffect(() => {
+    if (jobId && streamedLogs.length > 0) {
+      setLogs(streamedLogs);
+    }
+  }, [jobId, streamedLogs]);
 
   // Handle WebSocket messages
   useEffect(() => {
     if (lastMessage) {
+      if (!lastMessage.status) return;
       setStatus(lastMessage.status as any);
-      setLogs(lastMessage.logs || []);
-      setBugs(lastMessage.bugs || []);
+      if (lastMessage.bugs) {
+        setBugs(lastMessage.bugs);
+      }
       
       // Update loading state based on status
       switch (lastMessage.status) {
@@ -57,6 +66,12 @@ export default function Dashboard() {
         case 'ERROR':
           setLoadingState({ type: 'error', message: 'An error occurred during testing' });
           break;
+        case 'TIMEOUT':
+          setLoadingState({ type: 'error', message: 'Tests exceeded the time limit' });
+          break;
+        case 'CANCELLED':
+          setLoadingState({ type: 'error', message: 'Test run was cancelled' });
+          break;
       }
     }
   }, [lastMessage]);
@@ -118,12 +133,24 @@ export default function Dashboard() {
       
       if (!res.ok) {
         const errorData = await res.json().catch(() => ({ detail: 'Unknown error' }));
+        if (res.status === 429) {
+          // The scheduler's queue is full; it says when a slot is likely to be free
+          throw new Error(`${errorData.detail}. Try again in ${res.headers.get('Retry-After') || 'a few'} seconds.`);
+        }
         throw new Error(errorData.detail || 'Failed to start tests');
       }
       
       const data = await res.json();
       setJobId(data.id);
-      setLoadingState({ type: 'running', message: 'Test request accepted. Initializing...', progress: 30 });
+      if (data.cached) {
+        // Same request on an unchanged page: the earlier job's result is reused, so no updates will stream
+        setLoadingState({ type: 'completed', message: 'Page unchanged since the last run; showing cached results' });
+        const job = await fetch(`${API_URL}/jobs/${data.id}`).then(r => r.json());
+        setBugs(job.bugs || []);
+        return;
+      }
+      const queued = data.queue_position > 0 ? ` Queued at position ${data.queue_position}.` : '';
+      setLoadingState({ type: 'running', message: `Test request accepted.${queued} Initializing...`, progress: 30 });
     } catch (e: any) {
       setStatus('ERROR');
       setLoadingState({ type: 'error', message: e.message || 'Failed to connect to backend.' });